@@ -3,7 +3,15 @@ from . import models
 
 
 class AIResultAdmin(admin.ModelAdmin):
-    list_display = ('created_at', 'result',)
+    list_display = ('created_at', 'result', 'latency_ms', 'prompt_tokens', 'completion_tokens',)
+    readonly_fields = ('fingerprint', 'model', 'latency_ms', 'prompt_tokens', 'completion_tokens',)
+
+
+class AgentJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'created_at', 'attempts', 'queue_ms', 'run_ms', 'locked_by',)
+    list_filter = ('status',)
+    readonly_fields = ('result',)
 
 
 admin.site.register(models.AIResult, AIResultAdmin)
+admin.site.register(models.AgentJob, AgentJobAdmin)
@@ -1,42 +1,83 @@
-import json
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
 from django.conf import settings
-from django.core import serializers
-from openai import OpenAI
-from ai import prompts, models
-from products.models import Product
-from outflows.models import Outflow, OutflowItem
+from ai import analytics, clients, features, prompts, models, services
+from products import catalog
+
+
+@dataclass
+class AgentInput:
+    messages: List[Dict[str, str]]
+    fingerprint: str
+    catalog_version: int
 
 
 class SGEAgent:
 
-    def __init__(self):
-        self.__client = OpenAI(
-            api_key=settings.OPENAI_API_KEY,
-        )
+    def __init__(self, client=None):
+        self.__client = client
+
+    def __get_data(self, last_result):
+        # Análises sem versão (anteriores ao campo) ou com versão já removida
+        # do registro de alterações recomeçam do catálogo inteiro
+        since = last_result.catalog_version if last_result else None
+        if since and not catalog.delta_available(since):
+            since = None
+        products_data = features.build_prompt_data(since=since)
+        if products_data is None:
+            return None
+
+        sales_data = analytics.render_snapshot(analytics.get_sales_snapshot())
+        return f'{sales_data}\n\n## produtos_alterados\n{products_data}'
 
-    def __get_data(self):
-        products = Product.objects.all()
-        outflows = Outflow.objects.all()
-        outflow_items = OutflowItem.objects.select_related('outflow', 'product')
-        return json.dumps({
-            'products': serializers.serialize('json', products),
-            'outflows': serializers.serialize('json', outflows),
-            'outflow_items': serializers.serialize('json', outflow_items),
-        })
+    def prepare(self) -> Optional[AgentInput]:
+        """Monta a entrada do LLM; retorna None se nada mudou desde a última análise."""
+        last_result = models.AIResult.objects.first()
+        # Lida antes dos dados: alterações gravadas durante a chamada ao LLM
+        # ficam acima desta versão e entram na próxima análise
+        catalog_version = catalog.current_version()
+        data = self.__get_data(last_result)
+        if data is None:
+            return None
+
+        messages = [
+            {
+                'role': 'system',
+                'content': prompts.SYSTEM_PROMPT,
+            },
+            {
+                'role': 'user',
+                'content': prompts.USER_PROMPT.replace('{{data}}', data),
+            },
+        ]
+        fingerprint = services.fingerprint(settings.OPENAI_MODEL, messages)
+        if last_result and last_result.fingerprint == fingerprint:
+            return None
+        return AgentInput(messages, fingerprint, catalog_version)
+
+    def store(self, agent_input: AgentInput, response, latency_ms: int) -> models.AIResult:
+        usage = getattr(response, 'usage', None)
+        return models.AIResult.objects.create(
+            result=response.choices[0].message.content,
+            fingerprint=agent_input.fingerprint,
+            catalog_version=agent_input.catalog_version,
+            model=settings.OPENAI_MODEL,
+            latency_ms=latency_ms,
+            prompt_tokens=getattr(usage, 'prompt_tokens', None),
+            completion_tokens=getattr(usage, 'completion_tokens', None),
+        )
 
     def invoke(self):
-        response = self.__client.chat.completions.create(
+        """Gera uma nova análise; retorna None se a entrada não mudou."""
+        agent_input = self.prepare()
+        if agent_input is None:
+            return None
+
+        client = self.__client or clients.get_client()
+        start = time.perf_counter()
+        response = client.chat.completions.create(
             model=settings.OPENAI_MODEL,
-            messages=[
-                {
-                    'role': 'system',
-                    'content': prompts.SYSTEM_PROMPT,
-                },
-                {
-                    'role': 'user',
-                    'content': prompts.USER_PROMPT.replace('{{data}}', self.__get_data()),
-                },
-            ],
+            messages=agent_input.messages,
         )
-        result = response.choices[0].message.content
-        models.AIResult.objects.create(result=result)
+        return self.store(agent_input, response, int((time.perf_counter() - start) * 1000))
@@ -0,0 +1,168 @@
+"""
+Snapshot de vendas do PDV para o agente de IA.
+
+Resume as vendas recentes em poucas linhas: mais vendidos, produtos parados,
+margem por categoria e por marca e taxa de devolução. Cada bloco é uma
+consulta agregada, e o resultado fica em cache enquanto o catálogo (estoque,
+vendas e devoluções) não muda.
+
+Funções disponíveis:
+- build_sales_snapshot(): Calcula o snapshot (número fixo de consultas)
+- get_sales_snapshot(): Snapshot em cache
+- render_snapshot(): Texto compacto para o prompt
+"""
+from decimal import Decimal
+from typing import Any, Dict, List
+from django.conf import settings
+from django.db.models import DecimalField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from app.caching import metrics_cache
+from pos.models import Sale, SaleItem, Return, ReturnItem
+from products.catalog import current_version
+from products.models import Product
+
+
+SNAPSHOT_CACHE_TIMEOUT = 60 * 60 * 24
+TOP_LIMIT = 10
+
+SOLD_STATUSES = [
+    Sale.Status.FINALIZED,
+    Sale.Status.PARTIALLY_RETURNED,
+    Sale.Status.FULLY_RETURNED,
+]
+
+TWO_PLACES = Decimal('0.01')
+
+_COST = ExpressionWrapper(F('unit_cost') * F('quantity'), output_field=DecimalField(max_digits=20, decimal_places=2))
+
+
+def _percentage(part, total) -> Decimal:
+    if not total:
+        return Decimal('0')
+    return (Decimal(part) * 100 / Decimal(total)).quantize(TWO_PLACES)
+
+
+def _margin_by(items, field: str) -> List[Dict[str, Any]]:
+    rows = items.values(name=F(field)).annotate(
+        revenue=Sum('line_total'),
+        cost=Sum(_COST),
+    ).order_by('-revenue')
+    return [
+        {
+            'name': row['name'],
+            'revenue': row['revenue'],
+            'profit': row['revenue'] - row['cost'],
+            'margin': _percentage(row['revenue'] - row['cost'], row['revenue']),
+        }
+        for row in rows
+    ]
+
+
+def build_sales_snapshot(window_days: int = None) -> Dict[str, Any]:
+    """Calcula o snapshot de vendas dos últimos `window_days` dias.
+
+    Executa sempre 6 consultas, independentemente do volume de vendas.
+    """
+    window_days = window_days or settings.AI_AGENT_WINDOW_DAYS
+    window_start = timezone.now() - timezone.timedelta(days=window_days)
+    sold_filter = Q(sale__status__in=SOLD_STATUSES, sale__finalized_at__gte=window_start)
+    items = SaleItem.objects.filter(sold_filter)
+
+    top_sellers = list(
+        items.values('product_id', title=F('product__title'))
+        .annotate(quantity=Sum('quantity'), revenue=Sum('line_total'))
+        .order_by('-quantity', 'product_id')[:TOP_LIMIT]
+    )
+
+    slow_movers = list(
+        Product.objects.filter(quantity__gt=0)
+        .annotate(sold=Coalesce(
+            Sum('pos_sale_items__quantity', filter=Q(
+                pos_sale_items__sale__status__in=SOLD_STATUSES,
+                pos_sale_items__sale__finalized_at__gte=window_start,
+            )),
+            Value(0),
+        ))
+        .order_by('sold', '-quantity', 'id')
+        .values('id', 'title', 'quantity', 'sold')[:TOP_LIMIT]
+    )
+
+    by_category = _margin_by(items, 'product__category__name')
+    by_brand = _margin_by(items, 'product__brand__name')
+
+    sold_by_category = dict(
+        items.values_list('product__category__name').annotate(total=Sum('quantity'))
+    )
+    returned_by_category = dict(
+        ReturnItem.objects.filter(
+            return_instance__status=Return.Status.COMPLETED,
+            return_instance__completed_at__gte=window_start,
+        ).values_list('product__category__name').annotate(total=Sum('quantity'))
+    )
+    return_rates = sorted(
+        (
+            {
+                'name': name,
+                'sold': sold,
+                'returned': returned_by_category.get(name, 0),
+                'rate': _percentage(returned_by_category.get(name, 0), sold),
+            }
+            for name, sold in sold_by_category.items()
+        ),
+        key=lambda row: (-row['rate'], row['name']),
+    )
+
+    return {
+        'window_days': window_days,
+        'top_sellers': top_sellers,
+        'slow_movers': slow_movers,
+        'margin_by_category': by_category,
+        'margin_by_brand': by_brand,
+        'return_rates': return_rates,
+    }
+
+
+def get_sales_snapshot(window_days: int = None) -> Dict[str, Any]:
+    """Retorna o snapshot em cache.
+
+    A chave inclui a versão do catálogo (que muda a cada venda finalizada,
+    devolução ou alteração de produto) e o dia, já que a janela é móvel.
+    """
+    window_days = window_days or settings.AI_AGENT_WINDOW_DAYS
+    key = f'ai:sales_snapshot:{window_days}:{timezone.now().date()}:{current_version()}'
+    snapshot = metrics_cache.get(key)
+    if snapshot is None:
+        snapshot = build_sales_snapshot(window_days)
+        metrics_cache.set(key, snapshot, SNAPSHOT_CACHE_TIMEOUT)
+    return snapshot
+
+
+def render_snapshot(snapshot: Dict[str, Any]) -> str:
+    """Converte o snapshot em blocos CSV (separador ";") para o prompt."""
+    sections = [
+        ('mais_vendidos', 'id;produto;vendidos;receita', [
+            f'{row["product_id"]};{row["title"]};{row["quantity"]};{row["revenue"]}'
+            for row in snapshot['top_sellers']
+        ]),
+        ('parados', 'id;produto;estoque;vendidos', [
+            f'{row["id"]};{row["title"]};{row["quantity"]};{row["sold"]}'
+            for row in snapshot['slow_movers']
+        ]),
+        ('margem_categoria', 'categoria;receita;lucro;margem_pct', [
+            f'{row["name"]};{row["revenue"]};{row["profit"]};{row["margin"]}'
+            for row in snapshot['margin_by_category']
+        ]),
+        ('margem_marca', 'marca;receita;lucro;margem_pct', [
+            f'{row["name"]};{row["revenue"]};{row["profit"]};{row["margin"]}'
+            for row in snapshot['margin_by_brand']
+        ]),
+        ('devolucoes_categoria', 'categoria;vendidos;devolvidos;taxa_pct', [
+            f'{row["name"]};{row["sold"]};{row["returned"]};{row["rate"]}'
+            for row in snapshot['return_rates']
+        ]),
+    ]
+    blocks = [f'# vendas dos últimos {snapshot["window_days"]} dias']
+    for title, header, lines in sections:
+        blocks.append('\n'.join([f'## {title}', header, *lines]))
+    return '\n\n'.join(blocks)
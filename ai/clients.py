@@ -0,0 +1,61 @@
+"""
+Clientes de LLM usados pelo agente.
+
+get_async_client() é usado pelo executor de jobs (ai/jobs.py), com timeout
+e sem as retentativas internas da biblioteca: as retentativas são do job.
+
+O StubClient imita a interface de chat da OpenAI
+(`client.chat.completions.create`) sem acessar a rede, para testes e
+desenvolvimento offline (AI_AGENT_CLIENT=stub).
+"""
+from types import SimpleNamespace
+from typing import Dict, List
+from django.conf import settings
+from .features import estimate_tokens
+
+
+STUB_RESPONSE = 'Análise local: nenhuma chamada ao modelo foi feita.'
+
+
+class StubClient:
+
+    def __init__(self, content: str = STUB_RESPONSE):
+        self.content = content
+        self.calls: List[Dict] = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model: str, messages: List[Dict[str, str]], **kwargs):
+        self.calls.append({'model': model, 'messages': messages, **kwargs})
+        prompt_tokens = sum(estimate_tokens(message['content']) for message in messages)
+        completion_tokens = estimate_tokens(self.content)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=self.content))],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+            ),
+        )
+
+
+def get_client():
+    """Retorna o cliente configurado em AI_AGENT_CLIENT ('openai' ou 'stub')."""
+    if settings.AI_AGENT_CLIENT == 'stub':
+        return StubClient()
+
+    from openai import OpenAI
+    return OpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL)
+
+
+def get_async_client(timeout: float):
+    """Cliente assíncrono com `timeout` (segundos) e sem retentativas internas."""
+    if settings.AI_AGENT_CLIENT == 'stub':
+        return StubClient()
+
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(
+        api_key=settings.OPENAI_API_KEY,
+        base_url=settings.OPENAI_BASE_URL,
+        timeout=timeout,
+        max_retries=0,
+    )
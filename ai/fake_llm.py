@@ -0,0 +1,106 @@
+"""
+Servidor HTTP local que imita POST /v1/chat/completions da OpenAI.
+
+Usado nos testes do executor de jobs e em desenvolvimento
+(OPENAI_BASE_URL=http://127.0.0.1:<porta>/v1). Permite simular lentidão
+(`delay`) e falhas (`failures` respostas de erro antes de responder).
+
+    with FakeLLMServer(delay=2) as server:
+        client = AsyncOpenAI(api_key='x', base_url=server.base_url)
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+
+class FakeLLMServer:
+
+    def __init__(self, content: str = 'Resposta do LLM falso.', delay: float = 0,
+                 failures: int = 0, host: str = '127.0.0.1', port: int = 0):
+        self.content = content
+        self.delay = delay
+        self.failures = failures
+        self.requests: List[Dict] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                request = json.loads(self.rfile.read(length) or b'{}')
+                with fake._lock:
+                    fake.requests.append(request)
+                    fail = fake.failures > 0
+                    if fail:
+                        fake.failures -= 1
+
+                if fail:
+                    self._send_json(500, {'error': {'message': 'Falha simulada', 'type': 'server_error'}})
+                    return
+
+                time.sleep(fake.delay)
+                prompt_tokens = sum(len(message.get('content', '')) // 4 + 1 for message in request.get('messages', []))
+                completion_tokens = len(fake.content) // 4 + 1
+                try:
+                    self._send_json(200, {
+                        'id': f'chatcmpl-fake-{len(fake.requests)}',
+                        'object': 'chat.completion',
+                        'created': int(time.time()),
+                        'model': request.get('model', 'fake'),
+                        'choices': [{
+                            'index': 0,
+                            'message': {'role': 'assistant', 'content': fake.content},
+                            'finish_reason': 'stop',
+                        }],
+                        'usage': {
+                            'prompt_tokens': prompt_tokens,
+                            'completion_tokens': completion_tokens,
+                            'total_tokens': prompt_tokens + completion_tokens,
+                        },
+                    })
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        return Handler
+
+    def start(self) -> 'FakeLLMServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def __enter__(self) -> 'FakeLLMServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,142 @@
+"""
+Extrator de indicadores por produto (SKU) para o agente de IA.
+
+Em vez de serializar todas as tabelas, calcula com consultas agrupadas:
+estoque, unidades vendidas na janela, giro diário, dias de cobertura e
+alerta de estoque baixo. Os produtos são lidos em blocos e apenas os mais
+relevantes que cabem no orçamento de tokens são enviados ao modelo.
+
+Funções disponíveis:
+- changed_product_ids(): Produtos alterados desde uma versão do catálogo
+- iter_sku_features(): Indicadores por produto, lidos em blocos
+- render_features(): Texto compacto dentro do orçamento de tokens
+- build_prompt_data(): Monta os dados do prompt do agente
+"""
+import heapq
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, Iterator, List, Optional, Set
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+from pos.models import SaleItem
+from products.catalog import LOW_STOCK_THRESHOLD
+from products.models import Product, CatalogChange
+from .analytics import SOLD_STATUSES
+
+
+CHUNK_SIZE = 500
+CHARS_PER_TOKEN = 4
+LOW_COVER_DAYS = 7
+
+HEADER = 'id;produto;estoque;vendidos;giro_dia;dias_cobertura;estoque_baixo'
+
+
+@dataclass
+class SkuFeatures:
+    product_id: int
+    title: str
+    stock: int
+    sold: int
+    velocity: Decimal
+    days_of_cover: Optional[Decimal]
+    low_stock: bool
+
+    @property
+    def priority(self):
+        """Estoque baixo primeiro, depois produtos com maior giro."""
+        return (self.low_stock, self.velocity, -self.product_id)
+
+    def to_line(self) -> str:
+        cover = '' if self.days_of_cover is None else f'{self.days_of_cover:.1f}'
+        return (
+            f'{self.product_id};{self.title};{self.stock};{self.sold};'
+            f'{self.velocity:.2f};{cover};{"sim" if self.low_stock else "não"}'
+        )
+
+
+def changed_product_ids(since: int) -> Set[int]:
+    """Retorna os produtos alterados (cadastro ou estoque) após a versão `since`
+    do catálogo (id de CatalogChange)."""
+    return set(
+        CatalogChange.objects.filter(id__gt=since).values_list('product_id', flat=True).distinct()
+    )
+
+
+def _units_sold(window_start: datetime, product_ids: Optional[Set[int]]) -> dict:
+    items = SaleItem.objects.filter(
+        sale__status__in=SOLD_STATUSES,
+        sale__finalized_at__gte=window_start,
+    )
+    if product_ids is not None:
+        items = items.filter(product_id__in=product_ids)
+    return dict(items.values_list('product_id').annotate(total=Sum('quantity')))
+
+
+def iter_sku_features(product_ids: Optional[Set[int]] = None, window_days: int = None) -> Iterator[SkuFeatures]:
+    """Gera os indicadores de cada produto (todos ou apenas `product_ids`)."""
+    window_days = window_days or settings.AI_AGENT_WINDOW_DAYS
+    sold_by_product = _units_sold(timezone.now() - timezone.timedelta(days=window_days), product_ids)
+
+    products = Product.objects.order_by('id')
+    if product_ids is not None:
+        products = products.filter(id__in=product_ids)
+
+    for product_id, title, stock in products.values_list('id', 'title', 'quantity').iterator(chunk_size=CHUNK_SIZE):
+        sold = sold_by_product.get(product_id, 0)
+        velocity = Decimal(sold) / window_days
+        days_of_cover = (Decimal(max(stock, 0)) / velocity) if velocity else None
+        low_stock = stock <= LOW_STOCK_THRESHOLD or (days_of_cover is not None and days_of_cover < LOW_COVER_DAYS)
+
+        yield SkuFeatures(product_id, title, stock, sold, velocity, days_of_cover, low_stock)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def render_features(features: Iterable[SkuFeatures], token_budget: int) -> Iterator[str]:
+    """Gera o texto em blocos de linhas, sem ultrapassar `token_budget`.
+
+    Mantém em memória apenas os produtos mais prioritários que podem caber
+    no orçamento (heap limitado), independentemente do tamanho do catálogo.
+    """
+    max_rows = max(1, token_budget // estimate_tokens('0;x;0;0;0.00;;não'))
+    heap: List = []
+    for feature in features:
+        entry = (feature.priority, feature.product_id, feature)
+        if len(heap) < max_rows:
+            heapq.heappush(heap, entry)
+        elif entry[0] > heap[0][0]:
+            heapq.heapreplace(heap, entry)
+
+    used = estimate_tokens(HEADER)
+    chunk = [HEADER]
+    for _, _, feature in sorted(heap, key=lambda entry: entry[0], reverse=True):
+        line = feature.to_line()
+        cost = estimate_tokens(line)
+        if used + cost > token_budget:
+            break
+        used += cost
+        chunk.append(line)
+        if len(chunk) >= CHUNK_SIZE:
+            yield '\n'.join(chunk)
+            chunk = []
+
+    if chunk:
+        yield '\n'.join(chunk)
+
+
+def build_prompt_data(since: Optional[int] = None, token_budget: int = None) -> Optional[str]:
+    """Monta os dados do prompt com os produtos alterados após a versão
+    `since` do catálogo (todos os produtos se `since` for None).
+
+    Retorna None quando nenhum produto mudou desde a última análise.
+    """
+    token_budget = token_budget or settings.AI_AGENT_TOKEN_BUDGET
+    product_ids = changed_product_ids(since) if since is not None else None
+    if product_ids is not None and not product_ids:
+        return None
+
+    return '\n'.join(render_features(iter_sku_features(product_ids), token_budget))
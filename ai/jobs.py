@@ -0,0 +1,202 @@
+"""
+Fila de execuções do agente de IA.
+
+O cron enfileira um job por minuto, mas só um job executa por vez: o banco
+admite no máximo um job pendente ou em execução (restrição
+ai_agentjob_single_active), `claim()` não entrega o job enquanto o lease
+estiver ativo e o reserva com um UPDATE condicional (compare-and-set no
+número de tentativas). O executor
+é assíncrono, aplica timeout à chamada do LLM e reagenda falhas com backoff
+até `max_attempts`.
+
+Funções disponíveis:
+- enqueue(): Cria um job, se não houver outro pendente/em execução
+- claim(): Reserva o próximo job disponível com lease
+- run_once(): Executa um job (assíncrono)
+- run_pending(): Executa os jobs disponíveis (assíncrono)
+- metrics(): Tempo em fila e de execução dos jobs recentes
+- prune_jobs(): Remove jobs finalizados antigos em lotes
+"""
+import asyncio
+import inspect
+import os
+import socket
+import time
+from typing import Any, Dict, Optional
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Count, F, Max, Q
+from django.utils import timezone
+from .agent import SGEAgent
+from .clients import get_async_client
+from .models import AgentJob
+
+
+LEASE_MARGIN = 30
+METRICS_WINDOW = 100
+PRUNE_KEEP_DAYS = 7
+PRUNE_BATCH_SIZE = 500
+
+ACTIVE_STATUSES = [AgentJob.Status.PENDING, AgentJob.Status.RUNNING]
+
+
+def default_worker_id() -> str:
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def enqueue(max_attempts: int = None) -> Optional[AgentJob]:
+    """Cria um job pendente; não cria outro se já houver um ativo."""
+    if AgentJob.objects.filter(status__in=ACTIVE_STATUSES).exists():
+        return None
+    try:
+        with transaction.atomic():
+            return AgentJob.objects.create(
+                available_at=timezone.now(),
+                max_attempts=max_attempts or settings.AI_JOB_MAX_ATTEMPTS,
+            )
+    except IntegrityError:
+        # Outro enqueue() concorrente criou o job entre a consulta e o INSERT
+        return None
+
+
+def _expire_stale(now) -> None:
+    """Marca como falhos os jobs com lease vencido e sem tentativas restantes."""
+    AgentJob.objects.filter(
+        status=AgentJob.Status.RUNNING,
+        lease_expires_at__lte=now,
+        attempts__gte=F('max_attempts'),
+    ).update(status=AgentJob.Status.FAILED, finished_at=now, lease_expires_at=None, error='Lease expirado')
+
+
+def claim(worker_id: str, lease_seconds: int) -> Optional[AgentJob]:
+    """Reserva o próximo job disponível para `worker_id`.
+
+    Jobs com lease vencido (worker que morreu no meio) voltam a ser
+    elegíveis. Retorna None se o job ativo estiver em execução: como só
+    existe um, dois workers disputam a mesma linha e o compare-and-set
+    entrega o job a apenas um deles.
+    """
+    now = timezone.now()
+    _expire_stale(now)
+
+    available = Q(status=AgentJob.Status.PENDING, available_at__lte=now)
+    stale = Q(status=AgentJob.Status.RUNNING, lease_expires_at__lte=now)
+    candidate = AgentJob.objects.filter(available | stale).order_by('available_at', 'id').first()
+    if candidate is None:
+        return None
+
+    claimed = AgentJob.objects.filter(id=candidate.id, attempts=candidate.attempts).update(
+        status=AgentJob.Status.RUNNING,
+        locked_by=worker_id,
+        started_at=now,
+        lease_expires_at=now + timezone.timedelta(seconds=lease_seconds),
+        attempts=F('attempts') + 1,
+        queue_ms=int((now - candidate.available_at).total_seconds() * 1000),
+    )
+    if not claimed:
+        return None
+
+    candidate.refresh_from_db()
+    return candidate
+
+
+def _owned(job: AgentJob):
+    return AgentJob.objects.filter(id=job.id, locked_by=job.locked_by, attempts=job.attempts)
+
+
+def _finish(job: AgentJob, status: str, started: float, result=None) -> None:
+    _owned(job).update(
+        status=status,
+        finished_at=timezone.now(),
+        lease_expires_at=None,
+        run_ms=int((time.perf_counter() - started) * 1000),
+        result=result,
+        error='',
+    )
+
+
+def _fail(job: AgentJob, exc: Exception, started: float) -> None:
+    now = timezone.now()
+    fields = {
+        'lease_expires_at': None,
+        'run_ms': int((time.perf_counter() - started) * 1000),
+        'error': f'{type(exc).__name__}: {exc}'[:2000],
+    }
+    if job.attempts < job.max_attempts:
+        backoff = settings.AI_JOB_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+        fields.update(status=AgentJob.Status.PENDING, available_at=now + timezone.timedelta(seconds=backoff))
+    else:
+        fields.update(status=AgentJob.Status.FAILED, finished_at=now)
+    _owned(job).update(**fields)
+
+
+async def _create_completion(client, messages):
+    response = client.chat.completions.create(model=settings.OPENAI_MODEL, messages=messages)
+    if inspect.isawaitable(response):
+        response = await response
+    return response
+
+
+async def run_once(worker_id: str = None, client=None, timeout: float = None) -> Optional[AgentJob]:
+    """Reserva e executa um job. Retorna o job executado ou None se não houver."""
+    timeout = timeout or settings.AI_JOB_TIMEOUT
+    job = await sync_to_async(claim)(worker_id or default_worker_id(), int(timeout) + LEASE_MARGIN)
+    if job is None:
+        return None
+
+    agent = SGEAgent()
+    started = time.perf_counter()
+    try:
+        agent_input = await sync_to_async(agent.prepare)()
+        if agent_input is None:
+            await sync_to_async(_finish)(job, AgentJob.Status.SKIPPED, started)
+            return job
+
+        call_started = time.perf_counter()
+        response = await asyncio.wait_for(
+            _create_completion(client or get_async_client(timeout), agent_input.messages),
+            timeout,
+        )
+        latency_ms = int((time.perf_counter() - call_started) * 1000)
+        result = await sync_to_async(agent.store)(agent_input, response, latency_ms)
+    except Exception as exc:
+        await sync_to_async(_fail)(job, exc, started)
+    else:
+        await sync_to_async(_finish)(job, AgentJob.Status.SUCCEEDED, started, result)
+    return job
+
+
+async def run_pending(worker_id: str = None, client=None, timeout: float = None, max_jobs: int = 10) -> int:
+    """Executa jobs disponíveis, um por vez, até `max_jobs`. Retorna quantos executou."""
+    executed = 0
+    while executed < max_jobs and await run_once(worker_id, client, timeout):
+        executed += 1
+    return executed
+
+
+def metrics() -> Dict[str, Any]:
+    """Contagem por status e tempos (ms) dos últimos METRICS_WINDOW jobs."""
+    recent_ids = AgentJob.objects.order_by('-id').values_list('id', flat=True)[:METRICS_WINDOW]
+    data = AgentJob.objects.filter(id__in=list(recent_ids)).aggregate(
+        total=Count('id'),
+        **{status: Count('id', filter=Q(status=status)) for status in AgentJob.Status.values},
+        avg_queue_ms=Avg('queue_ms'),
+        max_queue_ms=Max('queue_ms'),
+        avg_run_ms=Avg('run_ms'),
+        max_run_ms=Max('run_ms'),
+    )
+    return data
+
+
+def prune_jobs(keep_days: int = PRUNE_KEEP_DAYS, batch_size: int = PRUNE_BATCH_SIZE) -> int:
+    """Remove, em lotes, jobs finalizados há mais de `keep_days` dias."""
+    finished = AgentJob.objects.exclude(status__in=ACTIVE_STATUSES).filter(
+        created_at__lt=timezone.now() - timezone.timedelta(days=keep_days),
+    )
+    deleted = 0
+    while True:
+        ids = list(finished.order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += AgentJob.objects.filter(id__in=ids).delete()[0]
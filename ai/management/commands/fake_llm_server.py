@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from ai.fake_llm import FakeLLMServer
+
+
+class Command(BaseCommand):
+    help = 'Sobe um servidor local que imita a API de chat da OpenAI'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--delay', type=float, default=0, help='Atraso de cada resposta (s)')
+        parser.add_argument('--failures', type=int, default=0, help='Respostas com erro antes de responder')
+
+    def handle(self, *args, **options):
+        server = FakeLLMServer(delay=options['delay'], failures=options['failures'], port=options['port'])
+        self.stdout.write(f'Use OPENAI_BASE_URL={server.base_url} (Ctrl+C para sair)')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.stop()
@@ -1,13 +1,31 @@
+from asgiref.sync import async_to_sync
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from ai.agent import SGEAgent
+from ai import jobs
+from ai.services import prune_results
 
 
 class Command(BaseCommand):
+    help = 'Enfileira e executa a análise do agente de IA (um job por vez)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--timeout', type=float, default=settings.AI_JOB_TIMEOUT, help='Timeout da chamada ao LLM (s)')
+        parser.add_argument('--max-jobs', type=int, default=10)
 
     def handle(self, *args, **options):
-        agent = SGEAgent()
-        agent.invoke()
+        jobs.enqueue()
+        executed = async_to_sync(jobs.run_pending)(timeout=options['timeout'], max_jobs=options['max_jobs'])
+        if not executed:
+            self.stdout.write('Nenhum job disponível (outro job em execução ou aguardando nova tentativa).')
+            return
 
+        pruned = prune_results() + jobs.prune_jobs()
+        data = jobs.metrics()
         self.stdout.write(
-            self.style.SUCCESS('SGE AGENT INVOCADO COM SUCESSO!')
+            self.style.SUCCESS(
+                f'SGE AGENT: {executed} job(s) executado(s); últimos {data["total"]}: '
+                f'{data["succeeded"]} concluídos, {data["skipped"]} sem alterações, {data["failed"]} falhos; '
+                f'fila média {data["avg_queue_ms"] or 0:.0f} ms, execução média {data["avg_run_ms"] or 0:.0f} ms; '
+                f'{pruned} registros antigos removidos'
+            )
         )
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.1 on 2026-10-19 00:06
+
+import hashlib
+from django.db import migrations, models
+from app.templatetags.markdown_extras import render_markdown
+
+
+def render_existing_results(apps, schema_editor):
+    AIResult = apps.get_model('ai', 'AIResult')
+    for result in AIResult.objects.iterator(chunk_size=200):
+        result.result_hash = hashlib.sha256((result.result or '').encode()).hexdigest()
+        result.result_html = render_markdown(result.result or '')
+        result.save(update_fields=['result_hash', 'result_html'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0003_agentjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='airesult',
+            name='result_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='airesult',
+            name='result_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(render_existing_results, migrations.RunPython.noop),
+    ]
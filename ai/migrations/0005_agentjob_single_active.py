@@ -0,0 +1,31 @@
+# Generated by Django 5.0.1 on 2026-10-19 01:19
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fail_extra_active_jobs(apps, schema_editor):
+    """Mantém só o job ativo mais antigo; os demais viram falhos para a
+    restrição de job único poder ser criada."""
+    AgentJob = apps.get_model('ai', 'AgentJob')
+    active = AgentJob.objects.filter(status__in=['pending', 'running']).order_by('id')
+    first = active.values_list('id', flat=True).first()
+    if first is not None:
+        active.exclude(id=first).update(
+            status='failed', finished_at=timezone.now(), lease_expires_at=None, error='Job duplicado',
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0004_airesult_result_html'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_extra_active_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='agentjob',
+            constraint=models.UniqueConstraint(models.Value(True), condition=models.Q(('status__in', ['pending', 'running'])), name='ai_agentjob_single_active'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 01:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0005_agentjob_single_active'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='airesult',
+            name='catalog_version',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -1,9 +1,79 @@
+import hashlib
 from django.db import models
+from app.templatetags.markdown_extras import render_markdown
 
 
 class AIResult(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     result = models.TextField(null=True, blank=True)
+    result_html = models.TextField(blank=True, editable=False)
+    result_hash = models.CharField(max_length=64, blank=True, editable=False)
+    fingerprint = models.CharField(max_length=64, blank=True, db_index=True)
+    model = models.CharField(max_length=100, blank=True)
+    latency_ms = models.PositiveIntegerField(null=True, blank=True)
+    prompt_tokens = models.PositiveIntegerField(null=True, blank=True)
+    completion_tokens = models.PositiveIntegerField(null=True, blank=True)
+    # Versão do catálogo (CatalogChange) lida antes de montar a entrada; a
+    # próxima análise parte dela, e não de created_at (gravado só após o LLM)
+    catalog_version = models.PositiveBigIntegerField(null=True, blank=True)
 
     class Meta:
         ordering = ['-created_at']
+
+    def save(self, *args, **kwargs):
+        """Renderiza o markdown uma única vez, quando o texto muda."""
+        result_hash = hashlib.sha256((self.result or '').encode()).hexdigest()
+        if result_hash != self.result_hash:
+            self.result_hash = result_hash
+            self.result_html = render_markdown(self.result or '')
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'result_hash', 'result_html'}
+        super().save(*args, **kwargs)
+
+    @property
+    def total_tokens(self):
+        if self.prompt_tokens is None or self.completion_tokens is None:
+            return None
+        return self.prompt_tokens + self.completion_tokens
+
+
+class AgentJob(models.Model):
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pendente'
+        RUNNING = 'running', 'Executando'
+        SUCCEEDED = 'succeeded', 'Concluído'
+        SKIPPED = 'skipped', 'Sem alterações'
+        FAILED = 'failed', 'Falhou'
+
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField()
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    error = models.TextField(blank=True)
+    queue_ms = models.PositiveIntegerField(null=True, blank=True)
+    run_ms = models.PositiveIntegerField(null=True, blank=True)
+    result = models.ForeignKey(AIResult, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+        constraints = [
+            # No máximo um job pendente ou em execução: enqueue() e claim()
+            # concorrentes esbarram aqui em vez de duplicar a execução
+            models.UniqueConstraint(
+                models.Value(True),
+                condition=models.Q(status__in=['pending', 'running']),
+                name='ai_agentjob_single_active',
+            ),
+        ]
+
+    def __str__(self):
+        return f'Job #{self.pk} - {self.get_status_display()}'
@@ -8,6 +8,11 @@ os usuários do sistema.
 '''
 
 USER_PROMPT = '''
-Faça uma análise e dê sugestões com base nos dados atuais:
+Faça uma análise e dê sugestões com base nos dados atuais.
+Os dados estão em blocos CSV separados por ";". Os primeiros resumem as vendas do PDV
+na janela recente: mais vendidos, produtos parados, margem por categoria e por marca e
+taxa de devolução por categoria. O bloco produtos_alterados tem uma linha por produto
+alterado desde a última análise: estoque atual, unidades vendidas e giro diário,
+dias de cobertura do estoque (vazio quando não houve vendas) e alerta de estoque baixo.
 {{data}}
 '''
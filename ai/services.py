@@ -0,0 +1,40 @@
+"""
+Serviços do agente de IA.
+
+Funções disponíveis:
+- fingerprint(): Hash do modelo e das mensagens enviadas ao LLM
+- prune_results(): Remove AIResult antigos em lotes
+"""
+import hashlib
+import json
+from typing import Dict, List
+from django.conf import settings
+from .models import AIResult
+
+
+PRUNE_BATCH_SIZE = 500
+
+
+def fingerprint(model: str, messages: List[Dict[str, str]]) -> str:
+    """Retorna o SHA-256 da entrada do LLM (mesma entrada, mesmo hash)."""
+    payload = json.dumps({'model': model, 'messages': messages}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def prune_results(keep: int = None, batch_size: int = PRUNE_BATCH_SIZE) -> int:
+    """Mantém apenas os `keep` resultados mais recentes.
+
+    Exclui em lotes de `batch_size` ids para não travar a tabela com um
+    único DELETE grande. Retorna quantos registros foram removidos.
+    """
+    keep = settings.AI_RESULTS_KEEP if keep is None else keep
+    cutoff = list(AIResult.objects.order_by('-id').values_list('id', flat=True)[keep:keep + 1])
+    if not cutoff:
+        return 0
+
+    deleted = 0
+    while True:
+        ids = list(AIResult.objects.filter(id__lte=cutoff[0]).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += AIResult.objects.filter(id__in=ids).delete()[0]
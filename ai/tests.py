@@ -0,0 +1,382 @@
+"""
+Testes do agente de IA.
+Execute com: python manage.py test ai
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from openai import AsyncOpenAI
+from ai import analytics, features, jobs, services
+from ai.agent import SGEAgent
+from ai.clients import StubClient
+from ai.fake_llm import FakeLLMServer
+from ai.models import AIResult, AgentJob
+from app.templatetags import markdown_extras
+from brands.models import Brand
+from categories.models import Category
+from customers.models import Customer
+from pos.models import Sale, SaleItem, Return, ReturnItem
+from products import catalog
+from products.models import Product
+
+
+class AIDataTestCase(TestCase):
+    """Base com produtos e vendas finalizadas do PDV."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='ai', password='12345')
+        self.customer = Customer.objects.create(full_name='Cliente IA', phone='11988887777')
+        self.brand = Brand.objects.create(name='Marca IA')
+        self.category = Category.objects.create(name='Categoria IA')
+        self.fast = self._product('Camiseta Giro', 20)
+        self.slow = self._product('Boné Parado', 50)
+        self.low = self._product('Meia Acabando', 2)
+        self._sell(self.fast, 30)
+
+    def _product(self, title, quantity):
+        return Product.objects.create(
+            title=title,
+            brand=self.brand,
+            category=self.category,
+            cost_price=Decimal('10.00'),
+            selling_price=Decimal('20.00'),
+            quantity=quantity,
+        )
+
+    def _sell(self, product, quantity, unit_cost=Decimal('0')):
+        sale = Sale.objects.create(
+            customer=self.customer,
+            user=self.user,
+            status=Sale.Status.FINALIZED,
+            finalized_at=timezone.now(),
+        )
+        SaleItem.objects.create(
+            sale=sale,
+            product=product,
+            quantity=quantity,
+            unit_price=Decimal('20.00'),
+            unit_cost=unit_cost,
+        )
+
+
+class FeatureExtractorTestCase(AIDataTestCase):
+    """Testes do extrator de indicadores por produto."""
+
+    def test_features_use_grouped_queries(self):
+        """Indicadores calculados com número fixo de consultas."""
+        with self.assertNumQueries(2):
+            rows = {row.product_id: row for row in features.iter_sku_features(window_days=30)}
+
+        fast = rows[self.fast.id]
+        self.assertEqual(fast.sold, 30)
+        self.assertEqual(fast.velocity, Decimal('1'))
+        self.assertEqual(fast.days_of_cover, Decimal('20'))
+        self.assertFalse(fast.low_stock)
+
+        self.assertIsNone(rows[self.slow.id].days_of_cover)
+        self.assertFalse(rows[self.slow.id].low_stock)
+        self.assertTrue(rows[self.low.id].low_stock)
+
+    def test_token_budget_keeps_priority_rows(self):
+        """Orçamento pequeno mantém estoque baixo e maior giro primeiro."""
+        budget = features.estimate_tokens(features.HEADER) + 2 * features.estimate_tokens(
+            self.low.title + ';' * 6 + '0000000000'
+        )
+        text = '\n'.join(features.render_features(features.iter_sku_features(), budget))
+
+        lines = text.splitlines()
+        self.assertEqual(lines[0], features.HEADER)
+        self.assertLessEqual(sum(features.estimate_tokens(line) for line in lines), budget)
+        self.assertTrue(lines[1].startswith(f'{self.low.id};'))
+        self.assertNotIn('Boné Parado', text)
+
+    def test_only_changed_rows_since_last_result(self):
+        """Somente produtos alterados após o último AIResult entram no prompt."""
+        result = AIResult.objects.create(result='Análise anterior', catalog_version=catalog.current_version())
+        self.assertIsNone(features.build_prompt_data(since=result.catalog_version))
+
+        self.slow.quantity = 45
+        self.slow.save()
+        data = features.build_prompt_data(since=result.catalog_version)
+
+        self.assertIn('Boné Parado', data)
+        self.assertNotIn('Camiseta Giro', data)
+        self.assertNotIn('Meia Acabando', data)
+
+    def test_change_during_llm_call_enters_next_analysis(self):
+        """Alteração gravada entre prepare() e store() não se perde."""
+        agent = SGEAgent()
+        agent_input = agent.prepare()
+
+        self.slow.quantity = 45
+        self.slow.save()
+        agent.store(agent_input, StubClient().chat.completions.create(model='x', messages=[]), 10)
+
+        data = features.build_prompt_data(since=AIResult.objects.first().catalog_version)
+        self.assertIn('Boné Parado', data)
+        self.assertNotIn('Camiseta Giro', data)
+
+    def test_first_run_includes_all_products(self):
+        data = features.build_prompt_data()
+        for product in (self.fast, self.slow, self.low):
+            self.assertIn(product.title, data)
+
+
+class SalesSnapshotTestCase(AIDataTestCase):
+    """Testes do snapshot de vendas do PDV."""
+
+    def setUp(self):
+        super().setUp()
+        self.other_brand = Brand.objects.create(name='Outra Marca')
+        self.other_category = Category.objects.create(name='Outra Categoria')
+        self.cap = self._product('Chapéu', 10)
+        self.cap.brand = self.other_brand
+        self.cap.category = self.other_category
+        self.cap.save()
+        item = self._sell(self.cap, 4, unit_cost=Decimal('5.00'))
+        self._return(item, 1)
+
+    def _sell(self, product, quantity, unit_cost=Decimal('0')):
+        super()._sell(product, quantity, unit_cost)
+        return SaleItem.objects.filter(product=product).latest('id')
+
+    def _return(self, sale_item, quantity):
+        instance = Return.objects.create(
+            original_sale=sale_item.sale,
+            customer=self.customer,
+            user=self.user,
+            reason='Defeito',
+            status=Return.Status.COMPLETED,
+            completed_at=timezone.now(),
+        )
+        ReturnItem.objects.create(
+            return_instance=instance,
+            sale_item=sale_item,
+            product=sale_item.product,
+            quantity=quantity,
+            unit_price=sale_item.unit_price,
+        )
+
+    def test_snapshot_uses_fixed_number_of_queries(self):
+        with self.assertNumQueries(6):
+            analytics.build_sales_snapshot(window_days=30)
+
+        for i in range(5):
+            self._sell(self._product(f'Extra {i}', 10), 1)
+        with self.assertNumQueries(6):
+            analytics.build_sales_snapshot(window_days=30)
+
+    def test_snapshot_content(self):
+        snapshot = analytics.build_sales_snapshot(window_days=30)
+
+        self.assertEqual(snapshot['top_sellers'][0]['product_id'], self.fast.id)
+        self.assertEqual(snapshot['top_sellers'][0]['quantity'], 30)
+        self.assertEqual(snapshot['slow_movers'][0]['id'], self.slow.id)
+        self.assertEqual(snapshot['slow_movers'][0]['sold'], 0)
+
+        brands = {row['name']: row for row in snapshot['margin_by_brand']}
+        self.assertEqual(brands['Outra Marca']['revenue'], Decimal('80.00'))
+        self.assertEqual(brands['Outra Marca']['profit'], Decimal('60.00'))
+        self.assertEqual(brands['Outra Marca']['margin'], Decimal('75.00'))
+
+        rates = {row['name']: row for row in snapshot['return_rates']}
+        self.assertEqual(rates['Outra Categoria']['rate'], Decimal('25.00'))
+        self.assertEqual(rates['Categoria IA']['rate'], Decimal('0'))
+
+    def test_snapshot_is_cached_until_catalog_changes(self):
+        first = analytics.get_sales_snapshot(window_days=30)
+        with self.assertNumQueries(1):
+            self.assertEqual(analytics.get_sales_snapshot(window_days=30), first)
+
+        self._sell(self.slow, 3)
+        self.slow.quantity -= 3
+        self.slow.save()
+        refreshed = analytics.get_sales_snapshot(window_days=30)
+        self.assertNotEqual(refreshed['slow_movers'][0]['id'], self.slow.id)
+
+    def test_render_snapshot(self):
+        text = analytics.render_snapshot(analytics.build_sales_snapshot(window_days=30))
+        self.assertIn('## mais_vendidos', text)
+        self.assertIn('Chapéu', text)
+        self.assertIn('## devolucoes_categoria', text)
+
+
+class AgentTestCase(AIDataTestCase):
+    """Testes do agente com cliente local (sem rede)."""
+
+    def setUp(self):
+        super().setUp()
+        self.client_stub = StubClient('Repor Meia Acabando.')
+        self.agent = SGEAgent(client=self.client_stub)
+
+    def test_invoke_stores_fingerprint_and_usage(self):
+        result = self.agent.invoke()
+
+        self.assertEqual(len(self.client_stub.calls), 1)
+        self.assertEqual(result.result, 'Repor Meia Acabando.')
+        self.assertEqual(len(result.fingerprint), 64)
+        self.assertIsNotNone(result.latency_ms)
+        self.assertGreater(result.prompt_tokens, 0)
+        self.assertGreater(result.total_tokens, result.prompt_tokens)
+
+    def test_unchanged_input_skips_llm_call(self):
+        self.agent.invoke()
+        self.assertIsNone(self.agent.invoke())
+
+        self.slow.quantity = 40
+        self.slow.save()
+        self.assertIsNotNone(self.agent.invoke())
+
+        # Mesmo produto salvo de novo sem mudança: mesma entrada, mesmo hash.
+        self.slow.save()
+        self.assertIsNone(self.agent.invoke())
+
+        self.assertEqual(len(self.client_stub.calls), 2)
+        self.assertEqual(AIResult.objects.count(), 2)
+
+    def test_pruned_catalog_version_restarts_from_full_catalog(self):
+        first = self.agent.invoke()
+        self.fast.save()
+        self.slow.quantity = 40
+        self.slow.save()
+        catalog.prune_changes(before=timezone.now() + timedelta(days=1))
+        self.assertLess(first.catalog_version, catalog.version_range()[0] - 1)
+
+        self.agent.invoke()
+
+        prompt = self.client_stub.calls[-1]['messages'][-1]['content']
+        self.assertIn('Meia Acabando', prompt)
+
+    def test_prune_results_in_batches(self):
+        results = [AIResult.objects.create(result=str(i)) for i in range(7)]
+
+        self.assertEqual(services.prune_results(keep=3, batch_size=2), 4)
+        self.assertEqual(
+            list(AIResult.objects.order_by('id').values_list('id', flat=True)),
+            [result.id for result in results[-3:]],
+        )
+        self.assertEqual(services.prune_results(keep=3), 0)
+
+
+@override_settings(AI_JOB_RETRY_BACKOFF=0)
+class AgentJobTestCase(AIDataTestCase):
+    """Testes da fila de jobs e do executor assíncrono com o LLM falso."""
+
+    def _client(self, server):
+        return AsyncOpenAI(api_key='fake', base_url=server.base_url, max_retries=0)
+
+    def test_enqueue_keeps_single_active_job(self):
+        self.assertIsNotNone(jobs.enqueue())
+        self.assertIsNone(jobs.enqueue())
+        self.assertEqual(AgentJob.objects.count(), 1)
+
+    def test_database_allows_single_active_job(self):
+        jobs.enqueue()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            AgentJob.objects.create(available_at=timezone.now())
+
+        AgentJob.objects.update(status=AgentJob.Status.SUCCEEDED)
+        self.assertIsNotNone(jobs.enqueue())
+
+    def test_claim_does_not_overlap_running_job(self):
+        first = jobs.enqueue()
+        self.assertEqual(jobs.claim('worker-a', 60).id, first.id)
+
+        self.assertIsNone(jobs.enqueue())
+        self.assertIsNone(jobs.claim('worker-b', 60))
+
+        AgentJob.objects.filter(id=first.id).update(lease_expires_at=timezone.now() - timezone.timedelta(seconds=1))
+        reclaimed = jobs.claim('worker-b', 60)
+        self.assertEqual(reclaimed.id, first.id)
+        self.assertEqual(reclaimed.attempts, 2)
+
+    def test_run_with_fake_server(self):
+        job = jobs.enqueue()
+        with FakeLLMServer(content='Repor estoque.') as server:
+            executed = async_to_sync(jobs.run_pending)('worker', self._client(server), timeout=5)
+
+        job.refresh_from_db()
+        self.assertEqual(executed, 1)
+        self.assertEqual(job.status, AgentJob.Status.SUCCEEDED)
+        self.assertEqual(job.result.result, 'Repor estoque.')
+        self.assertIsNotNone(job.queue_ms)
+        self.assertIsNotNone(job.run_ms)
+        self.assertGreater(job.result.prompt_tokens, 0)
+        self.assertEqual(len(server.requests), 1)
+
+    def test_unchanged_input_is_skipped(self):
+        jobs.enqueue()
+        async_to_sync(jobs.run_once)('worker', StubClient())
+        job = jobs.enqueue()
+        async_to_sync(jobs.run_once)('worker', StubClient())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, AgentJob.Status.SKIPPED)
+        self.assertEqual(AIResult.objects.count(), 1)
+
+    def test_retries_failures_until_success(self):
+        job = jobs.enqueue(max_attempts=3)
+        with FakeLLMServer(failures=2) as server:
+            async_to_sync(jobs.run_pending)('worker', self._client(server), timeout=5)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, AgentJob.Status.SUCCEEDED)
+        self.assertEqual(job.attempts, 3)
+        self.assertEqual(len(server.requests), 3)
+
+    def test_timeout_fails_after_max_attempts(self):
+        job = jobs.enqueue(max_attempts=2)
+        with FakeLLMServer(delay=1) as server:
+            async_to_sync(jobs.run_pending)('worker', self._client(server), timeout=0.2)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, AgentJob.Status.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIn('TimeoutError', job.error)
+        self.assertFalse(AIResult.objects.exists())
+
+        data = jobs.metrics()
+        self.assertEqual(data['failed'], 1)
+        self.assertIsNotNone(data['avg_run_ms'])
+
+
+class MarkdownRenderTestCase(TestCase):
+    """Testes do HTML do resultado renderizado na gravação."""
+
+    def test_html_rendered_once_per_content(self):
+        result = AIResult.objects.create(result='## Reposição\n\n- **Meia**: repor 10')
+        self.assertIn('<strong>Meia</strong>', result.result_html)
+
+        with mock.patch('ai.models.render_markdown') as render:
+            result.save()
+            AIResult.objects.get(id=result.id).save()
+        render.assert_not_called()
+
+        result.result = 'Novo texto'
+        result.save(update_fields=['result'])
+        result.refresh_from_db()
+        self.assertEqual(result.result_html, '<p>Novo texto</p>')
+
+    def test_pooled_instance_is_reset_between_conversions(self):
+        first = markdown_extras.render_markdown('# Título\n\ntexto 1')
+        second = markdown_extras.render_markdown('# Título\n\ntexto 2')
+
+        self.assertIn('id="titulo"', first)
+        self.assertIn('id="titulo"', second)
+        self.assertIs(markdown_extras._get_markdown(), markdown_extras._get_markdown())
+
+    def test_home_uses_stored_html(self):
+        user = User.objects.create_user(username='home', password='12345')
+        AIResult.objects.create(result='**Análise** pronta')
+        self.client.force_login(user)
+
+        with mock.patch('app.templatetags.markdown_extras.markdown.Markdown') as markdown_class:
+            response = self.client.get('/')
+        markdown_class.assert_not_called()
+        self.assertContains(response, '<strong>Análise</strong> pronta')
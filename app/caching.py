@@ -0,0 +1,363 @@
+"""
+Caches nomeados do sistema e backend em dois níveis (L1 local + L2 compartilhado).
+
+Aliases (settings.CACHES, montado por cache_config()):
+- default: uso geral
+- hot: consultas quentes do PDV (buscas, gerações do registro); L1 no
+  processo na frente do L2
+- metrics: agregados de painel/IA (valorização do estoque, snapshot de vendas)
+- sessions: sessões (SESSION_CACHE_ALIAS; ver session_engine())
+
+CACHE_MODE escolhe onde fica o nível compartilhado:
+- local (padrão): LocMem, um por processo (desenvolvimento)
+- file: FileBasedCache em CACHE_DIR, compartilhado pelos workers da máquina
+- redis: RedisCache em CACHE_REDIS_URL (Redis, Valkey, KeyDB...); exige o
+  pacote redis
+
+Versionamento de chaves: todas as chaves passam por make_key() no formato
+`sge:<alias>:<CACHE_VERSION>:<chave>`. Subir CACHE_VERSION (ex.: num deploy
+que muda a estrutura dos valores guardados) descarta de uma vez o cache de
+todos os aliases, sem apagar nada. Chaves longas ou com caracteres inválidos
+para memcached/Redis viram um hash.
+
+O L1 do alias hot guarda cada valor por no máximo CACHE_L1_TIMEOUT segundos:
+alterações feitas por outro processo (incr de geração, delete) aparecem aqui
+com esse atraso máximo; no próprio processo, a escrita atualiza o L1 na hora.
+
+Variáveis: CACHE_MODE, CACHE_DIR, CACHE_REDIS_URL, CACHE_VERSION,
+CACHE_L1_TIMEOUT, CACHE_L1_MAX_ENTRIES.
+"""
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Mapping, Optional
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.redis import RedisCache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.connection import ConnectionProxy
+from django.utils.module_loading import import_string
+
+
+CACHE_MODES = ('local', 'file', 'redis')
+
+DEFAULT = 'default'
+HOT = 'hot'
+METRICS = 'metrics'
+SESSIONS = 'sessions'
+ALIASES = (DEFAULT, HOT, METRICS, SESSIONS)
+
+MAX_KEY_LENGTH = 200
+CLEAR_BATCH_SIZE = 500
+
+# Acesso por thread, como django.core.cache.cache
+hot_cache = ConnectionProxy(caches, HOT)
+metrics_cache = ConnectionProxy(caches, METRICS)
+
+
+def make_key(key: str, key_prefix: str, version: Any) -> str:
+    """KEY_FUNCTION de todos os aliases: `prefixo:versão:chave`, com hash se necessário."""
+    if len(key) > MAX_KEY_LENGTH or any(ord(char) < 33 or ord(char) == 127 for char in key):
+        key = 'h:' + hashlib.sha1(key.encode()).hexdigest()
+    return f'{key_prefix}:{version}:{key}'
+
+
+def _shared(alias: str, mode: str, env: Mapping[str, str], base_dir) -> Dict[str, Any]:
+    if mode == 'file':
+        return {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(env.get('CACHE_DIR') or base_dir.parent / 'cache') + f'/{alias}',
+        }
+    if mode == 'redis':
+        return {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': env.get('CACHE_REDIS_URL', 'redis://127.0.0.1:6379/1'),
+        }
+    return {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': f'sge-{alias}',
+    }
+
+
+def cache_config(env: Mapping[str, str], base_dir) -> Dict[str, Dict[str, Any]]:
+    """Retorna o dict de settings.CACHES com os aliases do sistema."""
+    mode = env.get('CACHE_MODE', 'local')
+    if mode not in CACHE_MODES:
+        raise ImproperlyConfigured(f'CACHE_MODE inválido: "{mode}" (use {", ".join(CACHE_MODES)})')
+
+    common = {
+        'VERSION': int(env.get('CACHE_VERSION') or 1),
+        'KEY_FUNCTION': 'app.caching.make_key',
+    }
+
+    # Todos os aliases passam pelo TieredCache (contadores de acerto); só o
+    # hot tem L1, nos demais o valor vai direto ao nível compartilhado
+    def alias_config(alias, l1_timeout=0, **extra):
+        return {
+            'BACKEND': 'app.caching.TieredCache',
+            'LOCATION': alias,
+            'KEY_PREFIX': f'sge:{alias}',
+            **common,
+            **extra,
+            'OPTIONS': {
+                'L2': _shared(alias, mode, env, base_dir),
+                'L1_TIMEOUT': l1_timeout,
+                'L1_MAX_ENTRIES': int(env.get('CACHE_L1_MAX_ENTRIES') or 2000),
+            },
+        }
+
+    return {
+        DEFAULT: alias_config(DEFAULT),
+        HOT: alias_config(HOT, l1_timeout=int(env.get('CACHE_L1_TIMEOUT') or 5)),
+        METRICS: alias_config(METRICS, TIMEOUT=60 * 60),
+        # A sessão define a própria expiração (SESSION_COOKIE_AGE)
+        SESSIONS: alias_config(SESSIONS, TIMEOUT=None),
+    }
+
+
+def session_engine(env: Mapping[str, str]) -> str:
+    """SESSION_ENGINE para o CACHE_MODE: cached_db só com cache compartilhado.
+
+    Com LocMem cada worker teria a própria cópia da sessão, e um logout num
+    worker não derrubaria a sessão em cache nos outros; nesse caso o padrão
+    é o backend db. SESSION_BACKEND força um backend específico.
+    """
+    default = 'db' if env.get('CACHE_MODE', 'local') == 'local' else 'cached_db'
+    return f'django.contrib.sessions.backends.{env.get("SESSION_BACKEND") or default}'
+
+
+class _LocalStore:
+    """Nível L1: valores serializados em memória, com TTL e descarte LRU."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.data: 'OrderedDict[str, tuple]' = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {'l1_hits': 0, 'l2_hits': 0, 'misses': 0, 'writes': 0, 'deletes': 0}
+
+    def get(self, key: str, sentinel: Any) -> Any:
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return sentinel
+            expires_at, payload = item
+            if expires_at <= time.monotonic():
+                del self.data[key]
+                return sentinel
+            self.data.move_to_end(key)
+        return pickle.loads(payload)
+
+    def set(self, key: str, value: Any, timeout: float) -> None:
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.data[key] = (time.monotonic() + timeout, payload)
+            self.data.move_to_end(key)
+            while len(self.data) > self.max_entries:
+                self.data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self.lock:
+            self.data.pop(key, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.data.clear()
+
+
+# Um L1 por LOCATION e por processo (compartilhado entre as threads), como o LocMemCache
+_stores: Dict[str, _LocalStore] = {}
+_stores_lock = threading.Lock()
+
+# Acertos/falhas da requisição em curso (app/middleware.py)
+_request_counters: ContextVar[Optional[Dict[str, int]]] = ContextVar('cache_request_counters', default=None)
+
+
+@contextmanager
+def track_reads(counters: Optional[Dict[str, int]] = None) -> Iterator[Dict[str, int]]:
+    """Conta as leituras (`hits`/`misses`) de todos os aliases feitas dentro do
+    bloco; `counters` permite continuar a contagem de um bloco anterior."""
+    if counters is None:
+        counters = {'hits': 0, 'misses': 0}
+    token = _request_counters.set(counters)
+    try:
+        yield counters
+    finally:
+        _request_counters.reset(token)
+
+
+class TieredCache(BaseCache):
+    """Backend com L1 no processo (TTL curto) na frente de um L2 compartilhado.
+
+    OPTIONS:
+    - L2: configuração do backend compartilhado (BACKEND, LOCATION, OPTIONS);
+      KEY_PREFIX, VERSION e KEY_FUNCTION vêm do próprio alias
+    - L1_TIMEOUT: segundos máximos de um valor no L1 (0 desliga o L1)
+    - L1_MAX_ENTRIES: limite de chaves no L1
+
+    As escritas vão para o L2 e atualizam o L1; incr/decr são atômicos no L2.
+    """
+
+    def __init__(self, location: str, params: Dict[str, Any]):
+        options = dict(params.get('OPTIONS') or {})
+        l2_params = dict(options.pop('L2', None) or {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'})
+        self.l1_timeout = options.pop('L1_TIMEOUT', 5)
+        l1_max_entries = options.pop('L1_MAX_ENTRIES', 2000)
+        super().__init__({**params, 'OPTIONS': options})
+
+        backend = import_string(l2_params.pop('BACKEND'))
+        for name in ('KEY_PREFIX', 'VERSION', 'KEY_FUNCTION', 'TIMEOUT'):
+            if name in params:
+                l2_params.setdefault(name, params[name])
+        self.l2 = backend(l2_params.get('LOCATION', location), l2_params)
+
+        with _stores_lock:
+            self.l1 = _stores.setdefault(location or 'tiered', _LocalStore(l1_max_entries))
+
+    def _l1_timeout(self, timeout: Any) -> float:
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return self.l1_timeout if timeout is None else min(self.l1_timeout, timeout)
+
+    def _remember(self, key: str, value: Any, timeout: Any = DEFAULT_TIMEOUT) -> None:
+        l1_timeout = self._l1_timeout(timeout)
+        if l1_timeout > 0:
+            self.l1.set(key, value, l1_timeout)
+        else:
+            self.l1.delete(key)
+
+    def _count(self, stat: str) -> None:
+        self.l1.stats[stat] += 1
+        counters = _request_counters.get()
+        if counters is not None:
+            counters['misses' if stat == 'misses' else 'hits'] += 1
+
+    def get(self, key, default=None, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        sentinel = object()
+        if self.l1_timeout > 0:
+            value = self.l1.get(full_key, sentinel)
+            if value is not sentinel:
+                self._count('l1_hits')
+                return value
+
+        value = self.l2.get(key, sentinel, version=version)
+        if value is sentinel:
+            self._count('misses')
+            return default
+        self._count('l2_hits')
+        self._remember(full_key, value)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        self.l2.set(key, value, timeout, version=version)
+        self.l1.stats['writes'] += 1
+        self._remember(full_key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        added = self.l2.add(key, value, timeout, version=version)
+        if added:
+            self.l1.stats['writes'] += 1
+            self._remember(full_key, value, timeout)
+        else:
+            self.l1.delete(full_key)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l1.delete(self.make_and_validate_key(key, version=version))
+        return self.l2.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.l1.delete(self.make_and_validate_key(key, version=version))
+        self.l1.stats['deletes'] += 1
+        return self.l2.delete(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        self.l1.delete(full_key)
+        value = self.l2.incr(key, delta, version=version)
+        self.l1.stats['writes'] += 1
+        self._remember(full_key, value)
+        return value
+
+    def has_key(self, key, version=None):
+        sentinel = object()
+        return self.get(key, sentinel, version=version) is not sentinel
+
+    def clear(self):
+        """Limpa o alias. No Redis todos os aliases dividem o mesmo banco
+        (CACHE_REDIS_URL) e o clear() do backend é um FLUSHDB, que levaria
+        junto os outros aliases e as sessões: ali só as chaves com o prefixo
+        do alias são apagadas."""
+        self.l1.clear()
+        if isinstance(self.l2, RedisCache):
+            self._delete_prefixed()
+        else:
+            self.l2.clear()
+
+    def _delete_prefixed(self) -> None:
+        client = self.l2._cache.get_client(write=True)
+        batch = []
+        for key in client.scan_iter(match=f'{self.key_prefix}:*', count=CLEAR_BATCH_SIZE):
+            batch.append(key)
+            if len(batch) >= CLEAR_BATCH_SIZE:
+                client.delete(*batch)
+                batch = []
+        if batch:
+            client.delete(*batch)
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores do processo atual (desde o início do worker)."""
+        stats = dict(self.l1.stats)
+        stats['l1_entries'] = len(self.l1.data)
+        reads = stats['l1_hits'] + stats['l2_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['l1_hits'] + stats['l2_hits']) * 100 / reads, 1) if reads else None
+        return stats
+
+
+def describe(alias: str) -> Dict[str, Any]:
+    """Configuração e estado de um alias (página cache_stats do admin)."""
+    from django.conf import settings
+
+    config = settings.CACHES[alias]
+    backend = caches[alias]
+    info = {
+        'alias': alias,
+        'backend': config['BACKEND'].rsplit('.', 1)[-1],
+        'location': config.get('LOCATION', ''),
+        'key_prefix': backend.key_prefix,
+        'version': backend.version,
+        'timeout': backend.default_timeout,
+        'stats': None,
+        'entries': None,
+    }
+    if isinstance(backend, TieredCache):
+        info['stats'] = backend.stats()
+        info['l2'] = f'{type(backend.l2).__name__} {config["OPTIONS"]["L2"].get("LOCATION", "")}'.strip()
+        backend = backend.l2
+    if hasattr(backend, '_cache') and isinstance(backend._cache, dict):
+        info['entries'] = len(backend._cache)
+    info['latency_ms'] = probe(alias)
+    return info
+
+
+def probe(alias: str) -> Optional[float]:
+    """Tempo (ms) de um set + get + delete no alias; None se o backend falhar."""
+    backend = caches[alias]
+    key = f'cache_stats:probe:{time.monotonic_ns()}'
+    started = time.perf_counter()
+    try:
+        backend.set(key, 1, 10)
+        backend.get(key)
+        backend.delete(key)
+    except Exception:
+        return None
+    return round((time.perf_counter() - started) * 1000, 3)
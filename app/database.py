@@ -0,0 +1,86 @@
+"""
+Configuração do PostgreSQL (ambiente prd) a partir de variáveis de ambiente.
+
+Abrir uma conexão nova a cada requisição (CONN_MAX_AGE=0, padrão do Django)
+custa handshake TCP/TLS + autenticação + fork do backend no PostgreSQL, o
+que pesa na latência das requisições curtas do PDV. DB_POOL_MODE escolhe
+como as conexões são reaproveitadas:
+
+- persistent (padrão): cada worker/thread mantém a conexão por
+  DB_CONN_MAX_AGE segundos, com health check no início da requisição
+- pgbouncer: conecta em um PgBouncer (PGBOUNCER_HOST/PGBOUNCER_PORT) em
+  modo transaction; cursores do lado do servidor ficam desligados, já que
+  não sobrevivem à troca de conexão entre transações
+- pool: pool do psycopg 3 no próprio processo (exige Django 5.1+ e psycopg 3)
+- none: uma conexão por requisição (comportamento antigo)
+
+Em persistent, cada thread de cada worker do Gunicorn mantém a sua conexão:
+max_connections do PostgreSQL precisa comportar workers × threads.
+
+Variáveis: POSTGRES_DB, POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST,
+POSTGRES_PORT, DB_POOL_MODE, DB_CONN_MAX_AGE (segundos ou "None" para sem
+limite), DB_CONN_HEALTH_CHECKS, DB_CONNECT_TIMEOUT, DB_POOL_MIN_SIZE,
+DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT, PGBOUNCER_HOST, PGBOUNCER_PORT.
+"""
+from typing import Any, Dict, Mapping, Optional
+import django
+from django.core.exceptions import ImproperlyConfigured
+
+
+POOL_MODES = ('persistent', 'pgbouncer', 'pool', 'none')
+
+
+def _max_age(value: Optional[str], default: int) -> Optional[int]:
+    if value is None or value == '':
+        return default
+    if value == 'None':
+        return None
+    return int(value)
+
+
+def postgres_config(env: Mapping[str, str]) -> Dict[str, Any]:
+    """Retorna o dict de DATABASES['default'] para o PostgreSQL."""
+    mode = env.get('DB_POOL_MODE', 'persistent')
+    if mode not in POOL_MODES:
+        raise ImproperlyConfigured(f'DB_POOL_MODE inválido: "{mode}" (use {", ".join(POOL_MODES)})')
+
+    config = {
+        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        'NAME': env.get('POSTGRES_DB'),
+        'USER': env.get('POSTGRES_USER'),
+        'PASSWORD': env.get('POSTGRES_PASSWORD'),
+        'HOST': env.get('POSTGRES_HOST'),
+        'PORT': env.get('POSTGRES_PORT'),
+        'CONN_MAX_AGE': _max_age(env.get('DB_CONN_MAX_AGE'), 60),
+        'CONN_HEALTH_CHECKS': env.get('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        'OPTIONS': {
+            'connect_timeout': int(env.get('DB_CONNECT_TIMEOUT') or 5),
+            'application_name': env.get('DB_APPLICATION_NAME', 'sge'),
+            # Detecta conexões mortas (firewall/NAT) enquanto ficam ociosas
+            'keepalives': 1,
+            'keepalives_idle': 60,
+        },
+    }
+
+    if mode == 'none':
+        config['CONN_MAX_AGE'] = 0
+        config['CONN_HEALTH_CHECKS'] = False
+
+    elif mode == 'pgbouncer':
+        config['HOST'] = env.get('PGBOUNCER_HOST') or config['HOST']
+        config['PORT'] = env.get('PGBOUNCER_PORT') or config['PORT']
+        config['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+    elif mode == 'pool':
+        if django.VERSION < (5, 1):
+            raise ImproperlyConfigured('DB_POOL_MODE=pool exige Django 5.1+ e psycopg 3; use persistent ou pgbouncer')
+        # O pool gerencia as conexões; o Django não deve mantê-las por conta própria
+        config['ENGINE'] = 'django.db.backends.postgresql'
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS']['pool'] = {
+            'min_size': int(env.get('DB_POOL_MIN_SIZE') or 2),
+            'max_size': int(env.get('DB_POOL_MAX_SIZE') or 10),
+            'timeout': int(env.get('DB_POOL_TIMEOUT') or 10),
+        }
+
+    return config
@@ -0,0 +1,207 @@
+"""
+Benchmark reprodutível dos serviços principais, com resultado em JSON.
+
+Cria um banco de teste novo (como o `manage.py test`), gera os dados com
+app/synthetic.py e a semente informada, e mede cada operação `--repeat`
+vezes (após `--warmup` execuções descartadas): add_item, finalize_sale,
+create_return, métricas do painel e as buscas da API. Os caches usam
+LocMem isolado, para não depender nem sujar o cache compartilhado.
+
+    python manage.py benchmark --output benchmarks/$(git rev-parse --short HEAD).json
+    python manage.py benchmark --sales 5000 --baseline benchmarks/abc1234.json
+
+O JSON traz o commit, as versões, o banco, os volumes e, por operação,
+média/p50/p95/mín/máx em ms e consultas por execução.
+"""
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from contextlib import ExitStack
+from pathlib import Path
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from django.utils import timezone
+from app import metrics, synthetic
+from app.caching import cache_config
+from app.query_budget import record_queries
+from pos import registry, return_services, services
+from pos.models import PaymentMethod, Return, Sale
+from products.models import Product
+
+
+def _git_commit() -> str:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=settings.BASE_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return f'{commit}-dirty' if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconhecido'
+
+
+def _summary(timings, queries, runs):
+    timings = sorted(timings)
+    return {
+        'runs': runs,
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'p50_ms': round(timings[len(timings) // 2], 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        'min_ms': round(timings[0], 3),
+        'max_ms': round(timings[-1], 3),
+        'queries_per_run': round(queries / runs, 2),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Mede os serviços principais sobre dados sintéticos e grava o resultado em JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=500)
+        parser.add_argument('--customers', type=int, default=200)
+        parser.add_argument('--sales', type=int, default=2000)
+        parser.add_argument('--returns', type=int, default=50)
+        parser.add_argument('--ledger-entries', type=int, default=100)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--repeat', type=int, default=30, help='Execuções medidas por operação')
+        parser.add_argument('--warmup', type=int, default=3, help='Execuções descartadas por operação')
+        parser.add_argument('--output', help='Arquivo JSON de saída')
+        parser.add_argument('--baseline', help='JSON de uma execução anterior para comparar')
+
+    def handle(self, *args, **options):
+        sizes = {key: options[key] for key in ('products', 'customers', 'sales', 'returns', 'ledger_entries')}
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with override_settings(CACHES=cache_config({}, settings.BASE_DIR)):
+                for alias in settings.CACHES:
+                    caches[alias].clear()
+                registry.clear()
+
+                started = time.perf_counter()
+                synthetic.generate(seed=options['seed'], **sizes)
+                generate_seconds = time.perf_counter() - started
+
+                results = self._run_all(options)
+                vendor = connection.vendor
+        finally:
+            registry.clear()
+            teardown_databases(old_config, verbosity=0)
+
+        report = {
+            'meta': {
+                'commit': _git_commit(),
+                'created_at': timezone.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': vendor,
+                'seed': options['seed'],
+                'sizes': sizes,
+                'repeat': options['repeat'],
+                'warmup': options['warmup'],
+                'generate_seconds': round(generate_seconds, 2),
+            },
+            'results': results,
+        }
+        baseline = json.loads(Path(options['baseline']).read_text()) if options['baseline'] else None
+        self._print(report, baseline)
+
+        if options['output']:
+            path = Path(options['output'])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Resultado gravado em {path}'))
+
+    def _measure(self, run, setup, options):
+        timings, queries = [], 0
+        for index in range(options['warmup'] + options['repeat']):
+            args = setup(index) if setup else ()
+            with ExitStack() as stack:
+                recorder = record_queries(stack)
+                started = time.perf_counter()
+                run(*args)
+                elapsed = (time.perf_counter() - started) * 1000
+            if index >= options['warmup']:
+                timings.append(elapsed)
+                queries += len(recorder.queries)
+        return _summary(timings, queries, options['repeat'])
+
+    def _run_all(self, options):
+        rng = random.Random(options['seed'])
+        user = User.objects.create_superuser(username='benchmark', password='benchmark')
+        cash = PaymentMethod.objects.get(name='Dinheiro')
+        product_ids = list(Product.objects.filter(quantity__gt=10).values_list('id', flat=True))
+        draft = services.get_or_create_draft_sale(user, 'benchmark-add-item')
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(user)
+        terms = [word[:length] for word in synthetic.WORDS for length in (3, 5)]
+        names = [name[:length] for name in synthetic.FIRST_NAMES for length in (3, 5)]
+        total_runs = options['warmup'] + options['repeat']
+        return_candidates = list(
+            Sale.objects.filter(status=Sale.Status.FINALIZED, returns__isnull=True)
+            .order_by('id').values_list('id', flat=True)[:total_runs]
+        )
+
+        def finalize_setup(index):
+            sale = services.get_or_create_draft_sale(user, f'benchmark-finalize-{index}')
+            for product_id in rng.sample(product_ids, 3):
+                services.add_item(sale, product_id, 1)
+            sale.refresh_from_db()
+            services.add_payment(sale, cash.id, cash_tendered=sale.total)
+            sale.refresh_from_db()
+            return (sale,)
+
+        def finalize(sale):
+            if services.finalize_sale(sale)['status'] != 'success':
+                raise RuntimeError(f'Venda #{sale.id} não finalizou')
+
+        def return_setup(index):
+            sale = Sale.objects.get(pk=return_candidates[index])
+            item = sale.items.order_by('id').first()
+            return sale, [{'sale_item_id': item.id, 'quantity': 1}]
+
+        def create_return(sale, items_data):
+            return_services.create_return(sale, items_data, 'Benchmark', Return.RefundMethod.CREDIT, user)
+
+        benchmarks = {
+            'pos.add_item': (lambda: services.add_item(draft, rng.choice(product_ids), 1), None),
+            'pos.finalize_sale': (finalize, finalize_setup),
+            'pos.create_return': (create_return, return_setup if len(return_candidates) == total_runs else None),
+            'metrics.product_metrics': (metrics.get_product_metrics, None),
+            'metrics.sales_metrics': (metrics.get_sales_metrics, None),
+            'metrics.daily_sales': (metrics.get_daily_sales_data, None),
+            'api.product_search': (lambda: client.get('/api/v1/products/', {'search': rng.choice(terms)}), None),
+            'api.customer_search': (lambda: client.get('/api/v1/customers/', {'search': rng.choice(names)}), None),
+        }
+
+        results = {}
+        for name, (run, setup) in benchmarks.items():
+            if name == 'pos.create_return' and setup is None:
+                self.stderr.write(f'{name}: vendas sem devolução insuficientes, ignorado')
+                continue
+            results[name] = self._measure(run, setup, options)
+        return results
+
+    def _print(self, report, baseline):
+        meta = report['meta']
+        self.stdout.write(f'Commit {meta["commit"]} | {meta["database"]} | seed {meta["seed"]} | {meta["sizes"]}')
+        header = f'{"Operação":<26} {"média":>9} {"p95":>9} {"consultas":>10}'
+        if baseline:
+            header += f' {"base":>9} {"variação":>9}'
+            self.stdout.write(f'Base: commit {baseline["meta"]["commit"]}')
+        self.stdout.write(header)
+        for name, result in report['results'].items():
+            line = f'{name:<26} {result["mean_ms"]:>9.3f} {result["p95_ms"]:>9.3f} {result["queries_per_run"]:>10.2f}'
+            base = (baseline or {}).get('results', {}).get(name)
+            if base:
+                change = (result['mean_ms'] - base['mean_ms']) / base['mean_ms'] * 100 if base['mean_ms'] else 0.0
+                line += f' {base["mean_ms"]:>9.3f} {change:>+8.1f}%'
+            self.stdout.write(line)
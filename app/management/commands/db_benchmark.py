@@ -0,0 +1,76 @@
+"""
+Mede o custo de conexão por requisição com e sem conexões persistentes.
+
+Simula o ciclo de uma requisição do Django (sinais request_started /
+request_finished, que abrem e fecham conexões conforme CONN_MAX_AGE) com
+as consultas típicas do PDV, primeiro abrindo uma conexão nova a cada
+requisição (CONN_MAX_AGE=0) e depois reaproveitando a conexão.
+
+    DJANGO_ENV=prd python manage.py db_benchmark --requests 500
+
+Contra o PostgreSQL local do docker-compose (porta 5431):
+
+    DJANGO_ENV=prd POSTGRES_HOST=localhost POSTGRES_PORT=5431 POSTGRES_DB=sge \\
+        POSTGRES_USER=postgres POSTGRES_PASSWORD=postgres python manage.py db_benchmark
+"""
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.core import signals
+from django.db import connection
+from products.models import Product
+
+
+PROFILES = {
+    'sem reuso (CONN_MAX_AGE=0)': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+    'persistente + health check': {'CONN_MAX_AGE': None, 'CONN_HEALTH_CHECKS': True},
+}
+
+
+def simulate_request() -> None:
+    """Uma requisição curta do PDV: busca de produto por id e código."""
+    signals.request_started.send(sender=simulate_request)
+    try:
+        product = Product.objects.only('id', 'serie_number').order_by('id').first()
+        if product is not None:
+            list(Product.objects.filter(serie_number=product.serie_number).values('id', 'quantity')[:1])
+    finally:
+        signals.request_finished.send(sender=simulate_request)
+
+
+class Command(BaseCommand):
+    help = 'Compara o custo por requisição com e sem conexões persistentes ao banco'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300)
+
+    def handle(self, *args, **options):
+        settings_dict = connection.settings_dict
+        original = {key: settings_dict.get(key) for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')}
+        self.stdout.write(f'Banco: {connection.vendor} ({settings_dict.get("HOST") or settings_dict["NAME"]})')
+
+        results = {}
+        try:
+            for label, profile in PROFILES.items():
+                connection.close()
+                settings_dict.update(profile)
+                simulate_request()  # aquecimento
+                timings = []
+                for _ in range(options['requests']):
+                    started = time.perf_counter()
+                    simulate_request()
+                    timings.append((time.perf_counter() - started) * 1000)
+                timings.sort()
+                results[label] = (statistics.fmean(timings), timings[int(len(timings) * 0.95)])
+        finally:
+            connection.close()
+            settings_dict.update(original)
+
+        self.stdout.write(f'{"Perfil":<30} {"média (ms)":>12} {"p95 (ms)":>12}')
+        for label, (mean, p95) in results.items():
+            self.stdout.write(f'{label:<30} {mean:>12.3f} {p95:>12.3f}')
+
+        (cold, _), (warm, _) = results.values()
+        self.stdout.write(self.style.SUCCESS(
+            f'Economia por requisição: {cold - warm:.3f} ms ({(cold - warm) / cold * 100 if cold else 0:.0f}%)'
+        ))
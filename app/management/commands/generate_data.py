@@ -0,0 +1,39 @@
+"""
+Gera dados sintéticos em volume no banco atual (ver app/synthetic.py).
+
+    python manage.py generate_data --products 2000 --customers 500 --sales 5000 --returns 200 --seed 42
+"""
+import time
+from django.core.management.base import BaseCommand
+from app import synthetic
+
+
+class Command(BaseCommand):
+    help = 'Gera produtos, clientes, vendas, devoluções e lançamentos sintéticos em lote'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=200)
+        parser.add_argument('--customers', type=int, default=100)
+        parser.add_argument('--sales', type=int, default=500)
+        parser.add_argument('--returns', type=int, default=20)
+        parser.add_argument('--ledger-entries', type=int, default=50)
+        parser.add_argument('--days', type=int, default=90, help='Janela das vendas (dias até hoje)')
+        parser.add_argument('--max-items', type=int, default=5, help='Máximo de itens por venda')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        counts = synthetic.generate(
+            products=options['products'],
+            customers=options['customers'],
+            sales=options['sales'],
+            returns=options['returns'],
+            ledger_entries=options['ledger_entries'],
+            seed=options['seed'],
+            days=options['days'],
+            max_items=options['max_items'],
+        )
+        elapsed = time.perf_counter() - started
+        for name, count in counts.items():
+            self.stdout.write(f'{name:<16} {count:>8}')
+        self.stdout.write(self.style.SUCCESS(f'Dados gerados em {elapsed:.1f}s (seed {options["seed"]}).'))
@@ -18,6 +18,7 @@ from django.utils.formats import number_format
 from django.utils import timezone
 from brands.models import Brand
 from categories.models import Category
+from products import valuation
 from products.models import Product
 from pos.models import Sale, SaleItem, SalePayment
 
@@ -26,10 +27,11 @@ TWO_PLACES = Decimal('0.01')
 
 
 def get_product_metrics():
-    products = Product.objects.all()
-    total_cost_price = sum(product.cost_price * product.quantity for product in products)
-    total_selling_price = sum(product.selling_price * product.quantity for product in products)
-    total_quantity = sum(product.quantity for product in products)
+    """Valor do estoque pelo custo médio (products/valuation.py), lido do cache."""
+    current = valuation.current_valuation()
+    total_cost_price = current['cost_value']
+    total_selling_price = current['retail_value']
+    total_quantity = current['quantity']
     total_profit = total_selling_price - total_cost_price
 
     return dict(
@@ -41,26 +43,25 @@ def get_product_metrics():
 
 
 def get_sales_metrics():
-    """Métricas de vendas do PDV (app pos)."""
-    sales = Sale.objects.filter(status=Sale.Status.FINALIZED).prefetch_related('items', 'payments')
-
-    total_sales = sales.count()
-    total_products_sold = 0
-    gross_total = Decimal('0')
-    final_total = Decimal('0')
-    profit_total = Decimal('0')
-
-    for sale in sales:
-        # Soma quantidade de produtos vendidos
-        total_products_sold += sale.items_count
-        
-        # Soma valores
-        gross_total += sale.subtotal
-        final_total += sale.total
-        
-        # Calcula lucro (preço - custo) * quantidade
-        for item in sale.items.all():
-            profit_total += item.profit
+    """Métricas de vendas do PDV (app pos), em dois agregados no banco."""
+    sales = Sale.objects.filter(status=Sale.Status.FINALIZED).aggregate(
+        total_sales=Count('id'),
+        gross_total=Sum('subtotal'),
+        final_total=Sum('total'),
+    )
+    items = SaleItem.objects.filter(sale__status=Sale.Status.FINALIZED).aggregate(
+        total_products_sold=Sum('quantity'),
+        profit_total=Sum(ExpressionWrapper(
+            (F('unit_price') - F('unit_cost')) * F('quantity'),
+            output_field=DecimalField(max_digits=20, decimal_places=4),
+        )),
+    )
+
+    total_sales = sales['total_sales']
+    total_products_sold = items['total_products_sold'] or 0
+    gross_total = sales['gross_total'] or Decimal('0')
+    final_total = sales['final_total'] or Decimal('0')
+    profit_total = Decimal(items['profit_total'] or 0).quantize(TWO_PLACES)
 
     return dict(
         total_sales=total_sales,
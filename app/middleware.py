@@ -0,0 +1,86 @@
+"""
+Middlewares do projeto.
+
+PerformanceMiddleware mede cada requisição (tempo total, consultas e tempo
+de banco, leituras de cache, tamanho da resposta) e soma em app/performance.py
+pelo nome da rota. Em respostas em streaming (exportações CSV, lote de
+recibos) o corpo é gerado depois que a view retorna: a medição continua
+enquanto o servidor consome o corpo e só é registrada quando ele é fechado.
+Requisições acima de PERFORMANCE_SLOW_REQUEST_MS vão para o log
+`sge.performance` com as consultas mais lentas.
+"""
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from . import caching, performance
+from .query_budget import QueryRecorder, record_queries
+
+
+logger = logging.getLogger('sge.performance')
+
+SLOW_QUERIES_LOGGED = 5
+SQL_LOG_LENGTH = 300
+
+
+class PerformanceMiddleware:
+    """Registra as métricas de cada requisição por rota (ver app/performance.py)."""
+
+    def __init__(self, get_response):
+        if not settings.PERFORMANCE_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_ms = settings.PERFORMANCE_SLOW_REQUEST_MS
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        timer, cache_reads = QueryRecorder(), {'hits': 0, 'misses': 0}
+        with self._measuring(timer, cache_reads):
+            response = self.get_response(request)
+
+        if response.streaming and not response.is_async:
+            response.streaming_content = self._measured_stream(
+                request, response, response.streaming_content, started, timer, cache_reads,
+            )
+        else:
+            size = int(response.get('Content-Length') or 0) if response.streaming else len(response.content)
+            self._record(request, response, started, timer, cache_reads, size)
+        return response
+
+    @contextmanager
+    def _measuring(self, timer, cache_reads):
+        with ExitStack() as stack:
+            record_queries(stack, timer)
+            stack.enter_context(caching.track_reads(cache_reads))
+            yield
+
+    def _measured_stream(self, request, response, content, started, timer, cache_reads):
+        # Consultas e leituras de cache feitas ao gerar o corpo entram na mesma
+        # requisição; o registro acontece quando o servidor fecha a resposta
+        size = 0
+        try:
+            with self._measuring(timer, cache_reads):
+                for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            self._record(request, response, started, timer, cache_reads, size)
+
+    def _record(self, request, response, started, timer, cache_reads, size):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        match = request.resolver_match
+        route = match.view_name if match and match.url_name else performance.UNRESOLVED
+        db_ms = sum(duration for duration, _ in timer.queries)
+        performance.record(
+            route, elapsed_ms, len(timer.queries), db_ms, cache_reads['hits'], cache_reads['misses'],
+            size, response.status_code,
+        )
+
+        if elapsed_ms >= self.slow_ms:
+            slowest = sorted(timer.queries, key=lambda query: query[0], reverse=True)[:SLOW_QUERIES_LOGGED]
+            logger.warning(
+                'Requisição lenta: %s %s (%s) %.0f ms, %d consultas em %.0f ms, status %s%s',
+                request.method, request.path, route, elapsed_ms, len(timer.queries), db_ms, response.status_code,
+                ''.join(f'\n  {duration:.1f} ms: {sql[:SQL_LOG_LENGTH]}' for duration, sql in slowest),
+            )
@@ -0,0 +1,149 @@
+"""
+Métricas de desempenho por rota, agregadas em memória (PerformanceMiddleware).
+
+Para cada nome de rota (`pos:add_item`, `home`, `product_list`...) guarda um
+histograma do tempo de resposta e os totais de consultas ao banco, tempo de
+banco, leituras de cache (acertos/falhas) e bytes da resposta. Os números
+são do worker: com vários workers do Gunicorn atrás da mesma porta, cada
+coleta cai em um worker qualquer. Por isso toda série leva o rótulo `pid`
+(os contadores de um pid nunca voltam para trás) e os totais da instância
+são a soma por pid (`sum without (pid) (...)`), que fica parcial enquanto
+algum worker não tiver sido coletado recentemente.
+
+Funções disponíveis:
+- record(): Registra uma requisição
+- snapshot(): Métricas por rota (endpoint JSON)
+- render_prometheus(): Métricas no formato texto do Prometheus
+- reset(): Zera as métricas do processo
+"""
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+
+# Limites dos buckets do histograma, em milissegundos
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+UNRESOLVED = '<unresolved>'
+
+
+@dataclass
+class RouteStats:
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    queries: int = 0
+    db_ms: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    response_bytes: int = 0
+    errors: int = 0
+    buckets: List[int] = field(default_factory=lambda: [0] * (len(BUCKETS_MS) + 1))
+
+
+_routes: Dict[str, RouteStats] = {}
+_lock = threading.Lock()
+
+
+def record(route: str, elapsed_ms: float, queries: int, db_ms: float, cache_hits: int, cache_misses: int,
+           response_bytes: int, status_code: int) -> None:
+    """Soma uma requisição às métricas da rota."""
+    bucket = next((index for index, limit in enumerate(BUCKETS_MS) if elapsed_ms <= limit), len(BUCKETS_MS))
+    with _lock:
+        stats = _routes.get(route)
+        if stats is None:
+            stats = _routes[route] = RouteStats()
+        stats.count += 1
+        stats.total_ms += elapsed_ms
+        stats.max_ms = max(stats.max_ms, elapsed_ms)
+        stats.queries += queries
+        stats.db_ms += db_ms
+        stats.cache_hits += cache_hits
+        stats.cache_misses += cache_misses
+        stats.response_bytes += response_bytes
+        stats.errors += status_code >= 500
+        stats.buckets[bucket] += 1
+
+
+def _percentile(stats: RouteStats, fraction: float) -> float:
+    """Limite superior do bucket que contém o percentil (aproximação do histograma)."""
+    target = stats.count * fraction
+    seen = 0
+    for index, count in enumerate(stats.buckets):
+        seen += count
+        if seen >= target:
+            return float(BUCKETS_MS[index]) if index < len(BUCKETS_MS) else stats.max_ms
+    return stats.max_ms
+
+
+def snapshot() -> List[Dict[str, Any]]:
+    """Métricas por rota, da mais lenta (tempo total) para a mais rápida."""
+    with _lock:
+        routes = {route: RouteStats(**{**stats.__dict__, 'buckets': list(stats.buckets)}) for route, stats in _routes.items()}
+
+    rows = []
+    for route, stats in routes.items():
+        rows.append({
+            'route': route,
+            'requests': stats.count,
+            'errors': stats.errors,
+            'mean_ms': round(stats.total_ms / stats.count, 2),
+            'p95_ms': _percentile(stats, 0.95),
+            'max_ms': round(stats.max_ms, 2),
+            'queries_per_request': round(stats.queries / stats.count, 2),
+            'db_ms_per_request': round(stats.db_ms / stats.count, 2),
+            'cache_hits': stats.cache_hits,
+            'cache_misses': stats.cache_misses,
+            'bytes_per_request': stats.response_bytes // stats.count,
+            'total_ms': round(stats.total_ms, 2),
+        })
+    rows.sort(key=lambda row: row['total_ms'], reverse=True)
+    return rows
+
+
+def _label(route: str) -> str:
+    return route.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _labels(route: str) -> str:
+    return f'route="{_label(route)}",pid="{os.getpid()}"'
+
+
+def render_prometheus() -> str:
+    """Métricas no formato de exposição texto do Prometheus (0.0.4)."""
+    with _lock:
+        routes = sorted((route, RouteStats(**{**stats.__dict__, 'buckets': list(stats.buckets)})) for route, stats in _routes.items())
+
+    lines = [
+        '# HELP sge_request_duration_seconds Tempo de resposta por rota.',
+        '# TYPE sge_request_duration_seconds histogram',
+    ]
+    for route, stats in routes:
+        cumulative = 0
+        for limit, count in zip(BUCKETS_MS, stats.buckets):
+            cumulative += count
+            lines.append(f'sge_request_duration_seconds_bucket{{{_labels(route)},le="{limit / 1000:g}"}} {cumulative}')
+        lines.append(f'sge_request_duration_seconds_bucket{{{_labels(route)},le="+Inf"}} {stats.count}')
+        lines.append(f'sge_request_duration_seconds_sum{{{_labels(route)}}} {stats.total_ms / 1000:.6f}')
+        lines.append(f'sge_request_duration_seconds_count{{{_labels(route)}}} {stats.count}')
+
+    counters = (
+        ('sge_request_errors_total', 'Respostas 5xx por rota.', lambda stats: stats.errors),
+        ('sge_db_queries_total', 'Consultas ao banco por rota.', lambda stats: stats.queries),
+        ('sge_db_duration_seconds_total', 'Tempo de banco por rota.', lambda stats: f'{stats.db_ms / 1000:.6f}'),
+        ('sge_cache_hits_total', 'Leituras de cache com acerto por rota.', lambda stats: stats.cache_hits),
+        ('sge_cache_misses_total', 'Leituras de cache sem acerto por rota.', lambda stats: stats.cache_misses),
+        ('sge_response_bytes_total', 'Bytes de resposta por rota.', lambda stats: stats.response_bytes),
+    )
+    for name, help_text, value in counters:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for route, stats in routes:
+            lines.append(f'{name}{{{_labels(route)}}} {value(stats)}')
+    return '\n'.join(lines) + '\n'
+
+
+def reset() -> None:
+    with _lock:
+        _routes.clear()
@@ -0,0 +1,75 @@
+"""
+Orçamento de consultas ao banco.
+
+    with query_budget(8, label='pos:add_item'):
+        client.post(...)
+
+    @query_budget(3)
+    def carregar_painel():
+        ...
+
+Ao passar do orçamento, levanta QueryBudgetExceeded (um AssertionError, para
+aparecer como falha nos testes) com as consultas executadas. A contagem usa
+execute_wrapper em todas as conexões, então funciona também com DEBUG=False.
+Os orçamentos das views críticas ficam em app/tests.py (QueryBudgetTestCase).
+"""
+import time
+from contextlib import ContextDecorator, ExitStack
+from typing import List, Optional, Tuple
+from django.db import connections
+
+
+class QueryRecorder:
+    """execute_wrapper que guarda `(duração em ms, sql)` de cada consulta."""
+
+    def __init__(self):
+        self.queries: List[Tuple[float, str]] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(((time.perf_counter() - started) * 1000, sql))
+
+
+def record_queries(stack: ExitStack, recorder: Optional[QueryRecorder] = None) -> QueryRecorder:
+    """Instala um QueryRecorder (novo ou `recorder`) em todas as conexões
+    enquanto `stack` estiver aberto."""
+    recorder = recorder or QueryRecorder()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(recorder))
+    return recorder
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class query_budget(ContextDecorator):
+    """Falha se o bloco (ou a função decorada) executar mais de `max_queries` consultas."""
+
+    def __init__(self, max_queries: int, label: str = ''):
+        self.max_queries = max_queries
+        self.label = label
+        self.queries: List[Tuple[float, str]] = []
+        self._stack: Optional[ExitStack] = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        self._recorder = record_queries(self._stack)
+        self.queries = self._recorder.queries
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stack.close()
+        if exc_type is None and len(self.queries) > self.max_queries:
+            listing = '\n'.join(f'{index}. {sql}' for index, (_, sql) in enumerate(self.queries, start=1))
+            raise QueryBudgetExceeded(
+                f'{self.label or "bloco"}: {len(self.queries)} consultas (orçamento: {self.max_queries})\n{listing}'
+            )
+        return False
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
@@ -0,0 +1,81 @@
+"""
+Cache de resultados das buscas do PDV (produtos e clientes).
+
+Cada busca é guardada pelo termo exatamente como a consulta o usa (só sem
+os espaços das pontas), com TTL curto. A invalidação é feita incrementando
+a geração do namespace: as chaves antigas deixam de ser lidas e expiram
+sozinhas.
+
+Funções disponíveis:
+- query_term(): Termo usado pelas consultas e pela chave do cache
+- get_or_set(): Retorna o resultado em cache ou calcula e guarda
+- invalidate(): Invalida todas as buscas de um namespace
+"""
+import hashlib
+from typing import Any, Callable
+from django.db import transaction
+from app.caching import hot_cache
+
+
+SEARCH_CACHE_TIMEOUT = 30
+GENERATION_TIMEOUT = None
+
+PRODUCTS = 'products'
+CUSTOMERS = 'customers'
+
+
+def query_term(term: str) -> str:
+    """Termo que as consultas de busca usam. A chave do cache parte dele, sem
+    normalizar caixa ou acentos: `icontains` distingue acentos ("calça" e
+    "calca" trazem resultados diferentes), então chaves normalizadas
+    misturariam buscas."""
+    return (term or '').strip()
+
+
+def _generation_key(namespace: str) -> str:
+    return f'search:{namespace}:generation'
+
+
+def _generation(namespace: str) -> int:
+    generation = hot_cache.get(_generation_key(namespace))
+    if generation is None:
+        generation = 1
+        hot_cache.add(_generation_key(namespace), generation, GENERATION_TIMEOUT)
+    return generation
+
+
+def _result_key(namespace: str, term: str, scope: str) -> str:
+    digest = hashlib.md5(f'{scope}|{term}'.encode()).hexdigest()
+    return f'search:{namespace}:{digest}'
+
+
+def get_or_set(namespace: str, term: str, builder: Callable[[], Any], scope: str = '') -> Any:
+    """Retorna o resultado da busca em cache ou executa `builder` e guarda.
+
+    `scope` diferencia resultados que dependem de algo além do termo
+    (ex.: host usado para montar URLs absolutas).
+    """
+    key = _result_key(namespace, query_term(term), scope)
+    version = _generation(namespace)
+
+    result = hot_cache.get(key, version=version)
+    if result is None:
+        result = builder()
+        hot_cache.set(key, result, SEARCH_CACHE_TIMEOUT, version=version)
+    return result
+
+
+def _bump_generation(namespace: str) -> None:
+    try:
+        hot_cache.incr(_generation_key(namespace))
+    except ValueError:
+        hot_cache.set(_generation_key(namespace), 2, GENERATION_TIMEOUT)
+
+
+def invalidate(namespace: str) -> None:
+    """Invalida todas as buscas em cache do namespace.
+
+    A invalidação acontece após o commit, para que uma busca concorrente não
+    volte a guardar dados anteriores à alteração.
+    """
+    transaction.on_commit(lambda: _bump_generation(namespace))
@@ -13,6 +13,8 @@ import os
 from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
+from app.caching import cache_config, session_engine
+from app.database import postgres_config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -69,6 +71,9 @@ LOGOUT_REDIRECT_URL = '/login/'
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # Depois do WhiteNoise: estáticos não entram nas métricas
+    'app.middleware.PerformanceMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -102,15 +107,9 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
 if ENVIRONMENT == 'prd':
+    # Conexões persistentes/pool conforme DB_POOL_MODE (ver app/database.py)
     DATABASES = {
-        'default': {
-            'ENGINE': 'django.db.backends.postgresql_psycopg2',
-            'NAME': os.getenv('POSTGRES_DB'),
-            'USER': os.getenv('POSTGRES_USER'),
-            'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
-            'HOST': os.getenv('POSTGRES_HOST'),
-            'PORT': os.getenv('POSTGRES_PORT'),
-        }
+        'default': postgres_config(os.environ),
     }
 else:
     DATABASES = {
@@ -121,6 +120,22 @@ else:
     }
 
 
+# Cache
+# Aliases default, hot (L1 local + L2 compartilhado), metrics e sessions;
+# CACHE_MODE escolhe o nível compartilhado (ver app/caching.py)
+
+CACHES = cache_config(os.environ, BASE_DIR)
+
+
+# Sessões no cache "sessions": com CACHE_MODE file/redis o padrão é cached_db,
+# que lê do cache (sem consulta ao banco a cada requisição do PDV) e grava no
+# cache e no banco; com local (LocMem por processo) o padrão é db.
+# SESSION_BACKEND força o backend (ex.: cache dispensa o banco).
+# Linhas expiradas de django_session são removidas pelo clearsessions (cron).
+SESSION_ENGINE = session_engine(os.environ)
+SESSION_CACHE_ALIAS = 'sessions'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -163,10 +178,28 @@ STATICFILES_DIRS = []
 # Diretório onde collectstatic vai copiar os arquivos (para produção)
 STATIC_ROOT = BASE_DIR.parent / 'staticfiles'
 
+# Em produção o WhiteNoise serve os estáticos coletados no build com nomes
+# versionados (hash), gzip/brotli pré-comprimidos e cache longo no navegador.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
+WHITENOISE_MAX_AGE = int(os.getenv('WHITENOISE_MAX_AGE', str(60 * 60 * 24 * 365)))
+
 # Media files (Uploaded files)
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR.parent / 'media'
 
+# Sem proxy na frente (docker-compose), o próprio Django serve os uploads
+SERVE_MEDIA = os.getenv('SERVE_MEDIA', 'True') == 'True'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -188,5 +221,34 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
 }
 
+# Alterações do catálogo (deltas do PDV) mais antigas são removidas pelo
+# stock_snapshot; quem sincroniza de uma versão removida recebe o catálogo completo
+CATALOG_CHANGES_KEEP_DAYS = int(os.getenv('CATALOG_CHANGES_KEEP_DAYS', '30'))
+
 OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
+AI_AGENT_TOKEN_BUDGET = int(os.getenv('AI_AGENT_TOKEN_BUDGET', '4000'))
+AI_AGENT_WINDOW_DAYS = int(os.getenv('AI_AGENT_WINDOW_DAYS', '30'))
+AI_AGENT_CLIENT = os.getenv('AI_AGENT_CLIENT', 'openai')
+AI_RESULTS_KEEP = int(os.getenv('AI_RESULTS_KEEP', '100'))
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL') or None
+AI_JOB_TIMEOUT = int(os.getenv('AI_JOB_TIMEOUT', '60'))
+AI_JOB_MAX_ATTEMPTS = int(os.getenv('AI_JOB_MAX_ATTEMPTS', '3'))
+AI_JOB_RETRY_BACKOFF = int(os.getenv('AI_JOB_RETRY_BACKOFF', '30'))
+
+# Métricas por rota (app/performance.py): /metrics/ para staff ou com
+# "Authorization: Bearer <PERFORMANCE_METRICS_TOKEN>" (Prometheus)
+PERFORMANCE_METRICS = os.getenv('PERFORMANCE_METRICS', 'True') == 'True'
+PERFORMANCE_SLOW_REQUEST_MS = int(os.getenv('PERFORMANCE_SLOW_REQUEST_MS', '500'))
+PERFORMANCE_METRICS_TOKEN = os.getenv('PERFORMANCE_METRICS_TOKEN', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'sge.performance': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
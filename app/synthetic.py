@@ -0,0 +1,220 @@
+"""
+Gerador de dados sintéticos em volume (benchmarks e testes de carga).
+
+Diferente de scripts/populate_demo_data.py, cria tudo em lote
+(`bulk_create`) e é reprodutível: a mesma semente sobre o mesmo banco gera
+os mesmos dados. As vendas já saem finalizadas, com itens, pagamentos,
+custo médio, diário de estoque (saldo inicial, vendas e devoluções) e o
+estoque final coerente com ele.
+
+    counts = synthetic.generate(products=2000, customers=500, sales=5000, returns=200, ledger_entries=300)
+
+Ou pelo comando `python manage.py generate_data`.
+"""
+import random
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from brands.models import Brand
+from categories.models import Category
+from customers.models import Customer
+from pos import services
+from pos.models import LedgerEntry, PaymentMethod, Return, ReturnItem, Sale, SaleItem, SalePayment
+from products import catalog
+from products.models import Product, StockMovement
+
+
+TWO_PLACES = Decimal('0.01')
+BATCH_SIZE = 1000
+
+WORDS = ['Camiseta', 'Calça', 'Bermuda', 'Boné', 'Meia', 'Tênis', 'Jaqueta', 'Vestido', 'Saia', 'Blusa',
+         'Café', 'Arroz', 'Feijão', 'Sabonete', 'Cabo', 'Fone', 'Caderno', 'Caneta', 'Mochila', 'Garrafa']
+VARIANTS = ['P', 'M', 'G', 'GG', 'Azul', 'Preto', 'Branco', '500g', '1kg', 'Kit']
+FIRST_NAMES = ['Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Heitor', 'Isabela', 'João',
+               'Larissa', 'Marcos', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sofia', 'Tiago', 'Vitória', 'Yuri']
+LAST_NAMES = ['Silva', 'Souza', 'Oliveira', 'Santos', 'Lima', 'Pereira', 'Costa', 'Almeida', 'Ferreira', 'Rocha']
+PAYMENT_METHODS = ['Dinheiro', 'PIX', 'Cartão de Débito', 'Cartão de Crédito']
+
+
+@dataclass(frozen=True)
+class _Line:
+    product: Product
+    quantity: int
+
+
+def _money(value) -> Decimal:
+    return Decimal(value).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
+
+
+def _create_products(rng: random.Random, count: int) -> List[Product]:
+    categories = [Category.objects.get_or_create(name=f'Sintético {word}')[0] for word in WORDS[:5]]
+    brands = [Brand.objects.get_or_create(name=f'Sintética {letter}')[0] for letter in 'ABCDE']
+    offset = Product.objects.count()
+    products = []
+    for n in range(count):
+        cost = _money(rng.uniform(2, 80))
+        products.append(Product(
+            title=f'{rng.choice(WORDS)} {rng.choice(VARIANTS)} {offset + n}',
+            category=rng.choice(categories),
+            brand=rng.choice(brands),
+            serie_number=f'789{offset + n:010d}',
+            cost_price=cost,
+            average_cost=cost,
+            selling_price=_money(cost * Decimal(str(rng.uniform(1.2, 2.2)))),
+            quantity=0,
+        ))
+    return Product.objects.bulk_create(products, batch_size=BATCH_SIZE)
+
+
+def _create_customers(rng: random.Random, count: int) -> List[Customer]:
+    offset = Customer.objects.count()
+    customers = []
+    for n in range(count):
+        phone = f'7{offset + n:010d}'
+        cpf = f'8{offset + n:010d}'
+        customers.append(Customer(
+            full_name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {offset + n}',
+            phone=phone,
+            phone_digits=phone,
+            cpf=cpf,
+            cpf_digits=cpf,
+            city='Cidade',
+            state='SP',
+        ))
+    return Customer.objects.bulk_create(customers, batch_size=BATCH_SIZE)
+
+
+def generate(products: int = 200, customers: int = 100, sales: int = 500, returns: int = 20,
+             ledger_entries: int = 50, seed: int = 42, days: int = 90, max_items: int = 5) -> Dict[str, int]:
+    """Gera os dados em uma transação e retorna quantos registros de cada tipo foram criados.
+
+    As vendas são distribuídas nos últimos `days` dias, com 1 a `max_items`
+    itens; as devoluções (concluídas, com crédito ao cliente) saem de vendas
+    distintas. Sem clientes (`customers=0`), as vendas vão para o cliente
+    genérico e não há lançamentos avulsos.
+    """
+    rng = random.Random(seed)
+    now = timezone.now().replace(microsecond=0)
+    start = datetime.combine((now - timedelta(days=days)).date(), time.min)
+
+    with transaction.atomic():
+        user, _ = User.objects.get_or_create(username='sintetico', defaults={'first_name': 'Dados sintéticos'})
+        methods = [PaymentMethod.objects.get_or_create(name=name)[0] for name in PAYMENT_METHODS]
+        generic = services.get_or_create_generic_customer()
+
+        product_list = _create_products(rng, products)
+        customer_list = _create_customers(rng, customers)
+        if sales and not product_list:
+            raise ValueError('Vendas sintéticas exigem products > 0.')
+
+        # Vendas: os campos calculados (totais, line_total) são preenchidos aqui,
+        # já que bulk_create não passa pelo save() dos modelos
+        baskets, sale_rows = [], []
+        for _ in range(sales):
+            lines = [_Line(product, rng.randint(1, 3)) for product in rng.sample(product_list, min(len(product_list), rng.randint(1, max_items)))]
+            subtotal = sum((line.product.selling_price * line.quantity for line in lines), Decimal('0'))
+            customer = rng.choice(customer_list) if customer_list and rng.random() < 0.6 else generic
+            finalized_at = start + timedelta(seconds=rng.randrange(max(int((now - start).total_seconds()), 1)))
+            baskets.append(lines)
+            sale_rows.append(Sale(
+                customer=customer,
+                user=user,
+                status=Sale.Status.FINALIZED,
+                subtotal=subtotal,
+                total=subtotal,
+                total_paid=subtotal,
+                finalized_at=finalized_at,
+            ))
+        sale_rows = Sale.objects.bulk_create(sale_rows, batch_size=BATCH_SIZE)
+
+        item_rows, payment_rows, movements = [], [], []
+        sold: Dict[int, int] = {}
+        for sale, lines in zip(sale_rows, baskets):
+            for line in lines:
+                item_rows.append(SaleItem(
+                    sale=sale,
+                    product=line.product,
+                    quantity=line.quantity,
+                    unit_price=line.product.selling_price,
+                    line_total=line.product.selling_price * line.quantity,
+                    unit_cost=line.product.average_cost,
+                ))
+                movements.append(StockMovement(product=line.product, kind=StockMovement.Kind.SALE, quantity=-line.quantity,
+                                               reference_id=sale.id, created_at=sale.finalized_at))
+                sold[line.product.id] = sold.get(line.product.id, 0) + line.quantity
+            payment_rows.append(SalePayment(sale=sale, payment_method=rng.choice(methods), amount_applied=sale.total))
+        item_rows = SaleItem.objects.bulk_create(item_rows, batch_size=BATCH_SIZE)
+        SalePayment.objects.bulk_create(payment_rows, batch_size=BATCH_SIZE)
+
+        # Devoluções concluídas (crédito ao cliente) de vendas distintas
+        items_by_sale: Dict[int, List[SaleItem]] = {}
+        for item in item_rows:
+            items_by_sale.setdefault(item.sale_id, []).append(item)
+        returned_sales = rng.sample(sale_rows, min(returns, len(sale_rows)))
+        credit_rows, return_rows, return_lines = [], [], []
+        for sale in returned_sales:
+            item = rng.choice(items_by_sale[sale.id])
+            quantity = rng.randint(1, item.quantity)
+            amount = item.unit_price * quantity
+            completed_at = min(sale.finalized_at + timedelta(days=rng.randint(0, 7)), now)
+            credit_rows.append(LedgerEntry(customer=sale.customer, sale=sale, type=LedgerEntry.Type.CREDIT,
+                                           amount=amount, description=f'Devolução da venda #{sale.id}'))
+            return_rows.append(Return(original_sale=sale, customer=sale.customer, user=user, approved_by=user,
+                                      status=Return.Status.COMPLETED, reason='Troca (sintético)',
+                                      refund_method=Return.RefundMethod.CREDIT, total_amount=amount,
+                                      approved_at=completed_at, completed_at=completed_at))
+            return_lines.append((item, quantity, completed_at))
+        credit_rows = LedgerEntry.objects.bulk_create(credit_rows, batch_size=BATCH_SIZE)
+        for return_row, credit in zip(return_rows, credit_rows):
+            return_row.ledger_entry = credit
+        return_rows = Return.objects.bulk_create(return_rows, batch_size=BATCH_SIZE)
+
+        return_items, partially, fully = [], [], []
+        for return_row, (item, quantity, completed_at) in zip(return_rows, return_lines):
+            return_items.append(ReturnItem(return_instance=return_row, sale_item=item, product_id=item.product_id,
+                                           quantity=quantity, unit_price=item.unit_price, line_total=item.unit_price * quantity))
+            movements.append(StockMovement(product_id=item.product_id, kind=StockMovement.Kind.RETURN, quantity=quantity,
+                                           reference_id=return_row.id, created_at=completed_at))
+            sold[item.product_id] -= quantity
+            sale_items = items_by_sale[item.sale_id]
+            (fully if len(sale_items) == 1 and quantity == item.quantity else partially).append(item.sale_id)
+        ReturnItem.objects.bulk_create(return_items, batch_size=BATCH_SIZE)
+        Sale.objects.filter(id__in=partially).update(status=Sale.Status.PARTIALLY_RETURNED)
+        Sale.objects.filter(id__in=fully).update(status=Sale.Status.FULLY_RETURNED)
+
+        # Lançamentos avulsos (débitos e créditos em aberto) de clientes identificados
+        ledger_rows = [
+            LedgerEntry(
+                customer=rng.choice(customer_list),
+                type=rng.choice([LedgerEntry.Type.CREDIT, LedgerEntry.Type.DEBIT]),
+                amount=_money(rng.uniform(5, 300)),
+                description='Lançamento sintético',
+            )
+            for _ in range(ledger_entries if customer_list else 0)
+        ]
+        LedgerEntry.objects.bulk_create(ledger_rows, batch_size=BATCH_SIZE)
+
+        # Saldo inicial cobre as vendas; o estoque final bate com o diário
+        opening_at = start - timedelta(seconds=1)
+        for product in product_list:
+            net_sold = sold.get(product.id, 0)
+            opening = net_sold + rng.randint(0, 200)
+            movements.append(StockMovement(product=product, kind=StockMovement.Kind.OPENING, quantity=opening, created_at=opening_at))
+            product.quantity = opening - net_sold
+        StockMovement.objects.bulk_create(movements, batch_size=BATCH_SIZE)
+        Product.objects.bulk_update(product_list, ['quantity'], batch_size=BATCH_SIZE)
+        catalog.record_changes(product.id for product in product_list)
+
+    return {
+        'products': products,
+        'customers': customers,
+        'sales': len(sale_rows),
+        'sale_items': len(item_rows),
+        'returns': len(return_rows),
+        'ledger_entries': len(credit_rows) + len(ledger_rows),
+        'stock_movements': len(movements),
+    }
@@ -1,9 +1,48 @@
+import threading
+from functools import lru_cache
 from django import template
 from django.utils.safestring import mark_safe
 import markdown
 
 register = template.Library()
 
+MARKDOWN_EXTENSIONS = [
+    'markdown.extensions.tables',
+    'markdown.extensions.fenced_code',
+    'markdown.extensions.codehilite',
+    'markdown.extensions.nl2br',
+    'markdown.extensions.toc',
+]
+
+# markdown.Markdown não é thread-safe: uma instância por thread, reaproveitada
+# com reset() em vez de recriar as cinco extensões a cada conversão.
+_local = threading.local()
+
+
+def _get_markdown():
+    md = getattr(_local, 'md', None)
+    if md is None:
+        md = _local.md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+    return md
+
+
+@lru_cache(maxsize=128)
+def render_markdown(value):
+    """
+    Convert markdown text to HTML (string, not marked safe).
+
+    Results are memoized per text, so unchanged content is not re-parsed.
+    """
+    if not value:
+        return ""
+
+    md = _get_markdown()
+    try:
+        return md.convert(value)
+    finally:
+        md.reset()
+
+
 @register.filter
 def markdown_to_html(value):
     """
@@ -11,17 +50,4 @@ def markdown_to_html(value):
     
     Usage: {{ some_text|markdown_to_html }}
     """
-    if not value:
-        return ""
-    
-    # Configure markdown with commonly used extensions
-    md = markdown.Markdown(extensions=[
-        'markdown.extensions.tables',
-        'markdown.extensions.fenced_code',
-        'markdown.extensions.codehilite',
-        'markdown.extensions.nl2br',
-        'markdown.extensions.toc',
-    ])
-    
-    html = md.convert(value)
-    return mark_safe(html)
\ No newline at end of file
+    return mark_safe(render_markdown(value))
@@ -0,0 +1,512 @@
+import os
+import time
+from types import SimpleNamespace
+from decimal import Decimal
+from pathlib import Path
+import django
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Sum
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from app import caching, metrics, performance, synthetic
+from app.caching import TieredCache, cache_config, session_engine
+from app.database import postgres_config
+from app.management.commands.benchmark import _summary
+from app.query_budget import QueryBudgetExceeded, query_budget
+from brands.models import Brand
+from categories.models import Category
+from customers.models import Customer
+from pos import registry, services
+from pos.models import LedgerEntry, PaymentMethod, Return, Sale, SaleItem
+from products import catalog
+from products.models import Product, StockMovement
+
+
+ENV = {
+    'POSTGRES_DB': 'sge',
+    'POSTGRES_USER': 'postgres',
+    'POSTGRES_PASSWORD': 'postgres',
+    'POSTGRES_HOST': 'sge_db',
+    'POSTGRES_PORT': '5432',
+}
+
+
+class PostgresConfigTestCase(SimpleTestCase):
+    """Testes dos perfis de conexão do PostgreSQL (DB_POOL_MODE)."""
+
+    def test_persistent_is_default(self):
+        config = postgres_config(ENV)
+
+        self.assertEqual(config['CONN_MAX_AGE'], 60)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+        self.assertEqual((config['HOST'], config['NAME']), ('sge_db', 'sge'))
+        self.assertEqual(config['OPTIONS']['connect_timeout'], 5)
+        self.assertNotIn('DISABLE_SERVER_SIDE_CURSORS', config)
+
+    def test_unlimited_max_age(self):
+        self.assertIsNone(postgres_config({**ENV, 'DB_CONN_MAX_AGE': 'None'})['CONN_MAX_AGE'])
+        self.assertEqual(postgres_config({**ENV, 'DB_CONN_MAX_AGE': '300'})['CONN_MAX_AGE'], 300)
+
+    def test_none_restores_connection_per_request(self):
+        config = postgres_config({**ENV, 'DB_POOL_MODE': 'none'})
+
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertFalse(config['CONN_HEALTH_CHECKS'])
+
+    def test_pgbouncer(self):
+        config = postgres_config({**ENV, 'DB_POOL_MODE': 'pgbouncer', 'PGBOUNCER_HOST': 'sge_pgbouncer', 'PGBOUNCER_PORT': '6432'})
+
+        self.assertEqual((config['HOST'], config['PORT']), ('sge_pgbouncer', '6432'))
+        self.assertTrue(config['DISABLE_SERVER_SIDE_CURSORS'])
+
+    def test_pool_requires_newer_django(self):
+        env = {**ENV, 'DB_POOL_MODE': 'pool', 'DB_POOL_MAX_SIZE': '20'}
+        if django.VERSION < (5, 1):
+            with self.assertRaises(ImproperlyConfigured):
+                postgres_config(env)
+        else:
+            config = postgres_config(env)
+            self.assertEqual(config['CONN_MAX_AGE'], 0)
+            self.assertEqual(config['OPTIONS']['pool']['max_size'], 20)
+
+    def test_session_engine_follows_cache_mode(self):
+        self.assertEqual(session_engine({}), 'django.contrib.sessions.backends.db')
+        self.assertEqual(session_engine({'CACHE_MODE': 'file'}), 'django.contrib.sessions.backends.cached_db')
+        self.assertEqual(session_engine({'CACHE_MODE': 'redis', 'SESSION_BACKEND': 'cache'}),
+                         'django.contrib.sessions.backends.cache')
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ImproperlyConfigured):
+            postgres_config({**ENV, 'DB_POOL_MODE': 'pooled'})
+
+
+def tiered(location, l1_timeout=5, l2_location=None):
+    return TieredCache(location, {
+        'KEY_PREFIX': 'sge:test',
+        'KEY_FUNCTION': 'app.caching.make_key',
+        'OPTIONS': {
+            'L2': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': l2_location or f'{location}-l2'},
+            'L1_TIMEOUT': l1_timeout,
+        },
+    })
+
+
+class CacheConfigTestCase(SimpleTestCase):
+    """Testes dos aliases de cache (CACHE_MODE) e do versionamento de chaves."""
+
+    def test_local_is_default(self):
+        config = cache_config({}, Path('/srv/sge/app'))
+
+        self.assertEqual(set(config), set(caching.ALIASES))
+        self.assertEqual(config['default']['OPTIONS']['L2']['BACKEND'], 'django.core.cache.backends.locmem.LocMemCache')
+        self.assertEqual({alias['BACKEND'] for alias in config.values()}, {'app.caching.TieredCache'})
+        self.assertEqual((config['hot']['OPTIONS']['L1_TIMEOUT'], config['default']['OPTIONS']['L1_TIMEOUT']), (5, 0))
+        self.assertEqual(config['metrics']['KEY_PREFIX'], 'sge:metrics')
+        self.assertIsNone(config['sessions']['TIMEOUT'])
+
+    def test_file_and_redis_modes(self):
+        config = cache_config({'CACHE_MODE': 'file', 'CACHE_VERSION': '3'}, Path('/srv/sge/app'))
+        self.assertEqual(config['metrics']['OPTIONS']['L2']['LOCATION'], '/srv/sge/cache/metrics')
+        self.assertEqual(config['hot']['OPTIONS']['L2']['LOCATION'], '/srv/sge/cache/hot')
+        self.assertEqual({alias['VERSION'] for alias in config.values()}, {3})
+
+        config = cache_config({'CACHE_MODE': 'redis', 'CACHE_REDIS_URL': 'redis://sge_cache:6379/0'}, Path('/srv/sge/app'))
+        self.assertEqual(config['default']['OPTIONS']['L2']['LOCATION'], 'redis://sge_cache:6379/0')
+        self.assertEqual(config['hot']['OPTIONS']['L2']['BACKEND'], 'django.core.cache.backends.redis.RedisCache')
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ImproperlyConfigured):
+            cache_config({'CACHE_MODE': 'memcached'}, Path('/srv/sge/app'))
+
+    def test_make_key(self):
+        self.assertEqual(caching.make_key('search:products:1', 'sge:hot', 2), 'sge:hot:2:search:products:1')
+        hashed = caching.make_key('termo com espaço', 'sge:hot', 1)
+        self.assertRegex(hashed, r'^sge:hot:1:h:[0-9a-f]{40}$')
+        self.assertEqual(len(caching.make_key('x' * 500, 'sge:hot', 1)), len(hashed))
+
+
+class TieredCacheTestCase(SimpleTestCase):
+    """Testes do backend L1 (processo) + L2 (compartilhado)."""
+
+    def setUp(self):
+        self.cache = tiered(self.id())
+        self.cache.clear()
+
+    def test_read_through_and_stats(self):
+        self.cache.l2.set('chave', 'valor')
+
+        self.assertEqual(self.cache.get('chave'), 'valor')
+        self.assertEqual(self.cache.get('chave'), 'valor')
+        self.assertIsNone(self.cache.get('outra'))
+
+        stats = self.cache.stats()
+        self.assertEqual((stats['l2_hits'], stats['l1_hits'], stats['misses']), (1, 1, 1))
+
+    def test_l1_is_shared_per_location(self):
+        self.cache.set('chave', [1, 2])
+        other = tiered(self.id())
+
+        other.l2.delete('chave')
+        self.assertEqual(other.get('chave'), [1, 2])
+
+        value = other.get('chave')
+        value.append(3)
+        self.assertEqual(self.cache.get('chave'), [1, 2])
+
+    def test_l1_expires_so_other_processes_see_changes(self):
+        cache = tiered('tiered-tests-expiry', l1_timeout=0.05)
+        cache.set('geracao', 1)
+        cache.l2.set('geracao', 2)
+
+        self.assertEqual(cache.get('geracao'), 1)
+        time.sleep(0.06)
+        self.assertEqual(cache.get('geracao'), 2)
+
+    def test_incr_and_delete_update_l1(self):
+        self.cache.set('geracao', 1)
+
+        self.assertEqual(self.cache.incr('geracao'), 2)
+        self.assertEqual(self.cache.get('geracao'), 2)
+        self.assertEqual(self.cache.l2.get('geracao'), 2)
+
+        self.cache.delete('geracao')
+        self.assertIsNone(self.cache.get('geracao'))
+
+    def test_add_and_versions(self):
+        self.assertTrue(self.cache.add('chave', 'a'))
+        self.assertFalse(self.cache.add('chave', 'b'))
+        self.assertEqual(self.cache.get('chave'), 'a')
+
+        self.cache.set('chave', 'v2', version=2)
+        self.assertEqual(self.cache.get('chave'), 'a')
+        self.assertEqual(self.cache.get('chave', version=2), 'v2')
+
+    def test_zero_l1_timeout_disables_l1(self):
+        cache = tiered('tiered-tests-off', l1_timeout=0)
+        cache.set('chave', 'valor')
+        cache.l2.delete('chave')
+
+        self.assertIsNone(cache.get('chave'))
+
+    def test_redis_clear_deletes_only_alias_prefix(self):
+        class FakeRedis:
+            keys = {b'sge:test:1:a', b'sge:test:2:b', b'sge:sessions:1:s', b'sge:testing:1:x'}
+
+            def scan_iter(self, match, count):
+                prefix = match.rstrip('*').encode()
+                return [key for key in sorted(self.keys) if key.startswith(prefix)]
+
+            def delete(self, *keys):
+                self.keys -= set(keys)
+
+            def flushdb(self):
+                raise AssertionError('FLUSHDB apagaria os outros aliases')
+
+        fake = FakeRedis()
+        cache = TieredCache('tiered-tests-redis', {
+            'KEY_PREFIX': 'sge:test',
+            'OPTIONS': {'L2': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://x'}},
+        })
+        cache.l2.__dict__['_cache'] = SimpleNamespace(get_client=lambda write=False: fake)
+
+        cache.clear()
+
+        self.assertEqual(fake.keys, {b'sge:sessions:1:s', b'sge:testing:1:x'})
+
+
+class CacheStatsViewTestCase(TestCase):
+    """Testes da página de estatísticas de cache do admin."""
+
+    def setUp(self):
+        self.url = reverse('cache_stats')
+
+    def test_staff_only(self):
+        user = User.objects.create_user(username='operador', password='12345')
+        self.client.force_login(user)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 302)
+
+    def test_lists_aliases_and_clears(self):
+        staff = User.objects.create_user(username='admin', password='12345', is_staff=True)
+        self.client.force_login(staff)
+        caching.hot_cache.set('cache_stats:teste', 1)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([cache['alias'] for cache in response.context['caches']], list(caching.ALIASES))
+        self.assertIsNotNone(response.context['caches'][1]['stats'])
+
+        response = self.client.post(self.url, {'alias': 'hot'})
+
+        self.assertRedirects(response, self.url)
+        self.assertIsNone(caching.hot_cache.get('cache_stats:teste'))
+
+
+class PerformanceMiddlewareTestCase(TestCase):
+    """Testes das métricas por rota (PerformanceMiddleware)."""
+
+    def setUp(self):
+        performance.reset()
+        self.addCleanup(performance.reset)
+        self.staff = User.objects.create_user(username='admin', password='12345', is_staff=True)
+        self.url = reverse('performance_metrics')
+
+    def _route(self, name):
+        return next(row for row in performance.snapshot() if row['route'] == name)
+
+    def test_records_route_metrics(self):
+        self.client.force_login(self.staff)
+        self.client.get(reverse('home'))
+        self.client.get(reverse('home'))
+
+        home = self._route('home')
+        self.assertEqual(home['requests'], 2)
+        self.assertGreater(home['queries_per_request'], 0)
+        self.assertGreater(home['bytes_per_request'], 0)
+        self.assertGreater(home['cache_hits'], 0)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('home', [row['route'] for row in response.json()['routes']])
+
+    def test_prometheus_format(self):
+        self.client.force_login(self.staff)
+        self.client.get(reverse('home'))
+
+        response = self.client.get(self.url, {'format': 'prometheus'})
+
+        body = response.content.decode()
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        labels = f'route="home",pid="{os.getpid()}"'
+        self.assertIn(f'sge_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1', body)
+        self.assertIn(f'sge_request_duration_seconds_count{{{labels}}} 1', body)
+        self.assertRegex(body, r'sge_db_queries_total\{route="home",pid="\d+"\} [1-9]')
+
+    @override_settings(PERFORMANCE_SLOW_REQUEST_MS=0)
+    def test_streaming_response_measured_until_body_is_consumed(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('pos:export_csv', args=['sales']))
+        self.assertFalse([row for row in performance.snapshot() if row['route'] == 'pos:export_csv'])
+
+        with self.assertLogs('sge.performance', 'WARNING') as logs:
+            body = b''.join(response.streaming_content)
+
+        export = self._route('pos:export_csv')
+        self.assertEqual(export['bytes_per_request'], len(body))
+        self.assertIn('pos_sale', logs.output[0])
+
+    @override_settings(PERFORMANCE_METRICS_TOKEN='segredo')
+    def test_staff_or_token_only(self):
+        operator = User.objects.create_user(username='operador', password='12345')
+        self.client.force_login(operator)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer errado').status_code, 403)
+
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer segredo').status_code, 200)
+
+    @override_settings(PERFORMANCE_SLOW_REQUEST_MS=0)
+    def test_slow_requests_are_logged_with_queries(self):
+        self.client.force_login(self.staff)
+
+        with self.assertLogs('sge.performance', 'WARNING') as logs:
+            self.client.get(reverse('home'))
+
+        self.assertIn('(home)', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+
+# Mesma engine de produção (CACHE_MODE file/redis): sessão lida do cache
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+class QueryBudgetTestCase(TestCase):
+    """Orçamento de consultas das views críticas, medido com volumes crescentes de dados.
+
+    Cada endpoint recebe uma requisição de aquecimento (sessão, registro e
+    caches) antes da medida. O número de consultas precisa caber no orçamento
+    e não pode crescer com o volume: crescimento indica N+1.
+    """
+
+    SIZES = (1, 10, 30)
+
+    BUDGETS = {
+        'pos:add_item': 19,
+        'pos:finalize': 24,
+        'pos:sale_list': 8,
+        'pos:sale_detail': 8,
+        'home': 23,
+        'product_list': 8,
+        'pos:return_create': 7,
+    }
+
+    def setUp(self):
+        registry.clear()
+        self.addCleanup(registry.clear)
+        self.user = User.objects.create_superuser(username='admin', password='12345')
+        self.client.force_login(self.user)
+        self.brand = Brand.objects.create(name='Marca')
+        self.category = Category.objects.create(name='Categoria')
+        self.cash = PaymentMethod.objects.create(name='Dinheiro')
+        self.products = []
+
+    def _products(self, count):
+        self.products += Product.objects.bulk_create([
+            Product(
+                title=f'Produto {len(self.products) + n}',
+                brand=self.brand,
+                category=self.category,
+                selling_price=Decimal('10.00'),
+                cost_price=Decimal('4.00'),
+                quantity=1000,
+            )
+            for n in range(count - len(self.products))
+        ])
+        catalog.record_changes([product.id for product in self.products])
+
+    def _sell(self, session_key, products, finalize=True):
+        sale = services.get_or_create_draft_sale(self.user, session_key)
+        for product in products:
+            services.add_item(sale, product.id, 1)
+        sale.refresh_from_db()
+        services.add_payment(sale, self.cash.id, cash_tendered=sale.total)
+        if finalize:
+            self.assertEqual(services.finalize_sale(sale)['status'], 'success')
+        sale.refresh_from_db()
+        return sale
+
+    def _measure(self, name, request):
+        request()  # aquecimento
+        with query_budget(self.BUDGETS[name], label=name) as budget:
+            response = request()
+        self.assertLess(response.status_code, 400, name)
+        return budget.count
+
+    def _measure_finalize(self, session_key, size):
+        """Finaliza uma venda de `size` itens montada fora da medida (aquecimento incluído)."""
+        count = None
+        for _ in range(2):
+            self.client.post(reverse('pos:cancel_sale'))
+            self._sell(session_key, self.products[:size], finalize=False)
+            with query_budget(self.BUDGETS['pos:finalize'], label='pos:finalize') as budget:
+                response = self.client.post(reverse('pos:finalize'), {}, content_type='application/json')
+            self.assertTrue(response.json()['success'])
+            count = budget.count
+        return count
+
+    def test_critical_views_fit_budget_at_every_size(self):
+        counts = {}
+        sales = 0
+        for size in self.SIZES:
+            self._products(size)
+            for n in range(sales, size):
+                self._sell(f'seed-{size}-{n}', self.products[:1])
+            sales = size
+            # Venda medida com `size` itens (detecta N+1 por item)
+            sale = self._sell(f'target-{size}', self.products[:size])
+            session_key = self.client.session.session_key
+
+            def add_item():
+                return self.client.post(reverse('pos:add_item'), {'product_id': self.products[-1].id}, content_type='application/json')
+
+            for name, request in {
+                'pos:add_item': lambda: self.client.post(
+                    reverse('pos:add_item'), {'product_id': self.products[-1].id}, content_type='application/json',
+                ),
+                'pos:sale_list': lambda: self.client.get(reverse('pos:sale_list')),
+                'pos:sale_detail': lambda: self.client.get(reverse('pos:sale_detail', args=[sale.pk])),
+                'home': lambda: self.client.get(reverse('home')),
+                'product_list': lambda: self.client.get(reverse('product_list')),
+                'pos:return_create': lambda: self.client.get(reverse('pos:return_create', args=[sale.pk])),
+            }.items():
+                with self.subTest(endpoint=name, size=size):
+                    counts.setdefault(name, []).append(self._measure(name, request))
+
+            with self.subTest(endpoint='pos:finalize', size=size):
+                counts.setdefault('pos:finalize', []).append(self._measure_finalize(session_key, size))
+
+        for name, per_size in counts.items():
+            with self.subTest(endpoint=name):
+                self.assertEqual(len(set(per_size)), 1, f'{name}: consultas crescem com os dados {dict(zip(self.SIZES, per_size))}')
+
+    def test_query_budget_reports_queries(self):
+        with self.assertRaises(QueryBudgetExceeded) as context:
+            with query_budget(1, label='teste'):
+                list(Product.objects.all())
+                list(Brand.objects.all())
+
+        self.assertIn('teste: 2 consultas (orçamento: 1)', str(context.exception))
+        self.assertIn('brands_brand', str(context.exception))
+
+    def test_sales_metrics_aggregates(self):
+        self._products(2)
+        self._sell('metricas-1', self.products)
+        self._sell('metricas-2', self.products[:1])
+
+        with self.assertNumQueries(2):
+            sales_metrics = metrics.get_sales_metrics()
+
+        self.assertEqual(sales_metrics['total_sales'], 2)
+        self.assertEqual(sales_metrics['total_products_sold'], 3)
+        self.assertEqual(sales_metrics['total_sales_value'], '30,00')
+        self.assertEqual(sales_metrics['total_sales_profit'], '18,00')
+
+
+class SyntheticDataTestCase(TestCase):
+
+    def _snapshot(self, seed):
+        with transaction.atomic():
+            synthetic.generate(products=20, customers=10, sales=40, returns=5, ledger_entries=5, seed=seed)
+            snapshot = (
+                list(Product.objects.order_by('serie_number').values_list('title', 'selling_price', 'quantity')),
+                list(Sale.objects.order_by('finalized_at', 'total').values_list('total', 'status', 'finalized_at')),
+            )
+            transaction.set_rollback(True)
+        return snapshot
+
+    def test_generate_counts_and_stock_journal(self):
+        counts = synthetic.generate(products=20, customers=10, sales=40, returns=5, ledger_entries=5, seed=7)
+
+        self.assertEqual(counts['sales'], 40)
+        self.assertEqual(Product.objects.count(), 20)
+        self.assertEqual(Sale.objects.exclude(status=Sale.Status.FINALIZED).count(), 5)
+        self.assertEqual(Return.objects.filter(status=Return.Status.COMPLETED).count(), 5)
+        self.assertEqual(LedgerEntry.objects.count(), 10)
+        self.assertEqual(SaleItem.objects.count(), counts['sale_items'])
+        for product in Product.objects.all():
+            journal = StockMovement.objects.filter(product=product).aggregate(total=Sum('quantity'))['total']
+            self.assertEqual(product.quantity, journal, product.title)
+            self.assertGreaterEqual(product.quantity, 0)
+        for sale in Sale.objects.prefetch_related('items'):
+            self.assertEqual(sale.total, sum(item.line_total for item in sale.items.all()))
+
+    def test_same_seed_same_data(self):
+        self.assertEqual(self._snapshot(3), self._snapshot(3))
+        self.assertNotEqual(self._snapshot(3), self._snapshot(4))
+
+    def test_second_run_adds_distinct_customers(self):
+        synthetic.generate(products=5, customers=5, sales=5, returns=0, ledger_entries=0, seed=1)
+        synthetic.generate(products=5, customers=5, sales=5, returns=0, ledger_entries=0, seed=1)
+
+        self.assertEqual(Customer.objects.exclude(cpf_digits='').values('cpf_digits').distinct().count(), 10)
+        self.assertEqual(Product.objects.values('serie_number').distinct().count(), 10)
+
+    def test_generate_without_products(self):
+        with self.assertRaises(ValueError):
+            synthetic.generate(products=0, sales=1)
+
+
+class BenchmarkSummaryTestCase(SimpleTestCase):
+
+    def test_summary_percentiles(self):
+        result = _summary([float(value) for value in range(20, 0, -1)], queries=50, runs=20)
+
+        self.assertEqual(result['min_ms'], 1.0)
+        self.assertEqual(result['max_ms'], 20.0)
+        self.assertEqual(result['p50_ms'], 11.0)
+        self.assertEqual(result['p95_ms'], 20.0)
+        self.assertEqual(result['mean_ms'], 10.5)
+        self.assertEqual(result['queries_per_run'], 2.5)
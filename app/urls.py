@@ -1,12 +1,15 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.contrib.auth import views as auth_views
 from django.conf import settings
 from django.conf.urls.static import static
+from django.views.static import serve
 from . import views
 
 
 urlpatterns = [
+    path('admin/cache-stats/', views.cache_stats, name='cache_stats'),
+    path('metrics/', views.performance_metrics, name='performance_metrics'),
     path('admin/', admin.site.urls),
 
     # Authentication URLs
@@ -33,4 +36,9 @@ urlpatterns = [
 # Serve media files in development
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+elif settings.SERVE_MEDIA:
+    # Produção sem proxy reverso: uploads servidos pela aplicação
+    urlpatterns += [
+        re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>.*)$', serve, {'document_root': settings.MEDIA_ROOT}),
+    ]
 
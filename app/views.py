@@ -1,8 +1,15 @@
+import hmac
 import json
+import os
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import render
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import redirect, render
 from ai.models import AIResult
-from . import metrics
+from . import caching, metrics, performance
 
 
 @login_required(login_url='login')
@@ -14,7 +21,7 @@ def home(request):
     daily_sales_data = metrics.get_daily_sales_data()
     daily_sales_quantity_data = metrics.get_daily_sales_quantity_data()
     ai_result = AIResult.objects.first()
-    ai_result = ai_result.result if ai_result else ''
+    ai_result = ai_result.result_html if ai_result else ''
 
     context = {
         'product_metrics': product_metrics,
@@ -27,3 +34,41 @@ def home(request):
     }
 
     return render(request, 'home.html', context)
+
+
+@staff_member_required
+def cache_stats(request):
+    """Configuração, contadores e latência dos caches; POST com `alias` limpa o cache."""
+    if request.method == 'POST':
+        alias = request.POST.get('alias')
+        if alias in settings.CACHES:
+            caches[alias].clear()
+            messages.success(request, f'Cache "{alias}" limpo.')
+        return redirect('cache_stats')
+
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Caches',
+        'mode': os.getenv('CACHE_MODE', 'local'),
+        'caches': [caching.describe(alias) for alias in settings.CACHES],
+    }
+    return render(request, 'admin/cache_stats.html', context)
+
+
+def _metrics_token_ok(request) -> bool:
+    token = settings.PERFORMANCE_METRICS_TOKEN
+    header = request.headers.get('Authorization', '')
+    return bool(token) and hmac.compare_digest(header, f'Bearer {token}')
+
+
+def performance_metrics(request):
+    """Métricas por rota do processo; `?format=prometheus` devolve o formato texto.
+
+    Acesso para staff (sessão) ou com o token PERFORMANCE_METRICS_TOKEN.
+    """
+    if not (request.user.is_active and request.user.is_staff) and not _metrics_token_ok(request):
+        return JsonResponse({'detail': 'Acesso restrito.'}, status=403)
+
+    if request.GET.get('format') == 'prometheus':
+        return HttpResponse(performance.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    return JsonResponse({'pid': os.getpid(), 'routes': performance.snapshot()})
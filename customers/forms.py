@@ -1,6 +1,6 @@
 from django import forms
 from django.core.exceptions import ValidationError
-from .models import Customer
+from .models import Customer, digits_in_use
 
 
 class CustomerForm(forms.ModelForm):
@@ -156,15 +156,8 @@ class CustomerForm(forms.ModelForm):
         if numbers[9:11] != f'{first_digit}{second_digit}':
             raise ValidationError('CPF inválido.')
         
-        # Verifica se já existe outro cliente com este CPF
-        from .models import Customer
-        existing = Customer.objects.filter(cpf=numbers)
-        
-        # Se estamos editando, exclui o próprio registro da verificação
-        if self.instance.pk:
-            existing = existing.exclude(pk=self.instance.pk)
-        
-        if existing.exists():
+        # Verifica se já existe outro cliente com este CPF (com ou sem máscara)
+        if digits_in_use('cpf_digits', numbers, self.instance):
             raise ValidationError('Já existe um cliente cadastrado com este CPF.')
         
         # Retorna apenas os números (sem máscara)
@@ -216,6 +209,10 @@ class CustomerForm(forms.ModelForm):
         if ddd not in valid_ddds:
             raise ValidationError('DDD inválido.')
         
+        # Verifica se já existe outro cliente com este telefone (com ou sem máscara)
+        if digits_in_use('phone_digits', numbers, self.instance):
+            raise ValidationError('Já existe um cliente cadastrado com este telefone.')
+        
         # Retorna apenas os números (sem máscara)
         return numbers
     
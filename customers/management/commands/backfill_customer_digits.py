@@ -0,0 +1,42 @@
+"""
+Comando para preencher as colunas normalizadas (phone_digits/cpf_digits) de clientes.
+
+Necessário para registros gravados sem passar por `Customer.save()`
+(ex.: `bulk_create`, importações diretas no banco).
+"""
+from django.core.management.base import BaseCommand
+from customers.models import Customer, only_digits
+
+
+class Command(BaseCommand):
+    help = 'Preenche as colunas de busca (dígitos de telefone e CPF) dos clientes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        batch = []
+        updated = 0
+
+        customers = Customer.objects.only('id', 'phone', 'cpf', 'phone_digits', 'cpf_digits')
+        for customer in customers.iterator(chunk_size=batch_size):
+            phone_digits = only_digits(customer.phone)
+            cpf_digits = only_digits(customer.cpf)
+            if customer.phone_digits == phone_digits and customer.cpf_digits == cpf_digits:
+                continue
+
+            customer.phone_digits = phone_digits
+            customer.cpf_digits = cpf_digits
+            batch.append(customer)
+
+            if len(batch) >= batch_size:
+                Customer.objects.bulk_update(batch, ['phone_digits', 'cpf_digits'])
+                updated += len(batch)
+                batch = []
+
+        if batch:
+            Customer.objects.bulk_update(batch, ['phone_digits', 'cpf_digits'])
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'{updated} cliente(s) atualizado(s).'))
@@ -0,0 +1,102 @@
+"""
+Benchmark da busca de clientes do PDV.
+
+Gera N clientes sintéticos (padrão 500 mil) dentro de uma transação, mede a
+busca antiga (icontains nas colunas com máscara) contra `search_customers`
+e desfaz tudo ao final.
+
+    python manage.py benchmark_customer_search --count 500000
+"""
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from customers.models import Customer, only_digits
+from customers.search import search_customers
+
+
+FIRST_NAMES = ['Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Heitor', 'Isabela', 'João']
+LAST_NAMES = ['Silva', 'Souza', 'Oliveira', 'Santos', 'Pereira', 'Lima', 'Costa', 'Ferreira', 'Almeida', 'Ribeiro']
+
+
+def legacy_search(term: str):
+    """Busca como era feita antes das colunas normalizadas."""
+    numeric = only_digits(term)
+    query = Q(full_name__icontains=term) | Q(email__icontains=term)
+    if numeric:
+        query |= Q(cpf__icontains=numeric) | Q(phone__icontains=numeric)
+    else:
+        query |= Q(cpf__icontains=term) | Q(phone__icontains=term)
+    return Customer.objects.filter(query).order_by('full_name')[:10]
+
+
+class Command(BaseCommand):
+    help = 'Mede a busca de clientes com uma base sintética (desfeita ao final)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        with transaction.atomic():
+            sample = self._populate(options['count'], rng)
+            terms = {
+                'CPF completo (com máscara)': self._mask_cpf(sample.cpf_digits),
+                'Telefone completo': sample.phone_digits,
+                'Prefixo de telefone': sample.phone_digits[:6],
+                'Trecho do nome': sample.full_name.split()[1][:4],
+            }
+
+            self.stdout.write(f'{"Consulta":<30} {"antiga (ms)":>12} {"nova (ms)":>12}')
+            for label, term in terms.items():
+                legacy_ms = self._measure(lambda: list(legacy_search(term)), options['repeat'])
+                new_ms = self._measure(lambda: list(search_customers(term)), options['repeat'])
+                self.stdout.write(f'{label:<30} {legacy_ms:>12.2f} {new_ms:>12.2f}')
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('Benchmark concluído (dados sintéticos descartados).'))
+
+    def _populate(self, count, rng):
+        self.stdout.write(f'Gerando {count} clientes sintéticos...')
+        batch_size = 5000
+        start = time.perf_counter()
+        sample = None
+
+        for offset in range(0, count, batch_size):
+            batch = []
+            for i in range(offset, min(offset + batch_size, count)):
+                phone = f'11{900000000 + i:09d}'
+                cpf = f'{i:011d}'
+                customer = Customer(
+                    full_name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}',
+                    # Metade com máscara, como chega pela API
+                    phone=f'(11) {phone[2:7]}-{phone[7:]}' if i % 2 else phone,
+                    phone_digits=phone,
+                    cpf=self._mask_cpf(cpf) if i % 2 else cpf,
+                    cpf_digits=cpf,
+                    email=f'bench{i}@example.com',
+                )
+                batch.append(customer)
+            Customer.objects.bulk_create(batch)
+            sample = batch[len(batch) // 2]
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'{count} clientes criados em {elapsed:.1f}s')
+        return sample
+
+    @staticmethod
+    def _mask_cpf(cpf):
+        return f'{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}'
+
+    @staticmethod
+    def _measure(fn, repeat):
+        fn()  # aquece cache do banco
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - start) * 1000 / repeat
@@ -0,0 +1,64 @@
+# Generated by Django 5.0.1 on 2026-10-18 23:53
+
+from django.db import migrations, models
+
+
+def backfill_digits(apps, schema_editor):
+    Customer = apps.get_model('customers', 'Customer')
+    batch = []
+    for customer in Customer.objects.only('id', 'phone', 'cpf').iterator(chunk_size=2000):
+        customer.phone_digits = ''.join(filter(str.isdigit, customer.phone or ''))
+        customer.cpf_digits = ''.join(filter(str.isdigit, customer.cpf or ''))
+        batch.append(customer)
+        if len(batch) >= 2000:
+            Customer.objects.bulk_update(batch, ['phone_digits', 'cpf_digits'])
+            batch = []
+    if batch:
+        Customer.objects.bulk_update(batch, ['phone_digits', 'cpf_digits'])
+
+
+def create_trigram_index(apps, schema_editor):
+    # Índice trigram (pg_trgm) acelera full_name ILIKE '%termo%'; apenas PostgreSQL
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS customer_full_name_trgm_idx '
+        'ON customers_customer USING gin (full_name gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS customer_full_name_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='cpf_digits',
+            field=models.CharField(blank=True, editable=False, max_length=14, verbose_name='CPF (dígitos)'),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='phone_digits',
+            field=models.CharField(blank=True, editable=False, max_length=15, verbose_name='Telefone (dígitos)'),
+        ),
+        migrations.RunPython(backfill_digits, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['phone_digits'], name='customer_phone_digits_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['cpf_digits'], name='customer_cpf_digits_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -2,6 +2,22 @@ from django.core.validators import RegexValidator
 from django.db import models
 
 
+def only_digits(value) -> str:
+    """Remove máscara e qualquer caractere não numérico."""
+    return ''.join(filter(str.isdigit, value or ''))
+
+
+def digits_in_use(field: str, digits: str, instance=None) -> bool:
+    """Indica se outro cliente já usa `digits` em `field` ('phone_digits' ou
+    'cpf_digits'), independente da máscara digitada."""
+    if not digits:
+        return False
+    existing = Customer.objects.filter(**{field: digits})
+    if instance is not None and instance.pk:
+        existing = existing.exclude(pk=instance.pk)
+    return existing.exists()
+
+
 class Customer(models.Model):
     # Campos obrigatórios
     full_name = models.CharField('Nome completo', max_length=255)
@@ -31,6 +47,10 @@ class Customer(models.Model):
     city = models.CharField('Cidade', max_length=100, blank=True)
     state = models.CharField('Estado', max_length=2, blank=True)
     
+    # Colunas normalizadas (apenas dígitos) usadas na busca do PDV
+    phone_digits = models.CharField('Telefone (dígitos)', max_length=15, blank=True, editable=False)
+    cpf_digits = models.CharField('CPF (dígitos)', max_length=14, blank=True, editable=False)
+
     # Campos de controle
     is_generic = models.BooleanField('Cliente genérico', default=False, help_text='Indica se é o cliente genérico usado no PDV')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -40,10 +60,29 @@ class Customer(models.Model):
         ordering = ['full_name']
         verbose_name = 'Cliente'
         verbose_name_plural = 'Clientes'
+        indexes = [
+            # varchar_pattern_ops permite usar o índice em buscas por prefixo (LIKE 'x%') no PostgreSQL
+            models.Index(fields=['phone_digits'], name='customer_phone_digits_idx', opclasses=['varchar_pattern_ops']),
+            models.Index(fields=['cpf_digits'], name='customer_cpf_digits_idx', opclasses=['varchar_pattern_ops']),
+        ]
 
     def __str__(self) -> str:
         return f'{self.full_name} - {self.phone}'
 
+    def save(self, *args, **kwargs):
+        """Mantém as colunas normalizadas sincronizadas com telefone e CPF."""
+        self.phone_digits = only_digits(self.phone)
+        self.cpf_digits = only_digits(self.cpf)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'phone' in update_fields:
+                update_fields.add('phone_digits')
+            if 'cpf' in update_fields:
+                update_fields.add('cpf_digits')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
     @property
     def formatted_cpf(self) -> str:
         if not self.cpf:
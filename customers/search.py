@@ -0,0 +1,39 @@
+"""
+Busca de clientes usada pelo seletor de clientes do PDV.
+
+- CPF/telefone completos: consulta exata nos índices de dígitos
+- Dígitos parciais: busca por prefixo nas colunas normalizadas
+- Texto: nome (índice trigram no PostgreSQL) e e-mail quando o termo tem '@'
+"""
+from django.db.models import Q
+from app.search_cache import query_term
+from .models import Customer, only_digits
+
+
+EXACT_LOOKUP_LENGTHS = (10, 11)
+
+
+def search_customers(term: str, limit: int = 10):
+    """Retorna até `limit` clientes que correspondem ao termo, ordenados por nome."""
+    queryset = Customer.objects.all()
+    term = query_term(term)
+    if not term:
+        return queryset.order_by('full_name')[:limit]
+
+    numeric = only_digits(term)
+    has_text = any(char.isalpha() for char in term)
+
+    if numeric and not has_text:
+        if len(numeric) in EXACT_LOOKUP_LENGTHS:
+            exact = queryset.filter(Q(cpf_digits=numeric) | Q(phone_digits=numeric)).order_by('full_name')[:limit]
+            if exact:  # avalia e mantém o resultado em cache no próprio queryset
+                return exact
+        query = Q(cpf_digits__startswith=numeric) | Q(phone_digits__startswith=numeric)
+    else:
+        query = Q(full_name__icontains=term)
+        if '@' in term:
+            query |= Q(email__istartswith=term)
+        if numeric:
+            query |= Q(cpf_digits__startswith=numeric) | Q(phone_digits__startswith=numeric)
+
+    return queryset.filter(query).order_by('full_name')[:limit]
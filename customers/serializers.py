@@ -1,8 +1,18 @@
 from rest_framework import serializers
-from .models import Customer
+from .models import Customer, digits_in_use, only_digits
 
 
 class CustomerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Customer
-        fields = '__all__'
+        exclude = ['phone_digits', 'cpf_digits']
+
+    def validate_phone(self, value):
+        if digits_in_use('phone_digits', only_digits(value), self.instance):
+            raise serializers.ValidationError('Já existe um cliente cadastrado com este telefone.')
+        return value
+
+    def validate_cpf(self, value):
+        if digits_in_use('cpf_digits', only_digits(value), self.instance):
+            raise serializers.ValidationError('Já existe um cliente cadastrado com este CPF.')
+        return value
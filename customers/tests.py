@@ -0,0 +1,72 @@
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from customers.forms import CustomerForm
+from customers.models import Customer
+from customers.search import search_customers
+
+
+class CustomerSearchTestCase(TestCase):
+    """Testes da busca de clientes pelas colunas normalizadas."""
+
+    def setUp(self):
+        self.maria = Customer.objects.create(
+            full_name='Maria Souza',
+            phone='(11) 98765-4321',
+            cpf='529.982.247-25',
+            email='maria@example.com',
+        )
+        self.joao = Customer.objects.create(full_name='João Lima', phone='21987654321')
+
+    def test_save_fills_digits(self):
+        self.assertEqual(self.maria.phone_digits, '11987654321')
+        self.assertEqual(self.maria.cpf_digits, '52998224725')
+
+        self.maria.phone = '(11) 91111-2222'
+        self.maria.save(update_fields=['phone'])
+        self.maria.refresh_from_db()
+        self.assertEqual(self.maria.phone_digits, '11911112222')
+
+    def test_exact_cpf_with_mask(self):
+        self.assertEqual(list(search_customers('529.982.247-25')), [self.maria])
+
+    def test_phone_prefix(self):
+        self.assertEqual(list(search_customers('(11) 9876')), [self.maria])
+
+    def test_name_and_email(self):
+        self.assertEqual(list(search_customers('souza')), [self.maria])
+        self.assertEqual(list(search_customers('maria@exa')), [self.maria])
+
+    def test_form_rejects_duplicate_digits(self):
+        form = CustomerForm(data={'full_name': 'Outra Maria', 'phone': '11987654321', 'cpf': '52998224725'})
+
+        self.assertFalse(form.is_valid())
+        self.assertIn('phone', form.errors)
+        self.assertIn('cpf', form.errors)
+
+        form = CustomerForm(data={'full_name': 'Maria Souza', 'phone': '(11) 98765-4321'}, instance=self.maria)
+        self.assertNotIn('phone', form.errors)
+
+    def test_api_rejects_duplicate_phone(self):
+        user = User.objects.create_user(username='testuser', password='12345')
+        self.client.force_login(user)
+        response = self.client.post(reverse('customer-list-create-api'), {'full_name': 'Outra Maria', 'phone': '11 98765 4321'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('phone', response.json())
+
+    def test_backfill_command(self):
+        Customer.objects.filter(pk=self.joao.pk).update(phone_digits='')
+        call_command('backfill_customer_digits', stdout=StringIO())
+        self.joao.refresh_from_db()
+        self.assertEqual(self.joao.phone_digits, '21987654321')
+
+    def test_api_search(self):
+        user = User.objects.create_user(username='testuser', password='12345')
+        self.client.force_login(user)
+        response = self.client.get(reverse('customer-list-create-api'), {'search': '21987654321'})
+
+        self.assertEqual([c['id'] for c in response.json()], [self.joao.pk])
+        self.assertNotIn('phone_digits', response.json()[0])
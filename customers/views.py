@@ -1,14 +1,15 @@
-import re
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
-from django.db.models import Q
 from django.urls import reverse_lazy
 from django.views.generic import ListView, CreateView, DetailView, UpdateView, DeleteView
 from rest_framework import generics, permissions
 from rest_framework.authentication import SessionAuthentication
+from rest_framework.response import Response
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from app import search_cache
 from .models import Customer
 from .forms import CustomerForm
 from .serializers import CustomerSerializer
+from .search import search_customers
 
 
 class CustomerListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
@@ -66,20 +67,19 @@ class CustomerListCreateAPIView(generics.ListCreateAPIView):
     serializer_class = CustomerSerializer
 
     def get_queryset(self):
-        queryset = Customer.objects.all()
-        search = self.request.query_params.get('search')
-
-        if search:
-            search = search.strip()
-            numeric = re.sub(r'\D', '', search)
-            query = Q(full_name__icontains=search) | Q(email__icontains=search)
-            if numeric:
-                query |= Q(cpf__icontains=numeric) | Q(phone__icontains=numeric)
-            else:
-                query |= Q(cpf__icontains=search) | Q(phone__icontains=search)
-            queryset = queryset.filter(query)
-
-        return queryset.order_by('full_name')[:10]
+        return search_customers(self.request.query_params.get('search'))
+
+    def list(self, request, *args, **kwargs):
+        search = request.query_params.get('search')
+        if not search:
+            return super().list(request, *args, **kwargs)
+
+        data = search_cache.get_or_set(
+            search_cache.CUSTOMERS,
+            search,
+            lambda: self.get_serializer(self.get_queryset(), many=True).data,
+        )
+        return Response(data)
 
 
 class CustomerRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
@@ -0,0 +1,56 @@
+"""
+Configuração do Gunicorn para produção (usada por scripts/start_server.sh).
+
+    gunicorn -c gunicorn.conf.py app.wsgi:application
+    gunicorn -c gunicorn.conf.py app.asgi:application   # SERVER_INTERFACE=asgi
+
+Variáveis de ambiente:
+- PORT: porta (padrão 8001)
+- WEB_CONCURRENCY: número de workers (padrão: 2 × núcleos + 1, máx. GUNICORN_MAX_WORKERS)
+- GUNICORN_THREADS: threads por worker no modo WSGI (padrão 4)
+- SERVER_INTERFACE: wsgi (gthread) ou asgi (uvicorn)
+- GUNICORN_TIMEOUT / GUNICORN_GRACEFUL_TIMEOUT / GUNICORN_KEEPALIVE: segundos
+- GUNICORN_MAX_REQUESTS: recicla o worker após N requisições (0 desliga)
+
+Recarga sem derrubar conexões: `kill -HUP <pid do master>` (ou
+`docker compose kill -s HUP sge_web`) sobe workers novos com o código
+atual e encerra os antigos depois que terminam as requisições em curso.
+"""
+import os
+
+
+def _cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _int(name: str, default: int) -> int:
+    return int(os.getenv(name) or default)
+
+
+bind = f'0.0.0.0:{_int("PORT", 8001)}'
+
+workers = _int('WEB_CONCURRENCY', min(2 * _cores() + 1, _int('GUNICORN_MAX_WORKERS', 12)))
+if os.getenv('SERVER_INTERFACE', 'wsgi') == 'asgi':
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    worker_class = 'gthread'
+    threads = _int('GUNICORN_THREADS', 4)
+
+timeout = _int('GUNICORN_TIMEOUT', 60)
+graceful_timeout = _int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _int('GUNICORN_KEEPALIVE', 5)
+
+# Recicla workers aos poucos (jitter evita reiniciar todos juntos)
+max_requests = _int('GUNICORN_MAX_REQUESTS', 2000)
+max_requests_jitter = max_requests // 10
+
+# Sem preload: o HUP recarrega o código da aplicação nos workers novos
+preload_app = False
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+forwarded_allow_ips = os.getenv('FORWARDED_ALLOW_IPS', '127.0.0.1')
@@ -6,16 +6,18 @@ class InflowForm(forms.ModelForm):
 
     class Meta:
         model = models.Inflow
-        fields = ['supplier', 'product', 'quantity', 'description']
+        fields = ['supplier', 'product', 'quantity', 'unit_cost', 'description']
         widgets = {
             'supplier': forms.Select(attrs={'class': 'form-control'}),
             'product': forms.Select(attrs={'class': 'form-control'}),
             'quantity': forms.NumberInput(attrs={'class': 'form-control'}),
+            'unit_cost': forms.NumberInput(attrs={'class': 'form-control'}),
             'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
         }
         labels = {
             'supplier': 'Fornecedor',
             'product': 'Produto',
             'quantity': 'Quantidade',
+            'unit_cost': 'Custo Unitário',
             'description': 'Descrição',
         }
@@ -0,0 +1,68 @@
+"""
+Importação em massa de entradas de estoque via CSV.
+
+Produtos (por código ou id) e fornecedores são resolvidos por mapas em
+memória; cada lote é gravado com um único INSERT e um único UPDATE de
+estoque agrupado por produto (services.post_inflows). Fornecedores
+inexistentes são criados.
+
+    codigo;fornecedor;quantidade;custo_unitario;descricao
+
+A coluna custo_unitario é opcional (vazia: preço de custo do produto).
+"""
+from typing import Dict, List, Tuple
+from products.importers import BaseImporter, NameMap, load_product_codes, parse_decimal, parse_positive_int
+from products.models import Product
+from suppliers.models import Supplier
+from . import services
+from .models import Inflow
+
+
+class InflowImporter(BaseImporter):
+    aliases = {
+        'codigo': 'code', 'code': 'code', 'serie_number': 'code',
+        'produto_id': 'product_id', 'product_id': 'product_id', 'id_produto': 'product_id',
+        'fornecedor': 'supplier', 'supplier': 'supplier',
+        'quantidade': 'quantity', 'quantity': 'quantity', 'qtd': 'quantity',
+        'custo_unitario': 'unit_cost', 'custo': 'unit_cost', 'unit_cost': 'unit_cost',
+        'descricao': 'description', 'description': 'description',
+    }
+    required_columns = ('supplier', 'quantity')
+    labels = {'supplier': 'fornecedor', 'quantity': 'quantidade'}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.suppliers = NameMap(Supplier)
+        self.codes = load_product_codes()
+
+    def build(self, row: Dict[str, str]) -> Inflow:
+        if row.get('code'):
+            product_id = self.codes.get(row['code'])
+            if product_id is None:
+                raise ValueError(f'Produto com código "{row["code"]}" não encontrado')
+        elif row.get('product_id'):
+            product_id = parse_positive_int(row['product_id'], 'Id do produto')
+        else:
+            raise ValueError('Informe o código ou o id do produto')
+
+        return Inflow(
+            supplier_id=self.suppliers.resolve(row['supplier']),
+            product_id=product_id,
+            quantity=parse_positive_int(row['quantity'], 'Quantidade'),
+            unit_cost=parse_decimal(row['unit_cost'], 'Custo unitário') if row.get('unit_cost') else None,
+            description=row.get('description') or None,
+        )
+
+    def save(self, batch: List[Tuple[int, Inflow]]) -> None:
+        requested = {inflow.product_id for _, inflow in batch}
+        existing = set(Product.objects.filter(id__in=requested).values_list('id', flat=True))
+
+        inflows = []
+        for line, inflow in batch:
+            if inflow.product_id in existing:
+                inflows.append(inflow)
+            else:
+                self.report.add_error(line, f'Produto {inflow.product_id} não encontrado')
+
+        services.post_inflows(inflows)
+        self.report.created += len(inflows)
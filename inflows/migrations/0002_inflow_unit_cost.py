@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 00:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inflows', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inflow',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True),
+        ),
+    ]
@@ -1,5 +1,7 @@
-from django.db import models
-from products.models import Product
+from django.db import models, transaction
+from products.models import Product, StockMovement
+from products import valuation
+from products.stock import post_movements
 from suppliers.models import Supplier
 
 
@@ -7,6 +9,8 @@ class Inflow(models.Model):
     supplier = models.ForeignKey(Supplier, on_delete=models.PROTECT, related_name='inflows')
     product = models.ForeignKey(Product, on_delete=models.PROTECT, related_name='inflows')
     quantity = models.IntegerField()
+    # Custo unitário pago na entrada; se vazio, usa o preço de custo do produto
+    unit_cost = models.DecimalField(max_digits=20, decimal_places=2, null=True, blank=True)
     description = models.TextField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -16,3 +20,16 @@ class Inflow(models.Model):
 
     def __str__(self):
         return str(self.product)
+
+    def save(self, *args, **kwargs):
+        """Na criação, atualiza o custo médio e lança a entrada no estoque (e no
+        diário) na mesma transação."""
+        created = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if created and self.quantity > 0:
+                post_movements(
+                    StockMovement.Kind.INFLOW,
+                    [(self.product_id, self.quantity, self.pk)],
+                    average_costs=valuation.receive([(self.product_id, self.quantity, self.unit_cost)]),
+                )
@@ -1,5 +1,9 @@
+from decimal import Decimal
 from rest_framework import serializers
+from inflows import services
 from inflows.models import Inflow
+from products.models import Product
+from suppliers.models import Supplier
 
 
 class InflowSerializer(serializers.ModelSerializer):
@@ -7,3 +11,30 @@ class InflowSerializer(serializers.ModelSerializer):
     class Meta:
         model = Inflow
         fields = '__all__'
+
+
+class GoodsReceiptItemSerializer(serializers.Serializer):
+    product = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+    unit_cost = serializers.DecimalField(max_digits=20, decimal_places=2, min_value=Decimal('0'), required=False, allow_null=True)
+
+
+class GoodsReceiptSerializer(serializers.Serializer):
+    supplier = serializers.PrimaryKeyRelatedField(queryset=Supplier.objects.all())
+    description = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    items = GoodsReceiptItemSerializer(many=True, allow_empty=False, max_length=1000)
+
+    def validate_items(self, items):
+        product_ids = {item['product'] for item in items}
+        existing = set(Product.objects.filter(id__in=product_ids).values_list('id', flat=True))
+        missing = sorted(product_ids - existing)
+        if missing:
+            raise serializers.ValidationError(f'Produtos inexistentes: {", ".join(map(str, missing))}')
+        return items
+
+    def create(self, validated_data):
+        return services.create_receipt(
+            validated_data['supplier'].id,
+            validated_data['items'],
+            validated_data.get('description'),
+        )
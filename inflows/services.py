@@ -0,0 +1,41 @@
+"""
+Serviços de entrada de mercadorias.
+
+Funções disponíveis:
+- post_inflows(): Grava várias entradas e lança o estoque de uma vez
+- create_receipt(): Registra uma entrega do fornecedor com várias linhas
+"""
+from typing import Dict, List
+from django.db import transaction
+from products.models import StockMovement
+from products import valuation
+from products.stock import post_movements
+from .models import Inflow
+
+
+@transaction.atomic
+def post_inflows(inflows: List[Inflow]) -> List[Inflow]:
+    """Cria as entradas com um único INSERT e lança o estoque com um único
+    UPDATE agrupado por produto, que também grava o novo custo médio (mais um
+    INSERT no diário de movimentos)."""
+    inflows = Inflow.objects.bulk_create(inflows)
+    post_movements(
+        StockMovement.Kind.INFLOW,
+        [(inflow.product_id, inflow.quantity, inflow.pk) for inflow in inflows if inflow.quantity > 0],
+        average_costs=valuation.receive((inflow.product_id, inflow.quantity, inflow.unit_cost) for inflow in inflows),
+    )
+    return inflows
+
+
+def create_receipt(supplier_id: int, items: List[Dict[str, int]], description: str = None) -> List[Inflow]:
+    """Registra as linhas de uma entrega (`items`: [{product, quantity, unit_cost?}])."""
+    return post_inflows([
+        Inflow(
+            supplier_id=supplier_id,
+            product_id=item['product'],
+            quantity=item['quantity'],
+            unit_cost=item.get('unit_cost'),
+            description=description,
+        )
+        for item in items
+    ])
@@ -0,0 +1,127 @@
+import io
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from brands.models import Brand
+from categories.models import Category
+from inflows.importers import InflowImporter
+from inflows.models import Inflow
+from products.models import Product, CatalogChange
+from suppliers.models import Supplier
+
+
+class InflowStockTestCase(TestCase):
+    """Testes do lançamento de entradas no estoque."""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(username='admin', password='12345')
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.supplier = Supplier.objects.create(name='Fornecedor Teste')
+        brand = Brand.objects.create(name='Marca Teste')
+        category = Category.objects.create(name='Categoria Teste')
+        self.products = [
+            Product.objects.create(
+                title=f'Produto {i}',
+                brand=brand,
+                category=category,
+                selling_price=Decimal('10.00'),
+                cost_price=Decimal('5.00'),
+                quantity=10,
+                serie_number=f'SKU-{i}',
+            )
+            for i in range(3)
+        ]
+        self.url = reverse('goods-receipt-create-api-view')
+
+    def test_inflow_posts_stock_with_atomic_update(self):
+        product = self.products[0]
+        with CaptureQueriesContext(connection) as context:
+            Inflow.objects.create(supplier=self.supplier, product=product, quantity=5)
+
+        product.refresh_from_db()
+        self.assertEqual(product.quantity, 15)
+        updates = [query['sql'] for query in context.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"quantity" = ("products_product"."quantity" +', updates[0])
+        self.assertNotIn('updated_at', updates[0])
+        self.assertTrue(CatalogChange.objects.filter(product_id=product.id).exists())
+
+    def test_stale_instance_does_not_overwrite_stock(self):
+        product = self.products[0]
+        stale = Product.objects.get(id=product.id)
+        Inflow.objects.create(supplier=self.supplier, product=stale, quantity=3)
+        Inflow.objects.create(supplier=self.supplier, product=stale, quantity=4)
+
+        product.refresh_from_db()
+        self.assertEqual(product.quantity, 17)
+
+    def test_updating_inflow_does_not_post_again(self):
+        inflow = Inflow.objects.create(supplier=self.supplier, product=self.products[0], quantity=5)
+        inflow.description = 'Conferido'
+        inflow.save()
+
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].quantity, 15)
+
+    def test_goods_receipt_bulk(self):
+        a, b, c = self.products
+        payload = {
+            'supplier': self.supplier.id,
+            'description': 'NF 123',
+            'items': [
+                {'product': a.id, 'quantity': 2},
+                {'product': b.id, 'quantity': 5},
+                {'product': a.id, 'quantity': 3},
+                {'product': c.id, 'quantity': 1},
+            ],
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = self.api.post(self.url, payload, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()), 4)
+        self.assertEqual(Inflow.objects.filter(description='NF 123').count(), 4)
+        self.assertEqual(
+            {p.id: p.quantity for p in Product.objects.filter(id__in=[a.id, b.id, c.id])},
+            {a.id: 15, b.id: 15, c.id: 11},
+        )
+        sql = [query['sql'] for query in context.captured_queries]
+        self.assertEqual(len([q for q in sql if q.startswith('INSERT INTO "inflows_inflow"')]), 1)
+        self.assertEqual(len([q for q in sql if q.startswith('UPDATE "products_product"')]), 1)
+
+    def test_goods_receipt_rejects_unknown_products(self):
+        payload = {
+            'supplier': self.supplier.id,
+            'items': [{'product': self.products[0].id, 'quantity': 1}, {'product': 999999, 'quantity': 1}],
+        }
+        response = self.api.post(self.url, payload, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('999999', str(response.json()['items']))
+        self.assertFalse(Inflow.objects.exists())
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].quantity, 10)
+
+    def test_import_inflows_csv(self):
+        a, b, _ = self.products
+        report = InflowImporter().run(io.StringIO(
+            'codigo;fornecedor;quantidade;descricao\n'
+            'SKU-0;Fornecedor Teste;4;NF 1\n'
+            'SKU-1;Novo Fornecedor;2;NF 1\n'
+            'SKU-0;fornecedor teste;1;NF 1\n'
+            'SKU-9;Fornecedor Teste;1;NF 1\n'
+            'SKU-1;Fornecedor Teste;0;NF 1\n'
+        ))
+
+        self.assertEqual((report.total, report.created, report.error_count), (5, 3, 2))
+        self.assertEqual([error.line for error in report.errors], [5, 6])
+        a.refresh_from_db()
+        b.refresh_from_db()
+        self.assertEqual((a.quantity, b.quantity), (15, 12))
+        self.assertEqual(Inflow.objects.filter(supplier=self.supplier).count(), 2)
+        self.assertTrue(Supplier.objects.filter(name='Novo Fornecedor').exists())
@@ -8,5 +8,6 @@ urlpatterns = [
     path('inflows/<int:pk>/detail/', views.InflowDetailView.as_view(), name='inflow_detail'),
 
     path('api/v1/inflows/', views.InflowCreateListAPIView.as_view(), name='inflow-create-list-api-view'),
+    path('api/v1/inflows/receipts/', views.GoodsReceiptCreateAPIView.as_view(), name='goods-receipt-create-api-view'),
     path('api/v1/inflows/<int:pk>/', views.InflowRetrieveAPIView.as_view(), name='inflow-detail-api-view'),
 ]
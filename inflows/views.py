@@ -1,4 +1,5 @@
-from rest_framework import generics
+from rest_framework import generics, status
+from rest_framework.response import Response
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.urls import reverse_lazy
 from django.views.generic import ListView, CreateView, DetailView
@@ -45,3 +46,15 @@ class InflowCreateListAPIView(generics.ListCreateAPIView):
 class InflowRetrieveAPIView(generics.RetrieveAPIView):
     queryset = models.Inflow.objects.all()
     serializer_class = serializers.InflowSerializer
+
+
+class GoodsReceiptCreateAPIView(generics.CreateAPIView):
+    """Registra uma entrega do fornecedor com várias linhas em uma requisição."""
+    queryset = models.Inflow.objects.all()
+    serializer_class = serializers.GoodsReceiptSerializer
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        inflows = serializer.save()
+        return Response(serializers.InflowSerializer(inflows, many=True).data, status=status.HTTP_201_CREATED)
@@ -26,7 +26,7 @@ class SaleAdmin(admin.ModelAdmin):
     list_filter = ['status', 'created_at', 'user']
     search_fields = ['customer__full_name', 'notes']
     readonly_fields = [
-        'subtotal', 'total', 'total_paid', 'items_count',
+        'subtotal', 'total', 'total_paid', 'items_count', 'max_customer_fee_pct',
         'change_total', 'remaining', 'created_at', 'updated_at', 'finalized_at'
     ]
     inlines = [SaleItemInline, SalePaymentInline]
@@ -37,7 +37,7 @@ class SaleAdmin(admin.ModelAdmin):
         }),
         ('Valores', {
             'fields': (
-                'subtotal', 'discount_total', 'total',
+                'subtotal', 'discount_total', 'max_customer_fee_pct', 'total',
                 'total_paid', 'remaining', 'change_total'
             )
         }),
@@ -0,0 +1,164 @@
+"""
+Exportação CSV em streaming (vendas, itens, pagamentos, lançamentos e devoluções).
+
+As linhas são lidas com `values_list(...).iterator(chunk_size=...)` e
+escritas uma a uma, então a memória usada não depende do tamanho do
+período exportado. Os filtros são os mesmos das listagens (pos/filters.py).
+
+Funções disponíveis:
+- iter_csv(): Gera o CSV (cabeçalho + linhas) como pedaços de texto
+- write_csv(): Escreve o CSV em um arquivo (comando export_csv)
+"""
+import csv
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Iterator, List, Mapping, TextIO, Tuple
+from django.db.models import DecimalField, ExpressionWrapper, F, QuerySet
+from .filters import filter_ledger, filter_returns, filter_sales
+from .models import LedgerEntry, Return, Sale, SaleItem, SalePayment
+
+
+CHUNK_SIZE = 2000
+DELIMITER = ';'
+
+_MONEY = DecimalField(max_digits=20, decimal_places=2)
+
+# Vendas finalizadas, inclusive as que tiveram devolução depois; o filtro de
+# status da listagem restringe a partir daqui
+SOLD_STATUSES = [Sale.Status.FINALIZED, Sale.Status.PARTIALLY_RETURNED, Sale.Status.FULLY_RETURNED]
+
+
+@dataclass(frozen=True)
+class Export:
+    label: str
+    columns: List[Tuple[str, str]]
+    queryset: Callable[[Mapping], QuerySet]
+    staff_only: bool = False
+
+
+def _sales(params: Mapping) -> QuerySet:
+    return filter_sales(Sale.objects.filter(status__in=SOLD_STATUSES), params).order_by('finalized_at', 'id')
+
+
+def _items(params: Mapping) -> QuerySet:
+    queryset = SaleItem.objects.filter(sale__status__in=SOLD_STATUSES).annotate(
+        cost_total=ExpressionWrapper(F('unit_cost') * F('quantity'), output_field=_MONEY),
+        profit=ExpressionWrapper(F('line_total') - F('unit_cost') * F('quantity'), output_field=_MONEY),
+    )
+    return filter_sales(queryset, params, prefix='sale__').order_by('sale__finalized_at', 'sale_id', 'id')
+
+
+def _payments(params: Mapping) -> QuerySet:
+    queryset = SalePayment.objects.filter(sale__status__in=SOLD_STATUSES)
+    return filter_sales(queryset, params, prefix='sale__').order_by('sale__finalized_at', 'sale_id', 'id')
+
+
+def _ledger(params: Mapping) -> QuerySet:
+    return filter_ledger(LedgerEntry.objects.all(), params).order_by('created_at', 'id')
+
+
+def _returns(params: Mapping) -> QuerySet:
+    return filter_returns(Return.objects.all(), params).order_by('created_at', 'id')
+
+
+EXPORTS = {
+    'sales': Export('Vendas', [
+        ('venda', 'id'),
+        ('finalizada_em', 'finalized_at'),
+        ('cliente', 'customer__full_name'),
+        ('telefone', 'customer__phone'),
+        ('vendedor', 'user__username'),
+        ('subtotal', 'subtotal'),
+        ('desconto', 'discount_total'),
+        ('taxa_cliente_pct', 'max_customer_fee_pct'),
+        ('total', 'total'),
+        ('total_pago', 'total_paid'),
+        ('status', 'status'),
+    ], _sales),
+    'items': Export('Itens de venda', [
+        ('venda', 'sale_id'),
+        ('finalizada_em', 'sale__finalized_at'),
+        ('produto_id', 'product_id'),
+        ('codigo', 'product__serie_number'),
+        ('produto', 'product__title'),
+        ('categoria', 'product__category__name'),
+        ('marca', 'product__brand__name'),
+        ('quantidade', 'quantity'),
+        ('preco_unitario', 'unit_price'),
+        ('custo_unitario', 'unit_cost'),
+        ('total', 'line_total'),
+        ('custo_total', 'cost_total'),
+        ('lucro', 'profit'),
+    ], _items),
+    'payments': Export('Pagamentos', [
+        ('venda', 'sale_id'),
+        ('finalizada_em', 'sale__finalized_at'),
+        ('metodo', 'payment_method__name'),
+        ('taxa_pct', 'payment_method__fee_percentage'),
+        ('taxa_paga_por', 'payment_method__fee_payer'),
+        ('valor', 'amount_applied'),
+        ('valor_entregue', 'cash_tendered'),
+        ('troco', 'change_given'),
+    ], _payments),
+    'ledger': Export('Lançamentos', [
+        ('lancamento', 'id'),
+        ('criado_em', 'created_at'),
+        ('cliente', 'customer__full_name'),
+        ('tipo', 'type'),
+        ('status', 'status'),
+        ('valor', 'amount'),
+        ('venda', 'sale_id'),
+        ('descricao', 'description'),
+        ('liquidado_em', 'settled_at'),
+    ], _ledger),
+    'returns': Export('Devoluções', [
+        ('devolucao', 'id'),
+        ('criada_em', 'created_at'),
+        ('concluida_em', 'completed_at'),
+        ('venda', 'original_sale_id'),
+        ('cliente', 'customer__full_name'),
+        ('usuario', 'user__username'),
+        ('status', 'status'),
+        ('reembolso', 'refund_method'),
+        ('valor', 'total_amount'),
+        ('motivo', 'reason'),
+    ], _returns, staff_only=True),
+}
+
+
+class _Echo:
+    """Arquivo falso: csv.writer devolve a linha em vez de gravar."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _format(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ', timespec='seconds')
+    if isinstance(value, (date, Decimal)):
+        return str(value)
+    return value
+
+
+def iter_csv(kind: str, params: Mapping = None) -> Iterator[str]:
+    """Gera o CSV de `kind` (chave de EXPORTS) com os filtros de `params`."""
+    export = EXPORTS[kind]
+    writer = csv.writer(_Echo(), delimiter=DELIMITER)
+    yield writer.writerow([header for header, _ in export.columns])
+
+    rows = export.queryset(params or {}).values_list(*[lookup for _, lookup in export.columns])
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield writer.writerow([_format(value) for value in row])
+
+
+def write_csv(kind: str, stream: TextIO, params: Mapping = None) -> int:
+    """Escreve o CSV em `stream`. Retorna o número de linhas de dados."""
+    count = -1
+    for line in iter_csv(kind, params):
+        stream.write(line)
+        count += 1
+    return count
@@ -0,0 +1,85 @@
+"""
+Filtros das listagens do PDV, compartilhados pelas views e pelas exportações.
+
+Cada função recebe um queryset e os parâmetros da requisição (request.GET ou
+um dict) e devolve o queryset filtrado. `prefix` permite aplicar o mesmo
+filtro a partir de um modelo relacionado (ex.: itens filtrados pela venda,
+prefix='sale__').
+
+Funções disponíveis:
+- filter_sales(): busca, status e período (finalized_at)
+- filter_ledger(): tipo, status e cliente
+- filter_returns(): status, forma de reembolso, busca, período e cliente
+"""
+from typing import Mapping
+from django.db.models import Q, QuerySet
+
+
+def filter_sales(queryset: QuerySet, params: Mapping, prefix: str = '') -> QuerySet:
+    search = (params.get('search') or '').strip()
+    if search:
+        query = Q(**{f'{prefix}id__icontains': search})
+        query |= Q(**{f'{prefix}customer__full_name__icontains': search})
+        query |= Q(**{f'{prefix}customer__phone__icontains': search})
+        queryset = queryset.filter(query)
+
+    status_filter = params.get('status')
+    if status_filter:
+        queryset = queryset.filter(**{f'{prefix}status': status_filter})
+
+    date_from = params.get('date_from')
+    if date_from:
+        queryset = queryset.filter(**{f'{prefix}finalized_at__gte': date_from})
+
+    date_to = params.get('date_to')
+    if date_to:
+        queryset = queryset.filter(**{f'{prefix}finalized_at__lte': date_to})
+
+    return queryset
+
+
+def filter_ledger(queryset: QuerySet, params: Mapping) -> QuerySet:
+    type_filter = params.get('type')
+    if type_filter:
+        queryset = queryset.filter(type=type_filter)
+
+    status_filter = params.get('status')
+    if status_filter:
+        queryset = queryset.filter(status=status_filter)
+
+    customer_filter = params.get('customer')
+    if customer_filter:
+        queryset = queryset.filter(customer_id=customer_filter)
+
+    return queryset
+
+
+def filter_returns(queryset: QuerySet, params: Mapping) -> QuerySet:
+    status = params.get('status')
+    if status:
+        queryset = queryset.filter(status=status)
+
+    refund_method = params.get('refund_method')
+    if refund_method:
+        queryset = queryset.filter(refund_method=refund_method)
+
+    search = params.get('search')
+    if search:
+        query = Q(customer__full_name__icontains=search)
+        query |= Q(reason__icontains=search)
+        query |= Q(original_sale__id__icontains=search)
+        queryset = queryset.filter(query)
+
+    date_from = params.get('date_from')
+    if date_from:
+        queryset = queryset.filter(created_at__date__gte=date_from)
+
+    date_to = params.get('date_to')
+    if date_to:
+        queryset = queryset.filter(created_at__date__lte=date_to)
+
+    customer_id = params.get('customer')
+    if customer_id:
+        queryset = queryset.filter(customer_id=customer_id)
+
+    return queryset
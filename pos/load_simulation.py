@@ -0,0 +1,357 @@
+"""
+Simulação de carga do PDV: vários caixas operando ao mesmo tempo.
+
+Cada caixa roda em uma thread (com a própria conexão ao banco) e repete o
+fluxo real de pos.services: abre o rascunho, bipa itens (parte deles em um
+conjunto pequeno de produtos "quentes", para haver disputa), usa crédito do
+cliente, paga o restante em dinheiro e finaliza; de vez em quando devolve
+um item de uma venda que ele mesmo fechou (criar, aprovar e concluir).
+
+    report = load_simulation.run(LoadPlan(cashiers=20, sales_per_cashier=25))
+
+Ao final, check_consistency() confere o estoque e o crédito contra o que
+foi efetivamente gravado: estoque negativo, estoque diferente do diário de
+movimentos, estoque diferente de "inicial - vendido + devolvido" (updates
+perdidos) e crédito usado acima do disponível. As falhas são separadas em
+bloqueio (database is locked, deadlock, serialização), recusa de negócio
+(ValueError/ReturnValidationError, como falta de estoque) e erro.
+
+Falhas de bloqueio são reenviadas com backoff exponencial (até
+`max_retries` vezes por operação), como um terminal que repete a
+requisição; as repetições aparecem em `retries` e só a operação que
+esgota as tentativas conta como falha. `finalized_rate` indica quantas
+das vendas tentadas fecharam: com taxa baixa, a verificação de
+consistência pouco prova.
+
+Ver o comando `python manage.py pos_load_test`.
+"""
+import logging
+import random
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, List
+from django.contrib.auth.models import User
+from django.db import DatabaseError, connections
+from django.db.models import Sum
+from customers.models import Customer
+from products.models import Product, StockMovement
+from . import services
+from .models import LedgerEntry, PaymentMethod, Return, ReturnItem, Sale, SaleItem, SalePayment
+from .return_services import ReturnValidationError, approve_return, complete_return, create_return
+
+
+logger = logging.getLogger(__name__)
+
+LOCK_MARKERS = ('database is locked', 'database table is locked', 'deadlock', 'could not serialize', 'lock timeout')
+CREDIT_METHOD = 'Crédito'
+
+
+@dataclass
+class LoadPlan:
+    cashiers: int = 10
+    sales_per_cashier: int = 20
+    max_items: int = 4
+    hot_products: int = 10
+    credit_rate: float = 0.2
+    return_rate: float = 0.05
+    seed: int = 42
+    max_retries: int = 8
+    retry_backoff: float = 0.01
+
+
+@dataclass
+class CashierStats:
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    failures: Counter = field(default_factory=Counter)
+    retries: Counter = field(default_factory=Counter)
+    samples: Dict[str, str] = field(default_factory=dict)
+    sale_ids: List[int] = field(default_factory=list)
+    return_ids: List[int] = field(default_factory=list)
+    attempted: int = 0
+
+
+@dataclass
+class LoadReport:
+    plan: LoadPlan
+    elapsed_seconds: float
+    attempted: int
+    latencies: Dict[str, List[float]]
+    failures: Counter
+    retries: Counter
+    samples: Dict[str, str]
+    sale_ids: List[int]
+    return_ids: List[int]
+    violations: List[str] = field(default_factory=list)
+
+    @property
+    def throughput(self) -> float:
+        return len(self.sale_ids) / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def finalized_rate(self) -> float:
+        return len(self.sale_ids) / self.attempted if self.attempted else 0.0
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Latência por operação (ms): quantidade, média, p50, p95, p99 e máximo."""
+        result = {}
+        for name, timings in sorted(self.latencies.items()):
+            timings = sorted(timings)
+            result[name] = {
+                'count': len(timings),
+                'mean_ms': round(statistics.fmean(timings), 3),
+                'p50_ms': round(_percentile(timings, 0.50), 3),
+                'p95_ms': round(_percentile(timings, 0.95), 3),
+                'p99_ms': round(_percentile(timings, 0.99), 3),
+                'max_ms': round(timings[-1], 3),
+            }
+        return result
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def classify(exc: Exception) -> str:
+    if isinstance(exc, (ValueError, ReturnValidationError)):
+        return 'rejected'
+    if isinstance(exc, DatabaseError) and any(marker in str(exc).lower() for marker in LOCK_MARKERS):
+        return 'lock'
+    return 'error'
+
+
+class _Cashier:
+
+    def __init__(self, index: int, plan: LoadPlan, context: Dict):
+        self.plan = plan
+        self.rng = random.Random(plan.seed + index)
+        self.user = context['users'][index]
+        self.session_key = f'simulacao-{index:02d}'
+        self.context = context
+        self.stats = CashierStats()
+
+    def run(self, barrier: threading.Barrier) -> None:
+        try:
+            barrier.wait()
+            for _ in range(self.plan.sales_per_cashier):
+                self.stats.attempted += 1
+                sale_id = self._attempt(self._sale)
+                if sale_id:
+                    self.stats.sale_ids.append(sale_id)
+                    if self.rng.random() < self.plan.return_rate:
+                        self._attempt(self._return)
+        finally:
+            connections.close_all()
+
+    def _attempt(self, operation):
+        try:
+            return operation()
+        except Exception as exc:
+            kind = classify(exc)
+            self.stats.failures[kind] += 1
+            self.stats.samples.setdefault(kind, f'{type(exc).__name__}: {exc}')
+            self._discard_draft()
+            return None
+
+    def _retrying(self, name: str, func, *args, **kwargs):
+        """Executa `func`, repetindo falhas de bloqueio com backoff exponencial
+        (com jitter) até `max_retries` vezes."""
+        for attempt in range(self.plan.max_retries + 1):
+            try:
+                return func(*args, **kwargs)
+            except DatabaseError as exc:
+                if classify(exc) != 'lock' or attempt == self.plan.max_retries:
+                    raise
+                self.stats.retries[name] += 1
+                time.sleep(self.plan.retry_backoff * 2 ** attempt * (1 + self.rng.random()))
+
+    def _timed(self, name: str, func, *args, **kwargs):
+        """Operação com repetição; a latência inclui as repetições, como o caixa sente."""
+        started = time.perf_counter()
+        try:
+            return self._retrying(name, func, *args, **kwargs)
+        finally:
+            self.stats.latencies[name].append((time.perf_counter() - started) * 1000)
+
+    def _discard_draft(self) -> None:
+        # Rascunho que sobrou de uma venda que falhou não pode contaminar a próxima
+        def discard():
+            sale = Sale.objects.filter(user=self.user, session_key=self.session_key, status=Sale.Status.DRAFT).first()
+            if sale:
+                services.cancel_sale(sale)
+
+        try:
+            self._retrying('discard_draft', discard)
+        except DatabaseError as exc:
+            kind = classify(exc)
+            self.stats.failures[kind] += 1
+            self.stats.samples.setdefault(kind, f'{type(exc).__name__}: {exc}')
+            logger.warning('%s: rascunho não descartado: %s', self.session_key, exc)
+
+    def _pick_product(self) -> int:
+        products = self.context['hot'] if self.rng.random() < 0.5 else self.context['products']
+        return self.rng.choice(products)
+
+    def _sale(self) -> int:
+        stats = self.stats
+        started = time.perf_counter()
+        sale = self._timed('open_draft', services.get_or_create_draft_sale, self.user, self.session_key)
+
+        customer = None
+        if self.context['credit_customers'] and self.rng.random() < self.plan.credit_rate:
+            customer = self.rng.choice(self.context['credit_customers'])
+            sale = self._timed('set_customer', services.set_customer, sale, customer.id)
+
+        for _ in range(self.rng.randint(1, self.plan.max_items)):
+            self._timed('add_item', services.add_item, sale, self._pick_product(), self.rng.randint(1, 2))
+
+        if customer:
+            available = services.get_customer_available_credit(customer, sale=sale)
+            amount = min(available, sale.total - sale.total_paid)
+            if amount > 0:
+                self._timed('apply_credit', services.apply_credit_to_sale, sale, amount)
+
+        remaining = sale.total - sale.total_paid
+        if remaining > 0:
+            self._timed('add_payment', services.add_payment, sale, self.context['cash'].id, cash_tendered=remaining)
+
+        result = self._timed('finalize', services.finalize_sale, sale)
+        if result['status'] != 'success':
+            raise RuntimeError(f'Venda #{sale.pk} não fechou: {result}')
+        stats.latencies['sale'].append((time.perf_counter() - started) * 1000)
+        return sale.pk
+
+    def _return(self) -> int:
+        sale = Sale.objects.select_related('customer').get(pk=self.rng.choice(self.stats.sale_ids))
+        item = sale.items.order_by('id').first()
+
+        def process():
+            # Cada etapa é repetida sozinha: repetir create_return criaria outra devolução
+            return_instance = self._retrying('create_return', create_return, sale, [{'sale_item_id': item.id, 'quantity': 1}],
+                                             'Simulação de carga', Return.RefundMethod.CREDIT, self.user)
+            self._retrying('approve_return', approve_return, return_instance, self.context['manager'])
+            return self._retrying('complete_return', complete_return, return_instance)
+
+        started = time.perf_counter()
+        try:
+            return_instance = process()
+        finally:
+            self.stats.latencies['return'].append((time.perf_counter() - started) * 1000)
+        self.stats.return_ids.append(return_instance.pk)
+        return return_instance.pk
+
+
+def _open_credit_by_customer() -> Dict[int, Decimal]:
+    return dict(
+        LedgerEntry.objects.filter(type=LedgerEntry.Type.CREDIT, status=LedgerEntry.Status.OPEN)
+        .values_list('customer_id').annotate(total=Sum('amount')).order_by()
+    )
+
+
+def prepare(plan: LoadPlan) -> Dict:
+    """Carrega o que os caixas usam (usuários, produtos, clientes com crédito)
+    e a fotografia inicial de estoque e crédito usada por check_consistency()."""
+    users = [
+        User.objects.get_or_create(username=f'caixa{index:02d}', defaults={'first_name': f'Caixa {index:02d}'})[0]
+        for index in range(plan.cashiers)
+    ]
+    manager, _ = User.objects.get_or_create(username='gerente-simulacao', defaults={'is_staff': True})
+    cash, _ = PaymentMethod.objects.get_or_create(name='Dinheiro')
+    products = list(Product.objects.filter(quantity__gt=0).order_by('id').values_list('id', flat=True))
+    if not products:
+        raise ValueError('A simulação exige produtos com estoque.')
+    initial_credit = _open_credit_by_customer()
+    services.warm_registry()
+    return {
+        'users': users,
+        'manager': manager,
+        'cash': cash,
+        'products': products,
+        'hot': products[:plan.hot_products] or products,
+        'credit_customers': list(Customer.objects.filter(
+            id__in=[customer_id for customer_id, total in initial_credit.items() if total > 0]
+        ).order_by('id')),
+        'initial_stock': dict(Product.objects.values_list('id', 'quantity')),
+        'initial_credit': initial_credit,
+    }
+
+
+def run(plan: LoadPlan) -> LoadReport:
+    """Roda os caixas em paralelo no banco atual e devolve o relatório, já com
+    as violações de consistência."""
+    context = prepare(plan)
+    cashiers = [_Cashier(index, plan, context) for index in range(plan.cashiers)]
+    barrier = threading.Barrier(plan.cashiers + 1)
+    threads = [threading.Thread(target=cashier.run, args=(barrier,), name=f'caixa-{index:02d}')
+               for index, cashier in enumerate(cashiers)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies, failures, retries, samples, sale_ids, return_ids = defaultdict(list), Counter(), Counter(), {}, [], []
+    for cashier in cashiers:
+        for name, timings in cashier.stats.latencies.items():
+            latencies[name].extend(timings)
+        failures.update(cashier.stats.failures)
+        retries.update(cashier.stats.retries)
+        for kind, sample in cashier.stats.samples.items():
+            samples.setdefault(kind, sample)
+        sale_ids.extend(cashier.stats.sale_ids)
+        return_ids.extend(cashier.stats.return_ids)
+
+    report = LoadReport(
+        plan=plan,
+        elapsed_seconds=elapsed,
+        attempted=sum(cashier.stats.attempted for cashier in cashiers),
+        latencies=dict(latencies),
+        failures=failures,
+        retries=retries,
+        samples=samples,
+        sale_ids=sale_ids,
+        return_ids=return_ids,
+    )
+    report.violations = check_consistency(context, sale_ids, return_ids)
+    return report
+
+
+def check_consistency(context: Dict, sale_ids: List[int], return_ids: List[int]) -> List[str]:
+    """Compara estoque e crédito finais com o que as vendas e devoluções da
+    simulação gravaram; devolve uma descrição por violação."""
+    violations = []
+    final = dict(Product.objects.values_list('id', 'quantity'))
+    journal = dict(StockMovement.objects.values_list('product_id').annotate(total=Sum('quantity')).order_by())
+    sold = dict(SaleItem.objects.filter(sale_id__in=sale_ids).values_list('product_id').annotate(total=Sum('quantity')).order_by())
+    returned = dict(
+        ReturnItem.objects.filter(return_instance_id__in=return_ids, return_instance__status=Return.Status.COMPLETED)
+        .values_list('product_id').annotate(total=Sum('quantity')).order_by()
+    )
+
+    for product_id, quantity in sorted(final.items()):
+        if quantity < 0:
+            violations.append(f'Produto {product_id}: estoque negativo ({quantity})')
+        if quantity != journal.get(product_id, 0):
+            violations.append(f'Produto {product_id}: estoque {quantity} difere do diário ({journal.get(product_id, 0)})')
+        expected = context['initial_stock'].get(product_id, 0) - sold.get(product_id, 0) + returned.get(product_id, 0)
+        if quantity != expected:
+            violations.append(f'Produto {product_id}: estoque {quantity}, esperado {expected} (atualização perdida)')
+
+    used = dict(
+        SalePayment.objects.filter(sale_id__in=sale_ids, payment_method__name=CREDIT_METHOD)
+        .values_list('sale__customer_id').annotate(total=Sum('amount_applied')).order_by()
+    )
+    granted = dict(
+        LedgerEntry.objects.filter(return_source__id__in=return_ids)
+        .values_list('customer_id').annotate(total=Sum('amount')).order_by()
+    )
+    for customer_id, amount in sorted(used.items()):
+        limit = context['initial_credit'].get(customer_id, Decimal('0')) + granted.get(customer_id, Decimal('0'))
+        if amount > limit:
+            violations.append(f'Cliente {customer_id}: usou R$ {amount} de crédito com R$ {limit} disponível')
+    return violations
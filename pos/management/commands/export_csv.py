@@ -0,0 +1,60 @@
+"""
+Exporta dados do PDV em CSV (uso típico: dump noturno no cron).
+
+    python manage.py export_csv sales --date-from 2025-01-01 --output vendas.csv
+    python manage.py export_csv items --yesterday --output-dir /backups/pdv
+    python manage.py export_csv ledger --filter status=open
+
+Os filtros são os mesmos das listagens (pos/filters.py).
+"""
+import os
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from pos.exports import EXPORTS, write_csv
+
+
+class Command(BaseCommand):
+    help = 'Exporta vendas, itens, pagamentos, lançamentos ou devoluções em CSV (streaming)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument('--date-from', help='Data inicial (AAAA-MM-DD)')
+        parser.add_argument('--date-to', help='Data final (AAAA-MM-DD)')
+        parser.add_argument('--yesterday', action='store_true',
+                            help='Exporta apenas o dia anterior (lançamentos não têm filtro de data)')
+        parser.add_argument('--filter', action='append', default=[], metavar='CAMPO=VALOR',
+                            help='Filtro adicional das listagens (pode repetir)')
+        parser.add_argument('--output', help='Arquivo de saída (padrão: stdout)')
+        parser.add_argument('--output-dir', help='Diretório de saída; o nome do arquivo inclui a data')
+
+    def handle(self, *args, **options):
+        params = {}
+        for item in options['filter']:
+            key, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f'Filtro inválido: "{item}" (use CAMPO=VALOR)')
+            params[key] = value
+
+        if options['yesterday']:
+            day = timezone.now().date() - timezone.timedelta(days=1)
+            # Devoluções filtram por data (created_at__date); vendas por data e hora.
+            params['date_from'] = str(day)
+            params['date_to'] = str(day) if options['kind'] == 'returns' else f'{day} 23:59:59'
+        if options['date_from']:
+            params['date_from'] = options['date_from']
+        if options['date_to']:
+            params['date_to'] = options['date_to']
+
+        path = options['output']
+        if options['output_dir']:
+            suffix = params.get('date_from', f'{timezone.now():%Y-%m-%d}')[:10]
+            path = os.path.join(options['output_dir'], f'{options["kind"]}-{suffix}.csv')
+
+        if not path:
+            write_csv(options['kind'], sys.stdout, params)
+            return
+
+        with open(path, 'w', newline='', encoding='utf-8') as stream:
+            count = write_csv(options['kind'], stream, params)
+        self.stderr.write(self.style.SUCCESS(f'{count} linhas exportadas para {path}'))
@@ -0,0 +1,153 @@
+"""
+Teste de carga do PDV com vários caixas simultâneos (ver pos/load_simulation.py).
+
+Cria um banco de teste novo, gera o catálogo e o histórico com
+app/synthetic.py e solta `--cashiers` threads fazendo vendas completas.
+Mostra vazão, percentis de latência por operação, falhas por bloqueio
+(database is locked, deadlock, serialização), que são repetidas com
+backoff como faria o terminal, e violações de consistência de estoque e
+crédito. Termina com erro se houver violação ou se menos de
+`--min-finalized` das vendas tentadas fecharem (sem vendas fechadas, a
+verificação de estoque não prova nada).
+
+    python manage.py pos_load_test --cashiers 20 --sales-per-cashier 25
+    DJANGO_ENV=prd python manage.py pos_load_test --cashiers 20   # PostgreSQL local
+
+No SQLite o banco de teste fica em arquivo temporário (e não em memória),
+para que as threads disputem o mesmo lock de escrita que os workers; os
+caches usam CACHE_MODE=file no mesmo diretório temporário.
+"""
+import json
+import os
+import tempfile
+from pathlib import Path
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from app import synthetic
+from app.caching import cache_config
+from pos import load_simulation, registry
+from pos.load_simulation import LoadPlan
+
+
+MAX_VIOLATIONS_LISTED = 20
+
+
+class Command(BaseCommand):
+    help = 'Simula vários caixas vendendo ao mesmo tempo e confere a consistência do estoque'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cashiers', type=int, default=10)
+        parser.add_argument('--sales-per-cashier', type=int, default=20)
+        parser.add_argument('--max-items', type=int, default=4)
+        parser.add_argument('--hot-products', type=int, default=10, help='Produtos disputados por todos os caixas')
+        parser.add_argument('--credit-rate', type=float, default=0.2, help='Fração das vendas que usa crédito')
+        parser.add_argument('--return-rate', type=float, default=0.05, help='Chance de devolução após cada venda')
+        parser.add_argument('--products', type=int, default=300)
+        parser.add_argument('--customers', type=int, default=100)
+        parser.add_argument('--history', type=int, default=500, help='Vendas sintéticas anteriores à carga')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--max-retries', type=int, default=8, help='Repetições por operação após bloqueio')
+        parser.add_argument('--min-finalized', type=float, default=0.8,
+                            help='Fração mínima das vendas tentadas que precisa fechar')
+        parser.add_argument('--output', help='Arquivo JSON com o relatório')
+
+    def handle(self, *args, **options):
+        plan = LoadPlan(
+            cashiers=options['cashiers'],
+            sales_per_cashier=options['sales_per_cashier'],
+            max_items=options['max_items'],
+            hot_products=options['hot_products'],
+            credit_rate=options['credit_rate'],
+            return_rate=options['return_rate'],
+            seed=options['seed'],
+            max_retries=options['max_retries'],
+        )
+        workdir = tempfile.mkdtemp(prefix='pos-load-')
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = os.path.join(workdir, 'load.sqlite3')
+
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with override_settings(CACHES=cache_config({'CACHE_MODE': 'file', 'CACHE_DIR': workdir}, settings.BASE_DIR)):
+                for alias in settings.CACHES:
+                    caches[alias].clear()
+                registry.clear()
+                synthetic.generate(products=options['products'], customers=options['customers'],
+                                   sales=options['history'], returns=0, ledger_entries=options['customers'],
+                                   seed=options['seed'])
+                vendor = connection.vendor
+                report = load_simulation.run(plan)
+        finally:
+            registry.clear()
+            teardown_databases(old_config, verbosity=0)
+
+        self._print(report, vendor)
+        if options['output']:
+            path = Path(options['output'])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(self._as_dict(report, vendor), indent=2, ensure_ascii=False) + '\n')
+            self.stdout.write(f'Relatório gravado em {path}')
+
+        if report.violations:
+            raise CommandError(f'{len(report.violations)} violações de consistência')
+        if report.finalized_rate < options['min_finalized']:
+            raise CommandError(
+                f'Só {len(report.sale_ids)} de {report.attempted} vendas finalizadas '
+                f'({report.finalized_rate:.0%}, mínimo {options["min_finalized"]:.0%})'
+            )
+
+    def _as_dict(self, report, vendor):
+        return {
+            'database': vendor,
+            'plan': vars(report.plan),
+            'elapsed_seconds': round(report.elapsed_seconds, 3),
+            'attempted': report.attempted,
+            'finalized': len(report.sale_ids),
+            'finalized_rate': round(report.finalized_rate, 3),
+            'returns': len(report.return_ids),
+            'throughput': round(report.throughput, 2),
+            'failures': dict(report.failures),
+            'retries': dict(report.retries),
+            'samples': report.samples,
+            'latency': report.summary(),
+            'violations': report.violations,
+        }
+
+    def _print(self, report, vendor):
+        plan = report.plan
+        self.stdout.write(
+            f'{vendor}: {plan.cashiers} caixas, {report.attempted} vendas tentadas em {report.elapsed_seconds:.2f}s'
+        )
+        self.stdout.write(
+            f'Finalizadas: {len(report.sale_ids)} ({report.finalized_rate:.0%}, {report.throughput:.1f} vendas/s), '
+            f'devoluções: {len(report.return_ids)}'
+        )
+        self.stdout.write(f'{"Operação":<14} {"qtd":>6} {"média":>9} {"p50":>9} {"p95":>9} {"p99":>9} {"máx":>9}')
+        for name, row in report.summary().items():
+            self.stdout.write(
+                f'{name:<14} {row["count"]:>6} {row["mean_ms"]:>9.2f} {row["p50_ms"]:>9.2f} '
+                f'{row["p95_ms"]:>9.2f} {row["p99_ms"]:>9.2f} {row["max_ms"]:>9.2f}'
+            )
+
+        retries = ', '.join(f'{name}: {count}' for name, count in sorted(report.retries.items()))
+        self.stdout.write(f'Repetições após bloqueio: {sum(report.retries.values())}' + (f' ({retries})' if retries else ''))
+
+        labels = {'lock': 'Bloqueio/deadlock', 'rejected': 'Recusadas (negócio)', 'error': 'Erros'}
+        for kind, label in labels.items():
+            count = report.failures.get(kind, 0)
+            line = f'{label}: {count}'
+            if count:
+                line += f' (ex.: {report.samples[kind][:200]})'
+            self.stdout.write(self.style.WARNING(line) if count else line)
+
+        if report.violations:
+            self.stdout.write(self.style.ERROR(f'Violações de consistência: {len(report.violations)}'))
+            for violation in report.violations[:MAX_VIOLATIONS_LISTED]:
+                self.stdout.write(self.style.ERROR(f'  {violation}'))
+        elif not report.sale_ids:
+            self.stdout.write(self.style.WARNING('Nenhuma venda finalizada: consistência não verificada.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Estoque e crédito consistentes.'))
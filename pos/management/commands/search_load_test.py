@@ -0,0 +1,116 @@
+"""
+Teste de carga das buscas do PDV (produtos e clientes).
+
+Simula uma sessão típica de caixa digitando nos seletores de produto e de
+cliente e conta quantas consultas ao banco o servidor executa, sem cache e
+com o cache de buscas. Os dados sintéticos são criados dentro de uma
+transação desfeita ao final.
+
+    python manage.py search_load_test --sessions 20
+"""
+import random
+import time
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from app import caching
+from brands.models import Brand
+from categories.models import Category
+from customers.models import Customer
+from products.models import Product
+
+
+PRODUCT_WORDS = ['Camiseta', 'Calça', 'Bermuda', 'Boné', 'Meia', 'Tênis', 'Jaqueta', 'Vestido', 'Saia', 'Blusa']
+CUSTOMER_NAMES = ['Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Heitor', 'Isabela', 'João']
+
+DUMMY_CACHE = {alias: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'} for alias in caching.ALIASES}
+LOCAL_CACHE = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'search-load-test-{alias}'}
+    for alias in caching.ALIASES
+}
+
+
+class Command(BaseCommand):
+    help = 'Compara consultas ao banco das buscas do PDV com e sem cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=20)
+        parser.add_argument('--searches', type=int, default=15, help='Buscas por sessão')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self._populate()
+            requests = self._build_session_requests(options['sessions'], options['searches'], options['seed'])
+
+            self.stdout.write(f'{len(requests)} requisições de busca simuladas')
+            self.stdout.write(f'{"Modo":<12} {"consultas":>10} {"de busca":>10} {"tempo (s)":>10}')
+
+            results = {}
+            for label, caches in (('sem cache', DUMMY_CACHE), ('com cache', LOCAL_CACHE)):
+                with override_settings(CACHES=caches):
+                    queries, search_queries, elapsed = self._run(user, requests)
+                results[label] = search_queries
+                self.stdout.write(f'{label:<12} {queries:>10} {search_queries:>10} {elapsed:>10.2f}')
+
+            saved = results['sem cache'] - results['com cache']
+            self.stdout.write(self.style.SUCCESS(
+                f'{saved} consultas de busca a menos ({saved * 100 / results["sem cache"]:.0f}%) com cache.'
+            ))
+            transaction.set_rollback(True)
+
+    def _populate(self):
+        category = Category.objects.create(name='Carga')
+        brand = Brand.objects.create(name='Carga')
+        Product.objects.bulk_create([
+            Product(
+                title=f'{word} {size} {i}',
+                category=category,
+                brand=brand,
+                serie_number=f'7890{i:06d}',
+                cost_price=Decimal('10.00'),
+                selling_price=Decimal('20.00'),
+                quantity=10,
+            )
+            for i, (word, size) in enumerate((w, s) for w in PRODUCT_WORDS for s in ('P', 'M', 'G', 'GG') * 50)
+        ])
+        Customer.objects.bulk_create([
+            Customer(
+                full_name=f'{name} Carga {i}',
+                phone=f'11{980000000 + i:09d}',
+                phone_digits=f'11{980000000 + i:09d}',
+            )
+            for i, name in enumerate(CUSTOMER_NAMES * 200)
+        ])
+        return User.objects.create_user(username='search-load-test', password='load-test')
+
+    def _build_session_requests(self, sessions, searches, seed):
+        """Gera as URLs que o PDV dispara: cada tecla a partir do 2º caractere."""
+        rng = random.Random(seed)
+        requests = []
+        for _ in range(sessions):
+            for _ in range(searches):
+                if rng.random() < 0.8:
+                    url, term = '/api/v1/products/', rng.choice(PRODUCT_WORDS)
+                else:
+                    url, term = '/api/v1/customers/', rng.choice(CUSTOMER_NAMES)
+                for length in range(2, len(term) + 1):
+                    requests.append((url, term[:length]))
+        return requests
+
+    def _run(self, user, requests):
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(user)
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as context:
+            for url, term in requests:
+                client.get(url, {'search': term})
+        elapsed = time.perf_counter() - start
+        search_queries = [
+            query for query in context.captured_queries
+            if 'products_product' in query['sql'] or 'customers_customer' in query['sql']
+        ]
+        return len(context.captured_queries), len(search_queries), elapsed
@@ -0,0 +1,93 @@
+"""
+Compara a latência do add-item/ do PDV com cada engine de sessão.
+
+Para cada engine (db, cached_db, cache), faz login, abre o PDV e dispara
+`--requests` chamadas de add-item/, medindo o tempo por requisição e as
+consultas à tabela django_session. Os dados são criados dentro de uma
+transação desfeita ao final.
+
+    python manage.py session_benchmark --requests 300
+"""
+import json
+import statistics
+import time
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from brands.models import Brand
+from categories.models import Category
+from products.models import Product
+
+
+ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+}
+
+
+class Command(BaseCommand):
+    help = 'Compara a latência do add-item/ do PDV com sessões no banco e no cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user, product = self._populate()
+
+            self.stdout.write(f'{options["requests"]} chamadas de add-item/ por engine')
+            self.stdout.write(f'{"Engine":<12} {"média (ms)":>12} {"p95 (ms)":>10} {"consultas":>10} {"django_session":>15}')
+
+            results = {}
+            for label, engine in ENGINES.items():
+                with override_settings(SESSION_ENGINE=engine):
+                    results[label] = self._run(user, product, options['requests'], options['warmup'])
+                mean, p95, queries, session_queries = results[label]
+                self.stdout.write(f'{label:<12} {mean:>12.3f} {p95:>10.3f} {queries:>10.1f} {session_queries:>15.1f}')
+
+            base, cached = results['db'][0], results['cached_db'][0]
+            self.stdout.write(self.style.SUCCESS(
+                f'cached_db: {base - cached:.3f} ms a menos por add-item/ ({(base - cached) * 100 / base:.0f}%)'
+            ))
+            transaction.set_rollback(True)
+
+    def _populate(self):
+        product = Product.objects.create(
+            title='Produto Benchmark Sessão',
+            category=Category.objects.create(name='Benchmark Sessão'),
+            brand=Brand.objects.create(name='Benchmark Sessão'),
+            serie_number='7899999000001',
+            cost_price=Decimal('10.00'),
+            selling_price=Decimal('20.00'),
+            quantity=1_000_000,
+        )
+        return User.objects.create_user(username='session-benchmark', password='session-benchmark'), product
+
+    def _run(self, user, product, requests, warmup):
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(user)
+        client.get('/pos/')
+        body = json.dumps({'product_id': product.id, 'quantity': 1})
+
+        for _ in range(warmup):
+            client.post('/pos/add-item/', body, content_type='application/json')
+
+        timings = []
+        with CaptureQueriesContext(connection) as context:
+            for _ in range(requests):
+                started = time.perf_counter()
+                client.post('/pos/add-item/', body, content_type='application/json')
+                timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        session_queries = [query for query in context.captured_queries if 'django_session' in query['sql']]
+        return (
+            statistics.fmean(timings),
+            timings[int(len(timings) * 0.95)],
+            len(context.captured_queries) / requests,
+            len(session_queries) / requests,
+        )
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.1 on 2026-10-18 23:58
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def backfill_max_customer_fee_pct(apps, schema_editor):
+    Sale = apps.get_model('pos', 'Sale')
+    SalePayment = apps.get_model('pos', 'SalePayment')
+    rows = (
+        SalePayment.objects.filter(payment_method__fee_payer='customer', payment_method__fee_percentage__gt=0)
+        .values('sale_id')
+        .annotate(max_fee=Max('payment_method__fee_percentage'))
+    )
+    batch = []
+    for row in rows.iterator(chunk_size=2000):
+        batch.append(Sale(pk=row['sale_id'], max_customer_fee_pct=row['max_fee']))
+        if len(batch) >= 2000:
+            Sale.objects.bulk_update(batch, ['max_customer_fee_pct'])
+            batch = []
+    if batch:
+        Sale.objects.bulk_update(batch, ['max_customer_fee_pct'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos', '0004_paymentmethod_is_internal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sale',
+            name='max_customer_fee_pct',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), help_text='Calculada em recalc_totals() a cada alteração de pagamentos', max_digits=5, verbose_name='Maior taxa paga pelo cliente (%)'),
+        ),
+        migrations.RunPython(backfill_max_customer_fee_pct, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-19 00:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos', '0005_sale_max_customer_fee_pct'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaleReceipt',
+            fields=[
+                ('sale', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='receipt', serialize=False, to='pos.sale', verbose_name='Venda')),
+                ('html', models.TextField(verbose_name='HTML do recibo')),
+                ('text', models.TextField(verbose_name='Texto para impressora térmica')),
+                ('etag', models.CharField(max_length=64, verbose_name='ETag')),
+                ('rendered_at', models.DateTimeField(verbose_name='Emitido em')),
+            ],
+            options={
+                'verbose_name': 'Recibo',
+                'verbose_name_plural': 'Recibos',
+            },
+        ),
+    ]
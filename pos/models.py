@@ -9,6 +9,17 @@ from products.models import Product
 TWO_PLACES = Decimal('0.01')
 
 
+def calculate_fee_total(subtotal: Decimal, discount_total: Decimal, fee_percentage: Decimal) -> Decimal:
+    """Calcula a taxa paga pelo cliente sobre o valor base (subtotal - desconto)."""
+    base_value = (subtotal - discount_total).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
+    base_value = max(Decimal('0'), base_value)
+
+    if fee_percentage > 0 and base_value > 0:
+        return (base_value * (fee_percentage / 100)).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
+
+    return Decimal('0')
+
+
 class PaymentMethod(models.Model):
     """Método de pagamento com taxa/desconto configurável."""
     
@@ -132,6 +143,13 @@ class Sale(models.Model):
         default=Decimal('0'),
         validators=[MinValueValidator(Decimal('0'))]
     )
+    max_customer_fee_pct = models.DecimalField(
+        'Maior taxa paga pelo cliente (%)',
+        max_digits=5,
+        decimal_places=2,
+        default=Decimal('0'),
+        help_text='Calculada em recalc_totals() a cada alteração de pagamentos'
+    )
     
     # Metadados
     notes = models.TextField('Observações', blank=True)
@@ -161,26 +179,10 @@ class Sale(models.Model):
         """Retorna o total de taxas aplicadas aos pagamentos (acréscimos do cliente).
 
         A taxa é calculada UMA VEZ sobre o valor base da venda (subtotal - desconto)
-        usando a maior porcentagem entre os métodos de pagamento que cobram o cliente.
-        Isso mantém consistência com `recalc_totals()` e evita recursão quando o
-        valor do pagamento já inclui a taxa.
+        usando a maior porcentagem entre os métodos de pagamento que cobram o cliente,
+        armazenada em `max_customer_fee_pct` por `recalc_totals()`.
         """
-        # Valor base (subtotal - desconto)
-        base_value = (self.subtotal - self.discount_total).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
-        base_value = max(Decimal('0'), base_value)
-
-        # Encontra a maior taxa entre os métodos de pagamento que cobram o cliente
-        max_fee_percentage = Decimal('0')
-        for payment in self.payments.select_related('payment_method').all():
-            if payment.payment_method.fee_payer == PaymentMethod.FeePayerType.CUSTOMER:
-                if payment.payment_method.fee_percentage > max_fee_percentage:
-                    max_fee_percentage = payment.payment_method.fee_percentage
-
-        if max_fee_percentage > 0 and base_value > 0:
-            fee_total = (base_value * (max_fee_percentage / 100)).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
-            return fee_total
-
-        return Decimal('0')
+        return calculate_fee_total(self.subtotal, self.discount_total, self.max_customer_fee_pct)
     
     @property
     def change_total(self) -> Decimal:
@@ -554,3 +556,28 @@ class ReturnItem(models.Model):
         )
         super().save(*args, **kwargs)
 
+
+class SaleReceipt(models.Model):
+    """Recibo não-fiscal renderizado uma única vez, na finalização da venda.
+
+    Reimpressões servem o conteúdo gravado (ver pos/receipts.py); `etag` é o
+    hash do conteúdo, usado nas requisições condicionais.
+    """
+    sale = models.OneToOneField(
+        Sale,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='receipt',
+        verbose_name='Venda'
+    )
+    html = models.TextField('HTML do recibo')
+    text = models.TextField('Texto para impressora térmica')
+    etag = models.CharField('ETag', max_length=64)
+    rendered_at = models.DateTimeField('Emitido em')
+
+    class Meta:
+        verbose_name = 'Recibo'
+        verbose_name_plural = 'Recibos'
+
+    def __str__(self) -> str:
+        return f'Recibo da venda #{self.sale_id}'
@@ -0,0 +1,165 @@
+"""
+Recibos não-fiscais gravados na finalização da venda.
+
+O recibo é renderizado uma única vez (HTML do corpo e texto de 48 colunas
+para impressora térmica de 80 mm) e guardado em SaleReceipt. Reimpressões
+e o lote de fim do dia só leem o conteúdo gravado, sem consultar itens e
+pagamentos de novo; vendas finalizadas antes disso ganham o recibo na
+primeira impressão.
+
+Funções disponíveis:
+- render_text(): Recibo em texto monoespaçado
+- store_receipt(): Renderiza e grava o recibo de uma venda (idempotente)
+- store_after_commit(): Agenda store_receipt() para o commit da finalização
+- store_missing(): Grava em lote os recibos que faltam em um conjunto de vendas
+- page_parts(): Cabeçalho e rodapé da página HTML que envolve os recibos
+"""
+import hashlib
+import logging
+import textwrap
+from typing import Iterable, Tuple
+from django.db import IntegrityError, transaction
+from django.template.loader import render_to_string
+from django.utils import formats, timezone
+from .models import Sale, SaleReceipt
+
+
+logger = logging.getLogger(__name__)
+
+TEXT_WIDTH = 48
+# Separa os recibos no lote em texto (avança o papel na maioria dos drivers)
+TEXT_SEPARATOR = '\n\n\n\f'
+BODY_MARKER = '@@RECIBOS@@'
+RECEIPT_STATUSES = [Sale.Status.FINALIZED, Sale.Status.PARTIALLY_RETURNED, Sale.Status.FULLY_RETURNED]
+BATCH_SIZE = 200
+
+
+def _money(value) -> str:
+    return f'R$ {formats.number_format(value, 2)}'
+
+
+def _pair(left: str, right: str, indent: int = 0) -> str:
+    left = ' ' * indent + left
+    room = TEXT_WIDTH - len(right) - 1
+    return f'{left[:room]:<{room}} {right}'
+
+
+def _center(value: str) -> str:
+    return value[:TEXT_WIDTH].center(TEXT_WIDTH).rstrip()
+
+
+def render_text(sale: Sale, rendered_at) -> str:
+    """Recibo em texto de TEXT_WIDTH colunas, com os mesmos dados do HTML."""
+    rule, double = '-' * TEXT_WIDTH, '=' * TEXT_WIDTH
+    seller = sale.user.get_full_name() or sale.user.username
+    lines = [
+        _center('PINKMANIA'),
+        _center('Sistema de Gestão de Vendas'),
+        _center('*** RECIBO NÃO FISCAL ***'),
+        rule,
+        _pair('Venda:', f'#{sale.pk}'),
+        _pair('Data:', formats.date_format(timezone.template_localtime(sale.finalized_at), 'd/m/Y H:i')),
+        _pair('Cliente:', sale.customer.full_name[:TEXT_WIDTH - 10]),
+    ]
+    if sale.customer.phone:
+        lines.append(_pair('Telefone:', sale.customer.formatted_phone))
+    lines += [_pair('Vendedor:', seller[:TEXT_WIDTH - 11]), rule, 'ITENS DA VENDA']
+
+    for item in sale.items.all():
+        lines += textwrap.wrap(item.product.title, TEXT_WIDTH) or ['']
+        lines.append(_pair(f'{item.quantity} x {_money(item.unit_price)}', _money(item.line_total), indent=2))
+
+    lines += [rule, _pair('Subtotal:', _money(sale.subtotal))]
+    if sale.discount_total > 0:
+        lines.append(_pair('Descontos:', f'- {_money(sale.discount_total)}'))
+    fee_total = sale.fee_total
+    if fee_total > 0:
+        lines.append(_pair('Taxas:', f'+ {_money(fee_total)}'))
+    lines += [_pair('TOTAL:', _money(sale.total)), rule, 'PAGAMENTOS']
+
+    for payment in sale.payments.all():
+        lines.append(_pair(payment.payment_method.name, _money(payment.amount_applied)))
+        if payment.change_given > 0:
+            lines.append(_pair('Troco:', _money(payment.change_given), indent=2))
+    lines += [
+        _pair('Total Pago:', _money(sale.total_paid)),
+        double,
+        _center('Obrigado pela preferência!'),
+        _center(f'Emitido em: {formats.date_format(timezone.template_localtime(rendered_at), "d/m/Y H:i:s")}'),
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def _build(sale: Sale) -> SaleReceipt:
+    rendered_at = timezone.now()
+    html = render_to_string('pos/_receipt.html', {'sale': sale, 'rendered_at': rendered_at})
+    text = render_text(sale, rendered_at)
+    etag = hashlib.sha256(f'{html}\0{text}'.encode()).hexdigest()[:32]
+    return SaleReceipt(sale=sale, html=html, text=text, etag=etag, rendered_at=rendered_at)
+
+
+def _receipt_queryset():
+    return Sale.objects.select_related('customer', 'user').prefetch_related('items__product', 'payments__payment_method')
+
+
+def store_receipt(sale_id: int) -> SaleReceipt:
+    """Renderiza e grava o recibo da venda; se já existir, devolve o gravado."""
+    existing = SaleReceipt.objects.filter(sale_id=sale_id).first()
+    if existing:
+        return existing
+    receipt = _build(_receipt_queryset().get(pk=sale_id))
+    try:
+        with transaction.atomic():
+            receipt.save(force_insert=True)
+    except IntegrityError:
+        # Outra requisição gravou primeiro: o recibo é imutável, vale o dela
+        return SaleReceipt.objects.get(sale_id=sale_id)
+    return receipt
+
+
+def store_after_commit(sale_id: int) -> None:
+    """Grava o recibo depois do commit da finalização. Uma falha só vai para o
+    log: o recibo é gerado na primeira impressão."""
+    def store():
+        try:
+            store_receipt(sale_id)
+        except Exception:
+            logger.exception('Falha ao gravar o recibo da venda #%s', sale_id)
+
+    transaction.on_commit(store)
+
+
+def store_missing(sales) -> int:
+    """Grava os recibos que faltam entre as vendas do queryset `sales`.
+
+    As vendas sem recibo são carregadas em blocos com os itens e pagamentos
+    pré-carregados (número fixo de consultas por bloco) e gravadas com
+    bulk_create. Retorna quantos recibos foram criados.
+    """
+    missing = list(sales.filter(receipt__isnull=True, status__in=RECEIPT_STATUSES).values_list('id', flat=True))
+    created = 0
+    for start in range(0, len(missing), BATCH_SIZE):
+        chunk = _receipt_queryset().filter(pk__in=missing[start:start + BATCH_SIZE]).order_by('id')
+        created += len(SaleReceipt.objects.bulk_create([_build(sale) for sale in chunk], ignore_conflicts=True))
+    return created
+
+
+def page_parts(title: str) -> Tuple[str, str]:
+    """Cabeçalho e rodapé da página (estilos, botão de impressão) que envolvem
+    um ou mais corpos de recibo gravados."""
+    head, tail = render_to_string('pos/receipt.html', {'title': title, 'body': BODY_MARKER}).split(BODY_MARKER)
+    return head, tail
+
+
+def stream_html(title: str, bodies: Iterable[str]) -> Iterable[str]:
+    head, tail = page_parts(title)
+    yield head
+    yield from bodies
+    yield tail
+
+
+def stream_text(texts: Iterable[str]) -> Iterable[str]:
+    for index, text in enumerate(texts):
+        if index:
+            yield TEXT_SEPARATOR
+        yield text
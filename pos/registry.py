@@ -0,0 +1,78 @@
+"""
+Registro em memória de consultas constantes do PDV.
+
+Guarda no processo valores que quase nunca mudam (cliente genérico, métodos
+de pagamento ativos) para tirá-los do caminho de cada requisição.
+
+- Valores só são guardados depois do commit: uma leitura feita dentro de uma
+  transação que acaba desfeita nunca fica no registro.
+- A invalidação limpa o processo atual e incrementa uma geração no cache hot
+  (app/caching.py), que os demais processos comparam antes de usar o valor
+  local (com o atraso máximo do L1, CACHE_L1_TIMEOUT).
+- REGISTRY_TTL limita o tempo máximo de um valor desatualizado caso o cache
+  não seja compartilhado entre processos.
+"""
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict
+from django.db import connection, transaction
+from app.caching import hot_cache
+
+
+REGISTRY_TTL = 300
+
+GENERIC_CUSTOMER = 'generic_customer'
+PAYMENT_METHODS = 'payment_methods'
+FEE_RULES = 'fee_rules'
+
+
+@dataclass(frozen=True)
+class _Entry:
+    generation: int
+    expires_at: float
+    value: Any
+
+
+_entries: Dict[str, _Entry] = {}
+
+
+def _generation_key(name: str) -> str:
+    return f'pos:registry:{name}:generation'
+
+
+def _store(name: str, entry: _Entry) -> None:
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _entries.__setitem__(name, entry))
+    else:
+        _entries[name] = entry
+
+
+def get(name: str, loader: Callable[[], Any]) -> Any:
+    """Retorna o valor registrado ou carrega com `loader`."""
+    generation = hot_cache.get(_generation_key(name), 0)
+    entry = _entries.get(name)
+    if entry and entry.generation == generation and entry.expires_at > time.monotonic():
+        return entry.value
+
+    value = loader()
+    _store(name, _Entry(generation, time.monotonic() + REGISTRY_TTL, value))
+    return value
+
+
+def _bump_generation(name: str) -> None:
+    _entries.pop(name, None)
+    try:
+        hot_cache.incr(_generation_key(name))
+    except ValueError:
+        hot_cache.set(_generation_key(name), 1, None)
+
+
+def invalidate(name: str) -> None:
+    """Descarta o valor registrado (neste e, via cache, nos demais processos)."""
+    _entries.pop(name, None)
+    transaction.on_commit(lambda: _bump_generation(name))
+
+
+def clear() -> None:
+    """Limpa todo o registro do processo atual."""
+    _entries.clear()
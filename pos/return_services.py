@@ -9,7 +9,9 @@ from django.utils import timezone
 from django.contrib.auth.models import User
 
 from .models import Sale, SaleItem, Return, ReturnItem, LedgerEntry, TWO_PLACES
-from products.models import Product
+from products.models import Product, StockMovement
+from products import valuation
+from products.stock import post_movements
 from customers.models import Customer
 
 
@@ -243,11 +245,13 @@ def complete_return(return_instance: Return) -> Return:
             f'Status atual: {return_instance.get_status_display()}'
         )
     
-    # Atualizar estoque dos produtos devolvidos
-    for return_item in return_instance.items.all():
-        product = return_item.product
-        product.quantity += return_item.quantity
-        product.save(update_fields=['quantity'])
+    # Atualizar custo médio (volta pelo custo da venda), estoque e diário de movimentos
+    returned = list(return_instance.items.values_list('product_id', 'quantity', 'sale_item__unit_cost'))
+    post_movements(
+        StockMovement.Kind.RETURN,
+        [(product_id, quantity, return_instance.pk) for product_id, quantity, _ in returned],
+        average_costs=valuation.receive(returned),
+    )
     
     # Gerar lançamento de crédito (apenas se método for 'credit' ou ainda não foi reembolsado)
     if return_instance.refund_method == Return.RefundMethod.CREDIT:
@@ -4,21 +4,25 @@ Funções puras que realizam operações e cálculos independentes de views.
 """
 from decimal import Decimal, ROUND_HALF_UP
 from django.db import transaction
-from django.db.models import Sum
+from django.db.models import OuterRef, Subquery, Sum
 from django.utils import timezone
-from typing import Optional, Dict, Any
-from .models import Sale, SaleItem, SalePayment, LedgerEntry, PaymentMethod
+from typing import Optional, Dict, Any, List
+from . import receipts, registry
+from .models import Sale, SaleItem, SalePayment, LedgerEntry, PaymentMethod, calculate_fee_total
 from customers.models import Customer
-from products.models import Product
+from products.models import Product, StockMovement
+from products.stock import post_movements
+from products.valuation import unit_cost_expression
 
 
 TWO_PLACES = Decimal('0.01')
 
+GENERIC_CUSTOMER_PHONE = '00000000000'
 
-def get_or_create_generic_customer() -> Customer:
-    """Retorna ou cria o cliente genérico do sistema."""
+
+def _load_generic_customer() -> Customer:
     customer, created = Customer.objects.get_or_create(
-        phone='00000000000',
+        phone=GENERIC_CUSTOMER_PHONE,
         defaults={
             'full_name': 'Cliente Genérico',
             'is_generic': True,
@@ -30,6 +34,52 @@ def get_or_create_generic_customer() -> Customer:
     return customer
 
 
+def get_or_create_generic_customer() -> Customer:
+    """Retorna ou cria o cliente genérico do sistema (mantido no registro do processo)."""
+    return registry.get(registry.GENERIC_CUSTOMER, _load_generic_customer)
+
+
+def get_active_payment_methods() -> List[PaymentMethod]:
+    """Retorna os métodos de pagamento ativos disponíveis no caixa (não internos)."""
+    return registry.get(
+        registry.PAYMENT_METHODS,
+        lambda: list(PaymentMethod.objects.filter(is_active=True, is_internal=False)),
+    )
+
+
+def _load_fee_rules() -> Dict[int, Decimal]:
+    return {
+        pk: (fee_percentage if fee_payer == PaymentMethod.FeePayerType.CUSTOMER else Decimal('0'))
+        for pk, fee_percentage, fee_payer in PaymentMethod.objects.values_list('id', 'fee_percentage', 'fee_payer')
+    }
+
+
+def get_fee_rules() -> Dict[int, Decimal]:
+    """Retorna {payment_method_id: percentual de acréscimo pago pelo cliente}."""
+    return registry.get(registry.FEE_RULES, _load_fee_rules)
+
+
+def get_max_customer_fee_pct(payment_method_ids) -> Decimal:
+    """Retorna a maior taxa paga pelo cliente entre os métodos informados."""
+    payment_method_ids = set(payment_method_ids)
+    if not payment_method_ids:
+        return Decimal('0')
+
+    rules = get_fee_rules()
+    if not payment_method_ids.issubset(rules):
+        # Método criado depois do carregamento da tabela: busca direto no banco
+        rules = _load_fee_rules()
+
+    return max((rules.get(pk, Decimal('0')) for pk in payment_method_ids), default=Decimal('0'))
+
+
+def warm_registry() -> None:
+    """Carrega no registro os valores constantes usados pelo PDV."""
+    get_or_create_generic_customer()
+    get_active_payment_methods()
+    get_fee_rules()
+
+
 def get_or_create_draft_sale(user, session_key: str, customer: Optional[Customer] = None) -> Sale:
     """
     Retorna a venda em rascunho do usuário ou cria uma nova.
@@ -93,7 +143,7 @@ def add_item(sale: Sale, product_id: int, quantity: int) -> SaleItem:
             product=product,
             quantity=quantity,
             unit_price=product.selling_price or Decimal('0'),
-            unit_cost=product.cost_price or Decimal('0')
+            unit_cost=(product.cost_price if product.average_cost is None else product.average_cost) or Decimal('0')
         )
     
     recalc_totals(sale)
@@ -245,7 +295,7 @@ def cancel_sale(sale: Sale) -> Sale:
 def recalc_totals(sale: Sale) -> Sale:
     """
     Recalcula todos os totais da venda baseado nos itens e pagamentos.
-    Atualiza: subtotal, total, total_paid.
+    Atualiza: subtotal, total, total_paid, max_customer_fee_pct.
     NÃO altera discount_total (apenas em finalize).
     
     O total considera:
@@ -262,39 +312,26 @@ def recalc_totals(sale: Sale) -> Sale:
         Decimal('0')
     )
     
-    # Valor base para cálculo de taxas (subtotal - desconto)
-    base_value = (subtotal - sale.discount_total).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
-    base_value = max(Decimal('0'), base_value)
+    # Uma única consulta aos pagamentos: método (para a taxa) e valor aplicado
+    payments = list(sale.payments.values_list('payment_method_id', 'amount_applied'))
     
     # Calcula taxas de pagamento pagas pelo cliente
     # A taxa é aplicada UMA VEZ sobre o valor base, usando a maior taxa dentre os métodos
-    fee_total = Decimal('0')
-    max_fee_percentage = Decimal('0')
-    
-    for payment in sale.payments.select_related('payment_method').all():
-        if payment.payment_method.fee_payer == PaymentMethod.FeePayerType.CUSTOMER:
-            # Encontra a maior taxa
-            if payment.payment_method.fee_percentage > max_fee_percentage:
-                max_fee_percentage = payment.payment_method.fee_percentage
-    
-    # Aplica a maior taxa sobre o valor base
-    if max_fee_percentage > 0 and base_value > 0:
-        fee_total = (base_value * (max_fee_percentage / 100)).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
+    max_fee_percentage = get_max_customer_fee_pct(pk for pk, _ in payments)
+    fee_total = calculate_fee_total(subtotal, sale.discount_total, max_fee_percentage)
     
     # Total = subtotal - desconto + taxa
     total = (subtotal - sale.discount_total + fee_total).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
     total = max(Decimal('0'), total)
     
     # Total pago = soma dos pagamentos aplicados
-    total_paid = sum(
-        (payment.amount_applied for payment in sale.payments.all()),
-        Decimal('0')
-    )
+    total_paid = sum((amount for _, amount in payments), Decimal('0'))
     
     sale.subtotal = subtotal
     sale.total = total
     sale.total_paid = total_paid
-    sale.save(update_fields=['subtotal', 'total', 'total_paid'])
+    sale.max_customer_fee_pct = max_fee_percentage
+    sale.save(update_fields=['subtotal', 'total', 'total_paid', 'max_customer_fee_pct'])
     
     return sale
 
@@ -406,11 +443,19 @@ def finalize_sale(sale: Sale, resolution: Optional[str] = None) -> Dict[str, Any
     # Liquida créditos usados na venda
     settle_credit_after_sale(sale)
     
-    # Atualiza o estoque dos produtos (debita as quantidades vendidas)
-    for item in sale.items.select_related('product'):
-        product = item.product
-        product.quantity -= item.quantity
-        product.save(update_fields=['quantity'])
+    # Custo dos itens = custo médio vigente na finalização
+    sale.items.update(unit_cost=Subquery(
+        Product.objects.filter(pk=OuterRef('product_id')).values(cost=unit_cost_expression())[:1]
+    ))
+
+    # Atualiza o estoque dos produtos (debita as quantidades vendidas) e o diário
+    post_movements(StockMovement.Kind.SALE, [
+        (product_id, -quantity, sale.pk)
+        for product_id, quantity in sale.items.values_list('product_id', 'quantity')
+    ])
+
+    # Recibo renderizado uma vez, após o commit (pos/receipts.py)
+    receipts.store_after_commit(sale.pk)
     
     return {'status': 'success', 'sale_id': sale.pk}
 
@@ -0,0 +1,40 @@
+from django.core.signals import request_started
+from django.db import connection
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from customers.models import Customer
+from . import registry
+from .models import PaymentMethod
+from .services import GENERIC_CUSTOMER_PHONE, warm_registry
+
+
+@receiver(post_save, sender=PaymentMethod)
+@receiver(post_delete, sender=PaymentMethod)
+def invalidate_payment_methods(sender, instance, **kwargs):
+    registry.invalidate(registry.PAYMENT_METHODS)
+    registry.invalidate(registry.FEE_RULES)
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def invalidate_generic_customer(sender, instance, created=False, **kwargs):
+    # Na criação não há valor anterior no registro (o telefone é único)
+    if created:
+        return
+    if instance.is_generic or instance.phone == GENERIC_CUSTOMER_PHONE:
+        registry.invalidate(registry.GENERIC_CUSTOMER)
+
+
+@receiver(request_started, dispatch_uid='pos_warm_registry')
+def warm_registry_on_startup(sender, **kwargs):
+    """Aquece o registro assim que o processo começa a atender e se desconecta."""
+    if connection.in_atomic_block:
+        # Dentro de transação (ex.: testes) nada seria guardado no registro
+        return
+
+    request_started.disconnect(warm_registry_on_startup, dispatch_uid='pos_warm_registry')
+    try:
+        warm_registry()
+    except Exception:
+        # Banco indisponível ou sem migrações: o registro carrega sob demanda
+        pass
@@ -410,23 +410,219 @@ document.addEventListener('DOMContentLoaded', function() {
     });
   }
   
+  // Catálogo local de produtos (IndexedDB)
+  // Baixa o snapshot compacto uma vez e depois apenas os deltas desde a última
+  // versão, permitindo buscar produtos sem ir ao servidor a cada tecla.
+  const CATALOG_URL = '/api/v1/products/catalog/';
+  const CATALOG_DB = 'pos-catalog';
+  const CATALOG_REFRESH_MS = 60000;
+  const productCatalog = {
+    db: null,
+    version: 0,
+    etag: null,
+    products: new Map(),
+    ready: false,
+  };
+
+  function normalizeSearchText(value) {
+    return String(value || '')
+      .normalize('NFD')
+      .replace(/[\u0300-\u036f]/g, '')
+      .toLowerCase();
+  }
+
+  function catalogRowToProduct(fields, row) {
+    const product = {};
+    fields.forEach((field, index) => { product[field] = row[index]; });
+    product.selling_price = product.price;
+    product.serie_number = product.code;
+    product.search_text = normalizeSearchText(`${product.title} ${product.code}`);
+    return product;
+  }
+
+  function openCatalogDb() {
+    return new Promise((resolve, reject) => {
+      if (!window.indexedDB) {
+        reject(new Error('IndexedDB indisponível'));
+        return;
+      }
+      const request = window.indexedDB.open(CATALOG_DB, 1);
+      request.onupgradeneeded = () => {
+        const db = request.result;
+        db.createObjectStore('products', { keyPath: 'id' });
+        db.createObjectStore('meta');
+      };
+      request.onsuccess = () => resolve(request.result);
+      request.onerror = () => reject(request.error);
+    });
+  }
+
+  function idbRequest(request) {
+    return new Promise((resolve, reject) => {
+      request.onsuccess = () => resolve(request.result);
+      request.onerror = () => reject(request.error);
+    });
+  }
+
+  async function loadCatalogFromDb() {
+    const tx = productCatalog.db.transaction(['products', 'meta'], 'readonly');
+    const [products, version, etag] = await Promise.all([
+      idbRequest(tx.objectStore('products').getAll()),
+      idbRequest(tx.objectStore('meta').get('version')),
+      idbRequest(tx.objectStore('meta').get('etag')),
+    ]);
+    productCatalog.products = new Map(products.map(product => [product.id, product]));
+    productCatalog.version = version || 0;
+    productCatalog.etag = etag || null;
+  }
+
+  function saveCatalogToDb(data, products) {
+    return new Promise((resolve, reject) => {
+      const tx = productCatalog.db.transaction(['products', 'meta'], 'readwrite');
+      const store = tx.objectStore('products');
+      if (data.full) store.clear();
+      products.forEach(product => store.put(product));
+      (data.deleted || []).forEach(id => store.delete(id));
+      tx.objectStore('meta').put(productCatalog.version, 'version');
+      tx.objectStore('meta').put(productCatalog.etag, 'etag');
+      tx.oncomplete = () => resolve();
+      tx.onerror = () => reject(tx.error);
+    });
+  }
+
+  async function syncCatalog() {
+    const headers = {};
+    if (productCatalog.version && productCatalog.etag) {
+      headers['If-None-Match'] = productCatalog.etag;
+    }
+    const response = await fetch(`${CATALOG_URL}?since=${productCatalog.version}`, { headers });
+
+    if (response.status === 304) {
+      productCatalog.ready = true;
+      return;
+    }
+    if (!response.ok) {
+      throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+    }
+
+    const data = await response.json();
+    const products = data.rows.map(row => catalogRowToProduct(data.fields, row));
+
+    if (data.full) productCatalog.products.clear();
+    products.forEach(product => productCatalog.products.set(product.id, product));
+    (data.deleted || []).forEach(id => productCatalog.products.delete(id));
+
+    productCatalog.version = data.version;
+    productCatalog.etag = response.headers.get('ETag');
+    productCatalog.ready = true;
+
+    if (productCatalog.db) {
+      await saveCatalogToDb(data, products);
+    }
+  }
+
+  async function initCatalog() {
+    try {
+      productCatalog.db = await openCatalogDb();
+      await loadCatalogFromDb();
+    } catch (error) {
+      console.warn('Catálogo local sem persistência:', error);
+    }
+    try {
+      await syncCatalog();
+    } catch (error) {
+      console.warn('Falha ao sincronizar catálogo, usando busca no servidor:', error);
+    }
+    setInterval(() => syncCatalog().catch(error => console.warn('Falha ao sincronizar catálogo:', error)), CATALOG_REFRESH_MS);
+  }
+
+  function searchCatalog(term, limit = 10) {
+    const normalized = normalizeSearchText(term);
+    const numeric = term.replace(/\D/g, '');
+    const results = [];
+
+    for (const product of productCatalog.products.values()) {
+      if (
+        product.search_text.includes(normalized) ||
+        (numeric && (String(product.id) === numeric || product.code.includes(numeric)))
+      ) {
+        results.push(product);
+      }
+    }
+
+    return results
+      .sort((a, b) => a.title.localeCompare(b.title, 'pt-BR'))
+      .slice(0, limit);
+  }
+
+  function productHasStock(product) {
+    return product.stock !== undefined ? product.stock !== 'out' : product.quantity > 0;
+  }
+
+  function productStockBadge(product) {
+    if (!productHasStock(product)) {
+      return `<span class="text-xs text-red-500 font-semibold">⚠️ SEM ESTOQUE</span>`;
+    }
+    if (product.stock === 'low') {
+      return `<span class="text-xs text-amber-500">Estoque baixo</span>`;
+    }
+    if (product.stock === 'ok') {
+      return `<span class="text-xs text-green-500">Em estoque</span>`;
+    }
+    return `<span class="text-xs text-green-500">Estoque: ${product.quantity}</span>`;
+  }
+
+  initCatalog();
+
+  // Política de busca dos seletores: mínimo de 2 caracteres, debounce de
+  // 250 ms, termo repetido não gera nova requisição e a requisição anterior
+  // ainda em andamento é abortada quando o usuário continua digitando.
+  const SEARCH_MIN_LENGTH = 2;
+  const SEARCH_DEBOUNCE_MS = 250;
+
+  function createSearchFetcher() {
+    let controller = null;
+    return {
+      lastTerm: null,
+      abort() {
+        controller?.abort();
+        controller = null;
+      },
+      async fetchJson(url) {
+        this.abort();
+        controller = new AbortController();
+        const response = await fetch(url, { signal: controller.signal });
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+        }
+        return response.json();
+      },
+    };
+  }
+
+  function isAbortError(error) {
+    return error && error.name === 'AbortError';
+  }
+
+  const customerFetcher = createSearchFetcher();
+  const productFetcher = createSearchFetcher();
+
   // Busca de clientes
   const searchCustomers = debounce(async (term) => {
-    if (term.length < 2) {
+    if (term.length < SEARCH_MIN_LENGTH) {
+      customerFetcher.abort();
+      customerFetcher.lastTerm = null;
       customerResults.classList.add('hidden');
       return;
     }
+    if (term === customerFetcher.lastTerm) {
+      customerResults.classList.remove('hidden');
+      return;
+    }
     
     try {
-      console.log('Buscando clientes:', term);
-      const response = await fetch(`/api/v1/customers/?search=${encodeURIComponent(term)}`);
-      
-      if (!response.ok) {
-        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
-      }
-      
-      const data = await response.json();
-      console.log('Dados recebidos:', data);
+      const data = await customerFetcher.fetchJson(`/api/v1/customers/?search=${encodeURIComponent(term)}`);
+      customerFetcher.lastTerm = term;
       
       const customers = Array.isArray(data) ? data : data.results || [];
       
@@ -478,11 +674,12 @@ document.addEventListener('DOMContentLoaded', function() {
       
       customerResults.classList.remove('hidden');
     } catch (error) {
+      if (isAbortError(error)) return;
       console.error('Erro ao buscar clientes:', error);
       customerResults.innerHTML = `<div class="px-4 py-3 text-sm text-red-500">Erro ao buscar clientes: ${error.message}</div>`;
       customerResults.classList.remove('hidden');
     }
-  }, 300);
+  }, SEARCH_DEBOUNCE_MS);
   
   customerSearch?.addEventListener('input', (e) => searchCustomers(e.target.value.trim()));
   customerSearch?.addEventListener('blur', () => {
@@ -491,33 +688,28 @@ document.addEventListener('DOMContentLoaded', function() {
   
   // Busca de produtos
   const searchProducts = debounce(async (term) => {
-    if (term.length < 2) {
+    if (term.length < SEARCH_MIN_LENGTH) {
+      productFetcher.abort();
       productResults.classList.add('hidden');
       return;
     }
     
     try {
-      console.log('Buscando produtos:', term);
-      const response = await fetch(`/api/v1/products/?search=${encodeURIComponent(term)}`);
-      
-      if (!response.ok) {
-        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+      let products;
+      if (productCatalog.ready) {
+        products = searchCatalog(term);
+      } else {
+        const data = await productFetcher.fetchJson(`/api/v1/products/?search=${encodeURIComponent(term)}`);
+        products = Array.isArray(data) ? data : data.results || [];
       }
       
-      const data = await response.json();
-      console.log('Dados recebidos:', data);
-      
-      const products = Array.isArray(data) ? data : data.results || [];
-      
       if (products.length === 0) {
         productResults.innerHTML = '<div class="px-4 py-3 text-sm text-muted-foreground">Nenhum produto encontrado.</div>';
       } else {
         productResults.innerHTML = products.map(product => {
-          const hasStock = product.quantity > 0;
+          const hasStock = productHasStock(product);
           const stockClass = hasStock ? 'hover:bg-primary/10 cursor-pointer' : 'bg-red-500/10 cursor-not-allowed opacity-60';
-          const stockBadge = hasStock 
-            ? `<span class="text-xs text-green-500">Estoque: ${product.quantity}</span>`
-            : `<span class="text-xs text-red-500 font-semibold">⚠️ SEM ESTOQUE</span>`;
+          const stockBadge = productStockBadge(product);
           
           return `
             <button
@@ -542,7 +734,11 @@ document.addEventListener('DOMContentLoaded', function() {
             productSearch.value = selectedProduct.title;
             productResults.classList.add('hidden');
             addProductBtn.disabled = false;
-            productQuantity.max = selectedProduct.quantity; // Define quantidade máxima
+            if (selectedProduct.quantity !== undefined) {
+              productQuantity.max = selectedProduct.quantity; // Define quantidade máxima
+            } else {
+              productQuantity.removeAttribute('max'); // Catálogo local: o servidor valida o estoque
+            }
             productQuantity.focus();
           });
         });
@@ -550,11 +746,12 @@ document.addEventListener('DOMContentLoaded', function() {
       
       productResults.classList.remove('hidden');
     } catch (error) {
+      if (isAbortError(error)) return;
       console.error('Erro ao buscar produtos:', error);
       productResults.innerHTML = `<div class="px-4 py-3 text-sm text-red-500">Erro ao buscar produtos: ${error.message}</div>`;
       productResults.classList.remove('hidden');
     }
-  }, 300);
+  }, SEARCH_DEBOUNCE_MS);
   
   productSearch?.addEventListener('input', (e) => {
     selectedProduct = null;
@@ -573,12 +770,12 @@ document.addEventListener('DOMContentLoaded', function() {
     const quantity = parseInt(productQuantity.value, 10) || 1;
     
     // Validação de estoque
-    if (selectedProduct.quantity <= 0) {
+    if (!productHasStock(selectedProduct)) {
       alert('❌ Este produto está sem estoque disponível.');
       return;
     }
     
-    if (quantity > selectedProduct.quantity) {
+    if (selectedProduct.quantity !== undefined && quantity > selectedProduct.quantity) {
       alert(`❌ Quantidade solicitada (${quantity}) excede o estoque disponível (${selectedProduct.quantity}).`);
       productQuantity.value = selectedProduct.quantity;
       return;
@@ -3,11 +3,24 @@ Exemplos de testes para o sistema PDV.
 Execute com: python manage.py test pos
 """
 
-from decimal import Decimal
-from django.test import TestCase, Client
+import io
+import os
+import random
+import tempfile
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.urls import reverse
 from django.contrib.auth.models import User
-from pos import services
-from pos.models import Sale, SaleItem, SalePayment, LedgerEntry, PaymentMethod
+from app import synthetic
+from pos import exports, load_simulation, registry, services
+from pos.load_simulation import LoadPlan
+from pos.models import Sale, SaleItem, SalePayment, SaleReceipt, LedgerEntry, PaymentMethod
 from customers.models import Customer
 from products.models import Product
 from brands.models import Brand
@@ -80,7 +93,417 @@ class ServiceTestCase(TestCase):
         self.assertIsNotNone(sale.finalized_at)
 
 
+class RegistryTestCase(TestCase):
+    """Testes do registro em memória (cliente genérico e métodos de pagamento)."""
+
+    def setUp(self):
+        registry.clear()
+        self.pix = PaymentMethod.objects.create(name='PIX', fee_percentage=Decimal('0'))
+
+    def tearDown(self):
+        registry.clear()
+
+    def test_generic_customer_cached_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            customer = services.get_or_create_generic_customer()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(services.get_or_create_generic_customer(), customer)
+
+    def test_not_cached_inside_uncommitted_transaction(self):
+        services.get_or_create_generic_customer()
+
+        with self.assertNumQueries(1):
+            services.get_or_create_generic_customer()
+
+    def test_payment_methods_invalidated_on_change(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(services.get_active_payment_methods(), [self.pix])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pix.is_active = False
+            self.pix.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(services.get_active_payment_methods(), [])
+
+        with self.assertNumQueries(0):
+            services.get_active_payment_methods()
+
+
+def legacy_fee_total(sale):
+    """Cálculo original de Sale.fee_total (consulta os pagamentos a cada chamada)."""
+    base_value = max(Decimal('0'), (sale.subtotal - sale.discount_total).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+    max_fee_percentage = Decimal('0')
+    for payment in sale.payments.select_related('payment_method').all():
+        if payment.payment_method.fee_payer == PaymentMethod.FeePayerType.CUSTOMER:
+            max_fee_percentage = max(max_fee_percentage, payment.payment_method.fee_percentage)
+    if max_fee_percentage > 0 and base_value > 0:
+        return (base_value * (max_fee_percentage / 100)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    return Decimal('0')
+
+
+class FeeTotalTestCase(TestCase):
+    """Compara a taxa pré-calculada com o cálculo original em vendas aleatórias."""
+
+    def setUp(self):
+        registry.clear()
+        self.rng = random.Random(2024)
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        brand = Brand.objects.create(name='Marca Teste')
+        category = Category.objects.create(name='Categoria Teste')
+        self.products = [
+            Product.objects.create(
+                title=f'Produto {i}',
+                brand=brand,
+                category=category,
+                selling_price=Decimal(self.rng.randint(100, 50000)) / 100,
+                cost_price=Decimal('1.00'),
+                quantity=1000,
+            )
+            for i in range(5)
+        ]
+        self.methods = [
+            PaymentMethod.objects.create(
+                name=f'Método {i}',
+                fee_percentage=Decimal(self.rng.randint(0, 1000)) / 100,
+                fee_payer=self.rng.choice(PaymentMethod.FeePayerType.values),
+            )
+            for i in range(6)
+        ]
+
+    def tearDown(self):
+        registry.clear()
+
+    def test_randomized_sales_match_legacy_property(self):
+        for n in range(30):
+            sale = services.get_or_create_draft_sale(self.user, f'session-{n}')
+            for product in self.rng.sample(self.products, self.rng.randint(1, 4)):
+                services.add_item(sale, product.id, self.rng.randint(1, 5))
+            if self.rng.random() < 0.3:
+                sale.discount_total = Decimal(self.rng.randint(0, 5000)) / 100
+                sale.save(update_fields=['discount_total'])
+
+            for method in self.rng.sample(self.methods, self.rng.randint(0, 3)):
+                services.add_payment(sale, method.id, amount=Decimal(self.rng.randint(1, 10000)) / 100)
+            if sale.payments.exists() and self.rng.random() < 0.3:
+                services.remove_payment(sale, sale.payments.first().pk)
+
+            sale = services.recalc_totals(sale)
+            expected = legacy_fee_total(sale)
+            sale.refresh_from_db()
+
+            self.assertEqual(sale.fee_total, expected, f'venda {n}')
+            self.assertEqual(
+                sale.total,
+                max(Decimal('0'), sale.subtotal - sale.discount_total + expected),
+                f'venda {n}',
+            )
+
+    def test_fee_total_does_not_query(self):
+        sale = services.get_or_create_draft_sale(self.user, 'session')
+        services.add_item(sale, self.products[0].id, 1)
+        sale.refresh_from_db()
+
+        with self.assertNumQueries(0):
+            sale.fee_total
+
+
+class ExportTestCase(TestCase):
+    """Testes da exportação CSV em streaming."""
+
+    def setUp(self):
+        registry.clear()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.staff = User.objects.create_user(username='staff', password='12345', is_staff=True)
+        brand = Brand.objects.create(name='Marca Teste')
+        category = Category.objects.create(name='Categoria Teste')
+        self.product = Product.objects.create(
+            title='Produto Teste',
+            brand=brand,
+            category=category,
+            selling_price=Decimal('100.00'),
+            cost_price=Decimal('40.00'),
+            quantity=50,
+            serie_number='SKU-1',
+        )
+        self.cash = PaymentMethod.objects.create(name='Dinheiro')
+        self.sales = [self._sell(f'session-{n}', n + 1) for n in range(3)]
+        self.client = Client()
+
+    def tearDown(self):
+        registry.clear()
+
+    def _sell(self, session_key, quantity):
+        sale = services.get_or_create_draft_sale(self.user, session_key)
+        services.add_item(sale, self.product.id, quantity)
+        sale.refresh_from_db()
+        services.add_payment(sale, self.cash.id, cash_tendered=sale.total)
+        result = services.finalize_sale(sale)
+        self.assertEqual(result['status'], 'success')
+        sale.refresh_from_db()
+        return sale
+
+    def _rows(self, content):
+        return [line.split(';') for line in content.strip().splitlines()]
+
+    def test_items_csv_includes_profit(self):
+        rows = self._rows(''.join(exports.iter_csv('items')))
+
+        header = rows[0]
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(header[0], 'venda')
+        last = dict(zip(header, rows[-1]))
+        self.assertEqual(last['codigo'], 'SKU-1')
+        self.assertEqual(last['quantidade'], '3')
+        self.assertEqual(Decimal(last['custo_total']), Decimal('120.00'))
+        self.assertEqual(Decimal(last['lucro']), Decimal('180.00'))
+
+    def test_view_streams_with_list_filters(self):
+        self.client.force_login(self.user)
+        draft = services.get_or_create_draft_sale(self.user, 'draft')
+        services.add_item(draft, self.product.id, 1)
+
+        response = self.client.get(reverse('pos:export_csv', args=['sales']), {'search': str(self.sales[1].id)})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="sales-', response['Content-Disposition'])
+        rows = self._rows(b''.join(response.streaming_content).decode())
+        self.assertEqual([row[0] for row in rows[1:]], [str(self.sales[1].id)])
+
+        response = self.client.get(reverse('pos:export_csv', args=['sales']))
+        rows = self._rows(b''.join(response.streaming_content).decode())
+        self.assertEqual(sorted(int(row[0]) for row in rows[1:]), sorted(sale.id for sale in self.sales))
+
+    def test_returned_sales_stay_in_exports(self):
+        Sale.objects.filter(pk=self.sales[0].pk).update(status=Sale.Status.PARTIALLY_RETURNED)
+        Sale.objects.filter(pk=self.sales[1].pk).update(status=Sale.Status.FULLY_RETURNED)
+
+        for name in ('sales', 'items', 'payments'):
+            rows = self._rows(''.join(exports.iter_csv(name)))
+            self.assertEqual(len(rows), 4, name)
+
+        rows = self._rows(''.join(exports.iter_csv('sales', {'status': Sale.Status.FULLY_RETURNED})))
+        self.assertEqual([row[0] for row in rows[1:]], [str(self.sales[1].id)])
+
+    def test_returns_export_is_staff_only(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('pos:export_csv', args=['returns'])).status_code, 403)
+        self.assertEqual(self.client.get(reverse('pos:export_csv', args=['unknown'])).status_code, 404)
+
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(reverse('pos:export_csv', args=['returns'])).status_code, 200)
+
+    def test_command_writes_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'pagamentos.csv')
+            stderr = io.StringIO()
+            call_command('export_csv', 'payments', output=path, stderr=stderr)
+
+            with open(path, encoding='utf-8') as stream:
+                rows = self._rows(stream.read())
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][2], 'Dinheiro')
+        self.assertIn('3 linhas exportadas', stderr.getvalue())
+
 # Para executar:
 # python manage.py test pos
 # python manage.py test pos.tests.ServiceTestCase
 # python manage.py test pos.tests.ServiceTestCase.test_add_item
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+class SessionCacheTestCase(TestCase):
+    """Testes das sessões em cache (cached_db) no PDV."""
+
+    def setUp(self):
+        registry.clear()
+        self.addCleanup(registry.clear)
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.product = Product.objects.create(
+            title='Produto Teste',
+            brand=Brand.objects.create(name='Marca Teste'),
+            category=Category.objects.create(name='Categoria Teste'),
+            selling_price=Decimal('10.00'),
+            cost_price=Decimal('4.00'),
+            quantity=10,
+        )
+        self.client.force_login(self.user)
+        self.client.get(reverse('pos:new'))
+
+    def test_add_item_does_not_read_session_from_database(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                reverse('pos:add_item'), {'product_id': self.product.id}, content_type='application/json',
+            )
+
+        self.assertTrue(response.json()['success'])
+        self.assertFalse([query for query in context.captured_queries if 'django_session' in query['sql']])
+
+    def test_clearsessions_removes_expired_rows(self):
+        Session.objects.update(expire_date=timezone.now() - timedelta(days=1))
+
+        call_command('clearsessions')
+
+        self.assertFalse(Session.objects.exists())
+
+    def test_session_benchmark_command(self):
+        stdout = io.StringIO()
+
+        call_command('session_benchmark', requests=3, warmup=1, stdout=stdout)
+
+        self.assertIn('cached_db', stdout.getvalue())
+        self.assertFalse(User.objects.filter(username='session-benchmark').exists())
+
+
+class LoadSimulationTestCase(TransactionTestCase):
+    """Caixas em threads sobre o banco de teste (SQLite em memória compartilhada)."""
+
+    def setUp(self):
+        registry.clear()
+        synthetic.generate(products=30, customers=10, sales=20, returns=0, ledger_entries=10, seed=5)
+
+    def tearDown(self):
+        registry.clear()
+
+    def test_single_cashier_completes_sales(self):
+        report = load_simulation.run(LoadPlan(cashiers=1, sales_per_cashier=8, credit_rate=0.5, return_rate=0.5, seed=5))
+
+        self.assertEqual(report.attempted, 8)
+        self.assertEqual(report.failures.get('lock', 0), 0)
+        self.assertEqual(report.failures.get('error', 0), 0)
+        self.assertGreater(len(report.sale_ids), 0)
+        self.assertEqual(report.summary()['sale']['count'], len(report.sale_ids))
+        self.assertEqual(report.violations, [])
+
+    def test_concurrent_cashiers_keep_stock_consistent(self):
+        report = load_simulation.run(LoadPlan(cashiers=3, sales_per_cashier=4, seed=6))
+
+        self.assertEqual(report.attempted, 12)
+        self.assertEqual(report.failures.get('error', 0), 0, report.samples)
+        # Bloqueios são repetidos: as vendas precisam fechar para a checagem valer
+        self.assertGreaterEqual(len(report.sale_ids), 9, (report.failures, report.retries, report.samples))
+        self.assertEqual(report.violations, [])
+
+    def test_check_consistency_reports_lost_update(self):
+        context = load_simulation.prepare(LoadPlan(cashiers=1))
+        product = Product.objects.order_by('id').first()
+        Product.objects.filter(pk=product.pk).update(quantity=-1)
+
+        violations = load_simulation.check_consistency(context, [], [])
+
+        self.assertIn(f'Produto {product.pk}: estoque negativo (-1)', violations)
+        self.assertTrue(any('atualização perdida' in violation for violation in violations))
+
+
+class ReceiptTestCase(TestCase):
+    """Testes dos recibos gravados na finalização."""
+
+    def setUp(self):
+        registry.clear()
+        self.user = User.objects.create_user(username='caixa', password='12345', first_name='Maria')
+        self.client.force_login(self.user)
+        brand = Brand.objects.create(name='Marca Teste')
+        category = Category.objects.create(name='Categoria Teste')
+        self.product = Product.objects.create(
+            title='Camiseta Estampada Algodão Premium Tamanho Único Azul Marinho',
+            brand=brand,
+            category=category,
+            selling_price=Decimal('15.00'),
+            cost_price=Decimal('5.00'),
+            quantity=100,
+        )
+        self.cash = PaymentMethod.objects.create(name='Dinheiro')
+
+    def tearDown(self):
+        registry.clear()
+
+    def _finalize(self, session_key='recibo'):
+        sale = services.get_or_create_draft_sale(self.user, session_key)
+        services.add_item(sale, self.product.id, 2)
+        services.add_payment(sale, self.cash.id, cash_tendered=Decimal('50.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(services.finalize_sale(sale)['status'], 'success')
+        return sale
+
+    def test_finalize_stores_receipt(self):
+        sale = self._finalize()
+
+        receipt = SaleReceipt.objects.get(sale=sale)
+        self.assertIn(f'#{sale.pk}', receipt.html)
+        self.assertIn('R$ 30,00', receipt.text)
+        self.assertIn('Troco:', receipt.text)
+        self.assertTrue(all(len(line) <= 48 for line in receipt.text.splitlines()))
+
+    def test_reprint_serves_stored_receipt(self):
+        sale = self._finalize()
+        url = reverse('pos:sale_receipt', args=[sale.pk])
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'RECIBO NÃO FISCAL')
+        self.assertContains(response, 'window.print()')
+        self.assertFalse([q for q in context.captured_queries if 'pos_saleitem' in q['sql']])
+        self.assertTrue(response['ETag'])
+        self.assertIn('Last-Modified', response)
+
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+
+        text = self.client.get(url, {'format': 'text'})
+        self.assertEqual(text['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertNotEqual(text['ETag'], response['ETag'])
+        self.assertEqual(text.content.decode(), SaleReceipt.objects.get(sale=sale).text)
+
+    def test_receipt_is_stored_on_first_print_when_missing(self):
+        sale = self._finalize()
+        SaleReceipt.objects.filter(sale=sale).delete()
+
+        response = self.client.get(reverse('pos:sale_receipt', args=[sale.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(SaleReceipt.objects.filter(sale=sale).exists())
+
+    def test_draft_has_no_receipt(self):
+        sale = services.get_or_create_draft_sale(self.user, 'rascunho')
+
+        response = self.client.get(reverse('pos:sale_receipt', args=[sale.pk]))
+
+        self.assertRedirects(response, reverse('pos:new'), fetch_redirect_response=False)
+        self.assertFalse(SaleReceipt.objects.exists())
+
+    def _batch_queries(self, params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('pos:sale_receipt_batch'), params)
+            content = b''.join(response.streaming_content).decode()
+        return content, len(context.captured_queries)
+
+    def test_batch_reads_stored_receipts(self):
+        first = self._finalize('lote-1')
+        _, one_sale = self._batch_queries({})
+        sales = [first] + [self._finalize(f'lote-{n}') for n in range(2, 5)]
+
+        content, four_sales = self._batch_queries({})
+
+        self.assertEqual(one_sale, four_sales)
+        self.assertEqual(content.count('<div class="receipt">'), 4)
+        self.assertEqual(content.count('<title>'), 1)
+        for sale in sales:
+            self.assertIn(f'#{sale.pk}', content)
+
+        text, _ = self._batch_queries({'format': 'text', 'ids': f'{sales[0].pk},{sales[1].pk}'})
+        self.assertEqual(text.count('\f'), 1)
+
+    def test_batch_stores_missing_receipts(self):
+        sales = [self._finalize(f'lote-{n}') for n in range(3)]
+        SaleReceipt.objects.all().delete()
+
+        content, _ = self._batch_queries({'date': timezone.now().date().isoformat()})
+
+        self.assertEqual(SaleReceipt.objects.count(), 3)
+        self.assertEqual(content.count('<div class="receipt">'), len(sales))
+        self.assertEqual(self.client.get(reverse('pos:sale_receipt_batch'), {'date': '31/12'}).status_code, 400)
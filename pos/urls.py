@@ -13,6 +13,10 @@ urlpatterns = [
     path('sales/', views.SaleListView.as_view(), name='sale_list'),
     path('sales/<int:pk>/', views.SaleDetailView.as_view(), name='sale_detail'),
     path('sales/<int:pk>/receipt/', views.SaleReceiptView.as_view(), name='sale_receipt'),
+    path('sales/receipts/', views.SaleReceiptBatchView.as_view(), name='sale_receipt_batch'),
+
+    # Exportações CSV (mesmos filtros das listagens)
+    path('exports/<str:kind>.csv', views.ExportCSVView.as_view(), name='export_csv'),
     
     # Métodos de pagamento
     path('payment-methods/', views.PaymentMethodListView.as_view(), name='payment_method_list'),
@@ -1,3 +1,4 @@
+from datetime import date, timedelta
 from decimal import Decimal, InvalidOperation
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
@@ -5,20 +6,24 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.views import View
 from django.views.generic import ListView, DetailView
-from django.http import JsonResponse
-from django.db.models import Q, Sum
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.db.models import Count, Q, Sum
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 import json
 
-from . import services, forms, return_services
-from .models import Sale, SaleItem, SalePayment, LedgerEntry, PaymentMethod, Return, ReturnItem
+from . import services, forms, return_services, exports, filters, receipts
+from .models import Sale, SaleItem, SalePayment, SaleReceipt, LedgerEntry, PaymentMethod, Return, ReturnItem
 from .serializers import (
     SaleSerializer, SaleItemSerializer, SalePaymentSerializer,
     LedgerEntrySerializer
 )
 from customers.models import Customer
 from products.models import Product
+from products.stock import start_of_day
 
 
 class POSNewView(LoginRequiredMixin, View):
@@ -46,7 +51,7 @@ class POSNewView(LoginRequiredMixin, View):
         available_credit = services.get_customer_available_credit(sale.customer, sale=sale)
         
         # Busca métodos de pagamento ativos
-        payment_methods = PaymentMethod.objects.filter(is_active=True, is_internal=False)
+        payment_methods = services.get_active_payment_methods()
         payment_methods_data = [
             {
                 'id': pm.id,
@@ -346,22 +351,7 @@ class LedgerListView(LoginRequiredMixin, ListView):
     
     def get_queryset(self):
         queryset = LedgerEntry.objects.select_related('customer', 'sale')
-        
-        # Filtros
-        type_filter = self.request.GET.get('type')
-        status_filter = self.request.GET.get('status')
-        customer_filter = self.request.GET.get('customer')
-        
-        if type_filter:
-            queryset = queryset.filter(type=type_filter)
-        
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
-        
-        if customer_filter:
-            queryset = queryset.filter(customer_id=customer_filter)
-        
-        return queryset
+        return filters.filter_ledger(queryset, self.request.GET)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -414,28 +404,7 @@ class SaleListView(LoginRequiredMixin, ListView):
             'items__product', 'payments__payment_method'
         )
         
-        # Filtros
-        search = self.request.GET.get('search', '').strip()
-        if search:
-            queryset = queryset.filter(
-                Q(id__icontains=search) |
-                Q(customer__full_name__icontains=search) |
-                Q(customer__phone__icontains=search)
-            )
-        
-        status_filter = self.request.GET.get('status')
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
-        
-        date_from = self.request.GET.get('date_from')
-        if date_from:
-            queryset = queryset.filter(finalized_at__gte=date_from)
-        
-        date_to = self.request.GET.get('date_to')
-        if date_to:
-            queryset = queryset.filter(finalized_at__lte=date_to)
-        
-        return queryset
+        return filters.filter_sales(queryset, self.request.GET)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -446,12 +415,34 @@ class SaleListView(LoginRequiredMixin, ListView):
         
         # Estatísticas
         queryset = self.get_queryset()
-        context['total_sales'] = queryset.count()
-        context['total_amount'] = sum(sale.total for sale in queryset)
+        totals = queryset.order_by().aggregate(total_sales=Count('id'), total_amount=Sum('total'))
+        context['total_sales'] = totals['total_sales']
+        context['total_amount'] = totals['total_amount'] or Decimal('0')
         
         return context
 
 
+class ExportCSVView(LoginRequiredMixin, View):
+    """Exporta vendas, itens, pagamentos, lançamentos ou devoluções em CSV (streaming).
+
+    Aceita os mesmos filtros (querystring) das listagens correspondentes.
+    """
+
+    def get(self, request, kind):
+        export = exports.EXPORTS.get(kind)
+        if export is None:
+            raise Http404('Exportação inexistente')
+        if export.staff_only and not request.user.is_staff:
+            raise PermissionDenied
+
+        response = StreamingHttpResponse(
+            exports.iter_csv(kind, request.GET),
+            content_type='text/csv; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{kind}-{timezone.now():%Y%m%d-%H%M}.csv"'
+        return response
+
+
 class SaleDetailView(LoginRequiredMixin, View):
     """Exibe detalhes completos de uma venda."""
     template_name = 'pos/sale_detail.html'
@@ -580,27 +571,76 @@ class PaymentMethodUpdateView(LoginRequiredMixin, View):
 
 
 class SaleReceiptView(LoginRequiredMixin, View):
-    """View para gerar o recibo não-fiscal de uma venda."""
-    template_name = 'pos/receipt.html'
+    """Recibo não-fiscal de uma venda, servido do conteúdo gravado na finalização
+    (pos/receipts.py). `?format=text` devolve a versão da impressora térmica.
+
+    ETag e Last-Modified permitem que a reimpressão responda 304 sem reenviar o recibo.
+    """
 
     def get(self, request, pk):
-        sale = get_object_or_404(
-            Sale.objects.prefetch_related('items__product', 'payments__payment_method'),
-            pk=pk
-        )
-        
+        receipt = SaleReceipt.objects.select_related('sale').filter(sale_id=pk).first()
+        sale = receipt.sale if receipt else get_object_or_404(Sale, pk=pk)
+
         # Apenas vendas finalizadas podem ter recibo
         if sale.status != Sale.Status.FINALIZED:
             messages.warning(request, 'Apenas vendas finalizadas podem ter recibo impresso.')
             return redirect('pos:new')
-        
-        from django.utils import timezone
-        context = {
-            'sale': sale,
-            'now': timezone.now(),
-        }
-        
-        return render(request, self.template_name, context)
+
+        if receipt is None:
+            # Venda finalizada antes dos recibos gravados (ou falha ao gravar)
+            receipt = receipts.store_receipt(sale.pk)
+
+        as_text = request.GET.get('format') == 'text'
+        etag = f'"{receipt.etag}-txt"' if as_text else f'"{receipt.etag}"'
+        rendered_at = receipt.rendered_at
+        if timezone.is_naive(rendered_at):
+            rendered_at = timezone.make_aware(rendered_at)
+        last_modified = int(rendered_at.timestamp())
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            if as_text:
+                response = HttpResponse(receipt.text, content_type='text/plain; charset=utf-8')
+            else:
+                head, tail = receipts.page_parts(f'Recibo #{sale.pk}')
+                response = HttpResponse(head + receipt.html + tail)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class SaleReceiptBatchView(LoginRequiredMixin, View):
+    """Recibos de várias vendas em uma página (ou texto) para impressão no fim do dia.
+
+    `?date=AAAA-MM-DD` (padrão: hoje) ou `?ids=1,2,3`; `?format=text` para a
+    impressora térmica. Lê só o conteúdo gravado, em streaming; os recibos que
+    faltarem são gravados antes, em lote.
+    """
+
+    def get(self, request):
+        sales = Sale.objects.filter(status__in=receipts.RECEIPT_STATUSES)
+        ids = [int(part) for part in request.GET.get('ids', '').split(',') if part.strip().isdigit()]
+        if ids:
+            sales = sales.filter(pk__in=ids)
+            title = f'Recibos ({len(ids)} vendas)'
+        else:
+            try:
+                day = date.fromisoformat(request.GET['date']) if request.GET.get('date') else timezone.now().date()
+            except ValueError:
+                return HttpResponseBadRequest('Data inválida (use AAAA-MM-DD).')
+            start = start_of_day(day)
+            sales = sales.filter(finalized_at__gte=start, finalized_at__lt=start + timedelta(days=1))
+            title = f'Recibos de {day:%d/%m/%Y}'
+
+        receipts.store_missing(sales)
+        stored = SaleReceipt.objects.filter(sale__in=sales).order_by('sale__finalized_at', 'sale_id')
+
+        if request.GET.get('format') == 'text':
+            contents = stored.values_list('text', flat=True).iterator(chunk_size=receipts.BATCH_SIZE)
+            return StreamingHttpResponse(receipts.stream_text(contents), content_type='text/plain; charset=utf-8')
+        contents = stored.values_list('html', flat=True).iterator(chunk_size=receipts.BATCH_SIZE)
+        return StreamingHttpResponse(receipts.stream_html(title, contents), content_type='text/html; charset=utf-8')
 
 
 # ============================================================================
@@ -622,26 +662,7 @@ class ReturnListView(UserPassesTestMixin, ListView):
         queryset = Return.objects.select_related(
             'original_sale', 'customer', 'user', 'approved_by'
         ).prefetch_related('items')
-        
-        # Filtros
-        status = self.request.GET.get('status')
-        refund_method = self.request.GET.get('refund_method')
-        search = self.request.GET.get('search')
-        
-        if status:
-            queryset = queryset.filter(status=status)
-        
-        if refund_method:
-            queryset = queryset.filter(refund_method=refund_method)
-        
-        if search:
-            queryset = queryset.filter(
-                Q(customer__full_name__icontains=search) |
-                Q(reason__icontains=search) |
-                Q(original_sale__id__icontains=search)
-            )
-        
-        return queryset.order_by('-created_at')
+        return filters.filter_returns(queryset, self.request.GET).order_by('-created_at')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -703,9 +724,8 @@ class ReturnCreateView(UserPassesTestMixin, View):
             # Calcular quantidade já devolvida
             already_returned = sum(
                 ri.quantity
-                for ri in item.return_items.filter(
-                    return_instance__status__in=[Return.Status.APPROVED, Return.Status.COMPLETED]
-                )
+                for ri in item.return_items.all()  # pré-carregado com return_instance
+                if ri.return_instance.status in (Return.Status.APPROVED, Return.Status.COMPLETED)
             )
             available = item.quantity - already_returned
             
@@ -867,30 +887,7 @@ class ReturnReportView(UserPassesTestMixin, ListView):
         queryset = Return.objects.select_related(
             'original_sale', 'customer', 'user', 'approved_by'
         ).prefetch_related('items__product')
-        
-        # Filtros
-        status = self.request.GET.get('status')
-        refund_method = self.request.GET.get('refund_method')
-        date_from = self.request.GET.get('date_from')
-        date_to = self.request.GET.get('date_to')
-        customer_id = self.request.GET.get('customer')
-        
-        if status:
-            queryset = queryset.filter(status=status)
-        
-        if refund_method:
-            queryset = queryset.filter(refund_method=refund_method)
-        
-        if date_from:
-            queryset = queryset.filter(created_at__date__gte=date_from)
-        
-        if date_to:
-            queryset = queryset.filter(created_at__date__lte=date_to)
-        
-        if customer_id:
-            queryset = queryset.filter(customer_id=customer_id)
-        
-        return queryset.order_by('-created_at')
+        return filters.filter_returns(queryset, self.request.GET).order_by('-created_at')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -4,7 +4,29 @@ from . import models
 
 class ProductAdmin(admin.ModelAdmin):
     list_display = ('title', 'serie_number',)
+    readonly_fields = ('average_cost',)
     search_fields = ('title',)
 
 
 admin.site.register(models.Product, ProductAdmin)
+
+
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'product', 'kind', 'quantity', 'reference_id',)
+    list_filter = ('kind',)
+    list_select_related = ('product',)
+    search_fields = ('product__title',)
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(models.StockMovement, StockMovementAdmin)
+
+
+class InventoryValuationAdmin(admin.ModelAdmin):
+    list_display = ('date', 'quantity', 'cost_value', 'retail_value', 'revenue', 'cogs',)
+    date_hierarchy = 'date'
+
+
+admin.site.register(models.InventoryValuation, InventoryValuationAdmin)
@@ -0,0 +1,146 @@
+"""
+Snapshot versionado do catálogo de produtos para busca local no PDV.
+
+O PDV (pos.js) baixa o catálogo compacto uma vez, guarda no IndexedDB e
+depois pede apenas as alterações desde a última versão conhecida. As
+alterações antigas são removidas todo dia (prune_changes(), no comando
+stock_snapshot); quem pede um delta a partir de uma versão removida recebe
+o catálogo completo.
+
+Funções disponíveis:
+- stock_band(): Faixa de estoque exibida no PDV (sem estoque/baixo/disponível)
+- current_version(): Versão atual do catálogo
+- version_range(): Versão mais antiga ainda registrada e versão atual
+- delta_available(): Se as alterações após uma versão ainda estão registradas
+- record_changes(): Registra produtos alterados (gera nova versão)
+- prune_changes(): Remove as alterações antigas
+- build_snapshot(): Catálogo completo
+- build_delta(): Alterações desde uma versão
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterable, List, Tuple
+from django.conf import settings
+from django.db.models import Max, Min
+from django.utils import timezone
+from app import search_cache
+from .models import Product, CatalogChange
+
+
+LOW_STOCK_THRESHOLD = 5
+PRUNE_BATCH_SIZE = 1000
+
+STOCK_OUT = 'out'
+STOCK_LOW = 'low'
+STOCK_OK = 'ok'
+
+FIELDS = ['id', 'code', 'title', 'price', 'stock']
+
+
+def stock_band(quantity: int) -> str:
+    """Retorna a faixa de estoque de um produto."""
+    if quantity is None or quantity <= 0:
+        return STOCK_OUT
+    if quantity <= LOW_STOCK_THRESHOLD:
+        return STOCK_LOW
+    return STOCK_OK
+
+
+def current_version() -> int:
+    """Retorna a versão atual do catálogo (0 se nunca houve alteração)."""
+    return CatalogChange.objects.aggregate(version=Max('id'))['version'] or 0
+
+
+def version_range() -> Tuple[int, int]:
+    """Retorna (versão mais antiga ainda registrada, versão atual); (0, 0) sem alterações."""
+    versions = CatalogChange.objects.aggregate(oldest=Min('id'), current=Max('id'))
+    return versions['oldest'] or 0, versions['current'] or 0
+
+
+def delta_available(since: int, versions: Tuple[int, int] = None) -> bool:
+    """Indica se um delta a partir de `since` está completo: a versão existe
+    e as alterações posteriores a ela não foram removidas por prune_changes()."""
+    oldest, current = versions or version_range()
+    return 0 < since <= current and since >= oldest - 1
+
+
+def record_changes(product_ids: Iterable[int]) -> None:
+    """Registra alteração dos produtos informados no catálogo.
+
+    Deve ser chamada por rotinas que alteram produtos sem passar por
+    `Product.save()` (ex.: `QuerySet.update()`), já que o signal não dispara.
+    """
+    ids = {pk for pk in product_ids if pk}
+    if ids:
+        CatalogChange.objects.bulk_create([CatalogChange(product_id=pk) for pk in ids])
+        search_cache.invalidate(search_cache.PRODUCTS)
+
+
+def prune_changes(before: datetime = None, batch_size: int = PRUNE_BATCH_SIZE) -> int:
+    """Remove as alterações registradas antes de `before` (padrão: há
+    CATALOG_CHANGES_KEEP_DAYS dias), sempre mantendo a versão atual.
+
+    Exclui por id, dos mais antigos para os mais novos e em lotes, para que
+    as versões restantes continuem contíguas mesmo se a rotina for
+    interrompida. Retorna quantos registros foram removidos.
+    """
+    before = before or timezone.now() - timedelta(days=settings.CATALOG_CHANGES_KEEP_DAYS)
+    cutoff = CatalogChange.objects.filter(
+        created_at__lt=before, id__lt=current_version(),
+    ).aggregate(cutoff=Max('id'))['cutoff']
+    if cutoff is None:
+        return 0
+
+    deleted = 0
+    while True:
+        ids = list(CatalogChange.objects.filter(id__lte=cutoff).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += CatalogChange.objects.filter(id__in=ids).delete()[0]
+
+
+def _rows(queryset) -> List[list]:
+    return [
+        [pk, code or '', title, str(price), stock_band(quantity)]
+        for pk, code, title, price, quantity in queryset.values_list(
+            'id', 'serie_number', 'title', 'selling_price', 'quantity'
+        ).order_by('id')
+    ]
+
+
+def build_snapshot() -> Dict[str, Any]:
+    """Retorna o catálogo completo no formato compacto."""
+    version = current_version()
+    return {
+        'version': version,
+        'full': True,
+        'fields': FIELDS,
+        'rows': _rows(Product.objects.all()),
+        'deleted': [],
+    }
+
+
+def build_delta(since: int) -> Dict[str, Any]:
+    """Retorna apenas os produtos alterados/excluídos após a versão `since`.
+
+    Se a versão informada não for válida (zero ou maior que a atual, por
+    exemplo após restaurar o banco) ou for anterior às alterações ainda
+    registradas, devolve o catálogo completo.
+    """
+    versions = version_range()
+    if not delta_available(since, versions):
+        return build_snapshot()
+    version = versions[1]
+
+    changed_ids = set(
+        CatalogChange.objects.filter(id__gt=since, id__lte=version).values_list('product_id', flat=True)
+    )
+    rows = _rows(Product.objects.filter(id__in=changed_ids)) if changed_ids else []
+    present = {row[0] for row in rows}
+
+    return {
+        'version': version,
+        'full': False,
+        'fields': FIELDS,
+        'rows': rows,
+        'deleted': sorted(changed_ids - present),
+    }
@@ -0,0 +1,296 @@
+"""
+Importação em massa via CSV (produtos; entradas em inflows/importers.py).
+
+O arquivo é lido linha a linha, sem carregar tudo em memória. Categorias,
+marcas e códigos de produto são resolvidos por mapas em memória carregados
+uma única vez, e as linhas válidas são gravadas em lotes, cada um na
+própria transação: o lote é confirmado assim que gravado, e os produtos
+não ficam bloqueados (para as baixas de estoque do PDV) até o fim do
+arquivo. Só o dry-run envolve tudo numa transação desfeita no final. Erros
+são reportados por linha e não interrompem a importação.
+
+Produtos: linhas cujo código (serie_number) já existe atualizam o produto;
+as demais criam um novo, tudo no mesmo `bulk_create(update_conflicts=True)`.
+Categorias e marcas inexistentes são criadas.
+
+    codigo;titulo;categoria;marca;preco_custo;preco_venda;descricao
+
+Classes/funções disponíveis:
+- iter_csv_rows(): Lê o CSV linha a linha (separador "," ou ";")
+- parse_decimal(): Converte "1.234,56" / "1234.56" em Decimal
+- NameMap: Mapa nome -> id (cria os que faltam)
+- ImportReport: Totais, erros por linha e linhas/s
+- BaseImporter: Leitura, validação e gravação em lotes
+- ProductImporter: Importador de produtos
+- IMPORTERS / get_importer(): Importadores disponíveis por tipo
+"""
+import csv
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterator, List, TextIO, Tuple
+from django.db import DatabaseError, transaction
+from django.utils.module_loading import import_string
+from brands.models import Brand
+from categories.models import Category
+from .catalog import record_changes
+from .models import Product
+
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 500
+
+IMPORTERS = {
+    'products': {
+        'label': 'Produtos',
+        'importer': 'products.importers.ProductImporter',
+        'permissions': ('products.add_product', 'products.change_product'),
+        'columns': 'codigo;titulo;categoria;marca;preco_custo;preco_venda;descricao',
+    },
+    'inflows': {
+        'label': 'Entradas de estoque',
+        'importer': 'inflows.importers.InflowImporter',
+        'permissions': ('inflows.add_inflow',),
+        'columns': 'codigo;fornecedor;quantidade;custo_unitario;descricao',
+    },
+}
+
+
+def _normalize_name(name: str) -> str:
+    """Nome sem espaços repetidos, em minúsculas e sem acentos: chave para
+    comparar cabeçalhos e nomes de categorias/marcas do CSV com os cadastrados."""
+    name = ' '.join((name or '').split()).lower()
+    name = unicodedata.normalize('NFKD', name)
+    return ''.join(char for char in name if not unicodedata.combining(char))
+
+
+def _normalize_header(name: str) -> str:
+    return _normalize_name(name).replace(' ', '_')
+
+
+def iter_csv_rows(stream: TextIO, aliases: Dict[str, str]) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Gera (número da linha, {coluna: valor}) a partir do cabeçalho.
+
+    Os nomes das colunas são normalizados (caixa, acentos, espaços) e
+    traduzidos por `aliases`. Linhas em branco são ignoradas.
+    """
+    header_line = stream.readline()
+    delimiter = ';' if header_line.count(';') > header_line.count(',') else ','
+    header = next(csv.reader([header_line], delimiter=delimiter), [])
+    columns = [aliases.get(_normalize_header(name), _normalize_header(name)) for name in header]
+
+    reader = csv.reader(stream, delimiter=delimiter)
+    for values in reader:
+        if not any(value.strip() for value in values):
+            continue
+        yield reader.line_num + 1, dict(zip(columns, (value.strip() for value in values)))
+
+
+def parse_decimal(value: str, field_name: str) -> Decimal:
+    """Aceita "1234.56", "1234,56" e "1.234,56"."""
+    text = value.replace('R$', '').replace(' ', '')
+    if ',' in text:
+        text = text.replace('.', '').replace(',', '.')
+    try:
+        number = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f'{field_name} inválido: "{value}"')
+    if number < 0 or not number.is_finite():
+        raise ValueError(f'{field_name} inválido: "{value}"')
+    return number.quantize(Decimal('0.01'))
+
+
+def parse_positive_int(value: str, field_name: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f'{field_name} inválido: "{value}"')
+    if number <= 0:
+        raise ValueError(f'{field_name} deve ser maior que zero')
+    return number
+
+
+class NameMap:
+    """Resolve nomes (sem diferenciar caixa/acentos) em ids, criando os que faltam."""
+
+    def __init__(self, model):
+        self.model = model
+        self.ids = {}
+        for pk, name in model.objects.order_by('-id').values_list('id', 'name'):
+            self.ids[_normalize_name(name)] = pk
+
+    def resolve(self, name: str) -> int:
+        key = _normalize_name(name)
+        if key not in self.ids:
+            self.ids[key] = self.model.objects.create(name=' '.join(name.split())).pk
+        return self.ids[key]
+
+
+def load_product_codes() -> Dict[str, int]:
+    """Mapa código (serie_number) -> id; em códigos repetidos vale o menor id."""
+    codes = {}
+    for pk, code in Product.objects.exclude(serie_number__isnull=True).exclude(serie_number='').order_by('-id').values_list('id', 'serie_number'):
+        codes[code] = pk
+    return codes
+
+
+@dataclass
+class RowError:
+    line: int
+    message: str
+
+
+@dataclass
+class ImportReport:
+    total: int = 0
+    created: int = 0
+    updated: int = 0
+    error_count: int = 0
+    errors: List[RowError] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def add_error(self, line: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(RowError(line, message))
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        return (
+            f'{self.total} linhas em {self.elapsed:.2f}s ({self.rows_per_second:.0f} linhas/s): '
+            f'{self.created} criados, {self.updated} atualizados, {self.error_count} com erro'
+        )
+
+
+class BaseImporter:
+    """Lê o CSV, valida cada linha com `build()` e grava em lotes com `save()`."""
+
+    aliases: Dict[str, str] = {}
+    required_columns: Tuple[str, ...] = ()
+    labels: Dict[str, str] = {}
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE, dry_run: bool = False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.report = ImportReport()
+
+    def build(self, row: Dict[str, str]) -> Any:
+        raise NotImplementedError
+
+    def save(self, batch: List[Tuple[int, Any]]) -> None:
+        raise NotImplementedError
+
+    def run(self, stream: TextIO) -> ImportReport:
+        started = time.perf_counter()
+        if self.dry_run:
+            with transaction.atomic():
+                self._read(stream)
+                transaction.set_rollback(True)
+        else:
+            self._read(stream)
+        self.report.elapsed = time.perf_counter() - started
+        return self.report
+
+    def _read(self, stream: TextIO) -> None:
+        batch = []
+        for line, row in iter_csv_rows(stream, self.aliases):
+            self.report.total += 1
+            missing = [self.labels.get(column, column) for column in self.required_columns if not row.get(column)]
+            if missing:
+                self.report.add_error(line, f'Campos obrigatórios vazios: {", ".join(missing)}')
+                continue
+            try:
+                item = self.build(row)
+            except ValueError as exc:
+                self.report.add_error(line, str(exc))
+                continue
+
+            batch.append((line, item))
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+
+        if batch:
+            self._flush(batch)
+
+    def _flush(self, batch: List[Tuple[int, Any]]) -> None:
+        try:
+            with transaction.atomic():
+                self.save(batch)
+        except DatabaseError as exc:
+            for line, _ in batch:
+                self.report.add_error(line, f'Erro ao gravar o lote: {exc}')
+
+
+class ProductImporter(BaseImporter):
+    aliases = {
+        'codigo': 'code', 'code': 'code', 'serie_number': 'code', 'numero_de_serie': 'code',
+        'titulo': 'title', 'title': 'title', 'produto': 'title', 'nome': 'title',
+        'categoria': 'category', 'category': 'category',
+        'marca': 'brand', 'brand': 'brand',
+        'preco_custo': 'cost_price', 'preco_de_custo': 'cost_price', 'cost_price': 'cost_price',
+        'preco_venda': 'selling_price', 'preco_de_venda': 'selling_price', 'selling_price': 'selling_price',
+        'descricao': 'description', 'description': 'description',
+    }
+    required_columns = ('title', 'category', 'brand', 'cost_price', 'selling_price')
+    labels = {
+        'title': 'título', 'category': 'categoria', 'brand': 'marca',
+        'cost_price': 'preço de custo', 'selling_price': 'preço de venda',
+    }
+    update_fields = ['title', 'category', 'brand', 'description', 'cost_price', 'selling_price', 'updated_at']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.categories = NameMap(Category)
+        self.brands = NameMap(Brand)
+        self.codes = load_product_codes()
+
+    def build(self, row: Dict[str, str]) -> Product:
+        code = row.get('code') or None
+        title = row['title']
+        if len(title) > 500:
+            raise ValueError('Título com mais de 500 caracteres')
+        if code and len(code) > 200:
+            raise ValueError('Código com mais de 200 caracteres')
+
+        return Product(
+            id=self.codes.get(code) if code else None,
+            serie_number=code,
+            title=title,
+            description=row.get('description') or None,
+            cost_price=parse_decimal(row['cost_price'], 'Preço de custo'),
+            selling_price=parse_decimal(row['selling_price'], 'Preço de venda'),
+            category_id=self.categories.resolve(row['category']),
+            brand_id=self.brands.resolve(row['brand']),
+        )
+
+    def save(self, batch: List[Tuple[int, Product]]) -> None:
+        # Um objeto por produto: repetições do mesmo código no lote valem pela última linha.
+        products: Dict[Any, Product] = {}
+        for line, product in batch:
+            products[product.id or product.serie_number or ('linha', line)] = product
+
+        objs = list(products.values())
+        created = sum(1 for product in objs if product.id is None)
+        Product.objects.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=['id'],
+            update_fields=self.update_fields,
+        )
+        record_changes(product.id for product in objs)
+
+        for product in objs:
+            if product.serie_number:
+                self.codes.setdefault(product.serie_number, product.id)
+        self.report.created += created
+        self.report.updated += len(objs) - created
+
+
+def get_importer(kind: str, **kwargs) -> BaseImporter:
+    """Instancia o importador do tipo `kind` (chave de IMPORTERS)."""
+    return import_string(IMPORTERS[kind]['importer'])(**kwargs)
@@ -0,0 +1,56 @@
+"""
+Gera em lote as variantes redimensionadas das imagens de produtos
+(ver products/thumbnails.py), para os produtos cadastrados antes delas.
+
+    python manage.py generate_thumbnails
+    python manage.py generate_thumbnails --workers 4 --force
+
+Imagens que já têm todas as variantes são puladas (a menos que `--force`).
+O Pillow libera o GIL ao redimensionar, então `--workers` ganha com vários núcleos.
+"""
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from app import search_cache
+from products import thumbnails
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Gera as miniaturas WebP/JPEG das imagens de produtos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Imagens processadas em paralelo')
+        parser.add_argument('--force', action='store_true', help='Regrava variantes já existentes')
+
+    def handle(self, *args, **options):
+        names = sorted(set(
+            Product.objects.exclude(image='').exclude(image__isnull=True).values_list('image', flat=True)
+        ))
+        storage = Product._meta.get_field('image').storage or default_storage
+
+        def process(name):
+            if not storage.exists(name):
+                return 'missing', name
+            if not options['force'] and thumbnails.variants_ready(name, storage):
+                return 'skipped', name
+            try:
+                thumbnails.generate_variants(name, storage, overwrite=options['force'])
+            except Exception as exc:
+                return 'failed', f'{name}: {exc}'
+            return 'generated', name
+
+        counts = Counter()
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+            for outcome, detail in executor.map(process, names):
+                counts[outcome] += 1
+                if outcome in ('missing', 'failed'):
+                    self.stderr.write(f'{outcome}: {detail}')
+
+        if counts['generated']:
+            search_cache.invalidate(search_cache.PRODUCTS)
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(names)} imagens: {counts["generated"]} geradas, {counts["skipped"]} já existentes, '
+            f'{counts["missing"]} originais ausentes, {counts["failed"]} com erro'
+        ))
@@ -0,0 +1,36 @@
+"""
+Importa produtos ou entradas de estoque a partir de um CSV.
+
+    python manage.py import_csv products produtos.csv
+    python manage.py import_csv inflows entradas.csv --batch-size 2000 --dry-run
+"""
+from django.core.management.base import BaseCommand, CommandError
+from products.importers import DEFAULT_BATCH_SIZE, IMPORTERS, get_importer
+
+
+class Command(BaseCommand):
+    help = 'Importa produtos ou entradas de estoque de um CSV (leitura em streaming, gravação em lotes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS))
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--encoding', default='utf-8-sig')
+        parser.add_argument('--dry-run', action='store_true', help='Valida e desfaz tudo ao final')
+
+    def handle(self, *args, **options):
+        importer = get_importer(options['kind'], batch_size=options['batch_size'], dry_run=options['dry_run'])
+        try:
+            with open(options['path'], newline='', encoding=options['encoding']) as stream:
+                report = importer.run(stream)
+        except (OSError, UnicodeDecodeError) as exc:
+            raise CommandError(f'Não foi possível ler o arquivo: {exc}')
+
+        for error in report.errors:
+            self.stderr.write(f'Linha {error.line}: {error.message}')
+        if report.error_count > len(report.errors):
+            self.stderr.write(f'... e mais {report.error_count - len(report.errors)} erros')
+
+        prefix = '[simulação] ' if options['dry_run'] else ''
+        style = self.style.WARNING if report.error_count else self.style.SUCCESS
+        self.stdout.write(style(prefix + report.summary()))
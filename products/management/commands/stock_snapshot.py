@@ -0,0 +1,49 @@
+"""
+Grava o snapshot diário do estoque e o fechamento da valorização do dia
+anterior e remove as alterações antigas do catálogo (uso típico: cron, logo
+após a meia-noite).
+
+    python manage.py stock_snapshot
+    python manage.py stock_snapshot --date 2025-01-31
+
+Antes do snapshot, lança no diário os ajustes de produtos cujo estoque foi
+alterado fora das rotinas de movimentação (ex.: cadastro com quantidade).
+"""
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from products import catalog, stock, valuation
+
+
+class Command(BaseCommand):
+    help = 'Grava o saldo de estoque de todos os produtos (snapshot + movimentos desde o anterior)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Dia do snapshot (AAAA-MM-DD); padrão: hoje, às 00:00')
+        parser.add_argument('--no-reconcile', action='store_true', help='Não lança ajustes de divergência')
+
+    def handle(self, *args, **options):
+        at = None
+        if options['date']:
+            try:
+                at = stock.start_of_day(date.fromisoformat(options['date']))
+            except ValueError:
+                raise CommandError(f'Data inválida: "{options["date"]}" (use AAAA-MM-DD)')
+
+        if not options['no_reconcile']:
+            adjusted = stock.reconcile()
+            if adjusted:
+                self.stdout.write(self.style.WARNING(f'{adjusted} ajustes lançados no diário'))
+
+        rows = stock.take_snapshot(at)
+        self.stdout.write(self.style.SUCCESS(f'Snapshot gravado: {rows} produtos com saldo'))
+
+        # Fechamento do dia anterior ao snapshot, com o saldo do diário
+        closing = valuation.take_valuation(at.date() - timedelta(days=1) if at else None)
+        self.stdout.write(self.style.SUCCESS(
+            f'Valorização de {closing.date:%d/%m/%Y}: R$ {closing.cost_value} (custo), '
+            f'R$ {closing.retail_value} (venda), CMV do dia R$ {closing.cogs}'
+        ))
+
+        pruned = catalog.prune_changes()
+        if pruned:
+            self.stdout.write(self.style.SUCCESS(f'{pruned} alterações antigas do catálogo removidas'))
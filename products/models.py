@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from categories.models import Category
 from brands.models import Brand
 
@@ -11,6 +12,9 @@ class Product(models.Model):
     serie_number = models.CharField(max_length=200, null=True, blank=True)
     cost_price = models.DecimalField(max_digits=20, decimal_places=2)
     selling_price = models.DecimalField(max_digits=20, decimal_places=2)
+    # Custo médio móvel, atualizado a cada entrada/devolução (products/valuation.py).
+    # Nulo enquanto não houver entrada: vale o cost_price.
+    average_cost = models.DecimalField(max_digits=20, decimal_places=4, null=True, blank=True, editable=False)
     quantity = models.IntegerField(default=0)
     image = models.ImageField(
         upload_to='products/', 
@@ -52,3 +56,91 @@ class Product(models.Model):
     def can_be_deleted(self) -> bool:
         """Indica se o produto pode ser excluído com segurança."""
         return self.deletion_block_reason() is None
+
+
+class CatalogChange(models.Model):
+    """Registro de alteração do catálogo usado para gerar deltas do PDV.
+
+    O id funciona como número de versão do catálogo: cada alteração de produto
+    (inclusão, edição, exclusão ou movimentação de estoque) gera uma nova linha.
+    """
+    product_id = models.BigIntegerField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f'v{self.pk} - produto #{self.product_id}'
+
+
+class StockMovement(models.Model):
+    """Lançamento do diário de estoque (somente inclusão).
+
+    `quantity` é a variação com sinal: entradas e devoluções somam, vendas
+    subtraem. `reference_id` aponta para o registro de origem (entrada,
+    venda ou devolução, conforme `kind`).
+    """
+
+    class Kind(models.TextChoices):
+        OPENING = 'opening', 'Saldo inicial'
+        INFLOW = 'inflow', 'Entrada'
+        SALE = 'sale', 'Venda'
+        RETURN = 'return', 'Devolução'
+        ADJUSTMENT = 'adjustment', 'Ajuste'
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_movements')
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    quantity = models.IntegerField()
+    reference_id = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['product', 'created_at'], name='stockmov_product_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.quantity:+d} - produto #{self.product_id}'
+
+
+class StockSnapshot(models.Model):
+    """Saldo de um produto considerando os movimentos anteriores a `taken_at`.
+
+    Os snapshots são gravados em conjunto (mesmo `taken_at` para todos os
+    produtos com saldo diferente de zero); produto sem linha tem saldo zero.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_snapshots')
+    taken_at = models.DateTimeField(db_index=True)
+    quantity = models.IntegerField()
+
+    class Meta:
+        ordering = ['-taken_at', 'product_id']
+        constraints = [
+            models.UniqueConstraint(fields=['taken_at', 'product'], name='stocksnapshot_taken_product_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.taken_at:%d/%m/%Y %H:%M} - produto #{self.product_id}: {self.quantity}'
+
+
+class InventoryValuation(models.Model):
+    """Valor do estoque no fechamento de um dia (custo médio) e custo/receita das vendas do dia."""
+    date = models.DateField(unique=True)
+    quantity = models.IntegerField(default=0)
+    cost_value = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    retail_value = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    revenue = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    cogs = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    created_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date']
+
+    def __str__(self):
+        return f'{self.date:%d/%m/%Y} - R$ {self.cost_value}'
+
+    @property
+    def gross_margin(self):
+        return self.revenue - self.cogs
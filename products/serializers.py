@@ -1,10 +1,58 @@
 from rest_framework import serializers
+from products import thumbnails
 from products.models import Product
 
 
+def _absolute(context, url):
+    request = context.get('request')
+    if url and request:
+        return request.build_absolute_uri(url)
+    return url
+
+
+class ImageVariantField(serializers.Field):
+    """URL de uma variante redimensionada da imagem (ver products/thumbnails.py).
+
+    Enquanto as variantes não existirem, devolve o original; sem imagem, None.
+    """
+
+    def __init__(self, size=thumbnails.THUMB, image_format=thumbnails.WEBP, **kwargs):
+        self.size = size
+        self.image_format = image_format
+        kwargs.setdefault('source', 'image')
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return _absolute(self.context, thumbnails.variant_url(value, self.size, self.image_format))
+
+
+class ImageVariantsField(serializers.Field):
+    """Todas as variantes da imagem: {tamanho: {formato: url}}, para montar srcset/<picture>."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', 'image')
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value or not thumbnails.variants_ready(value.name, value.storage):
+            return None
+        return {
+            size: {
+                image_format: _absolute(self.context, value.storage.url(thumbnails.variant_name(value.name, size, image_format)))
+                for image_format in thumbnails.FORMATS
+            }
+            for size in thumbnails.SIZES
+        }
+
+
 class ProductSerializer(serializers.ModelSerializer):
     has_stock = serializers.SerializerMethodField()
     image_url = serializers.SerializerMethodField()
+    thumbnail_url = ImageVariantField(thumbnails.THUMB, thumbnails.WEBP)
+    thumbnail_jpeg_url = ImageVariantField(thumbnails.THUMB, thumbnails.JPEG)
+    image_variants = ImageVariantsField()
     
     class Meta:
         model = Product
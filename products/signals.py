@@ -0,0 +1,40 @@
+import logging
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from app import search_cache
+from .models import Product
+from . import catalog, thumbnails
+
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Product)
+def record_catalog_change_on_save(sender, instance, **kwargs):
+    catalog.record_changes([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def record_catalog_change_on_delete(sender, instance, **kwargs):
+    catalog.record_changes([instance.pk])
+
+
+@receiver(post_save, sender=Product)
+def generate_image_variants_on_save(sender, instance, update_fields=None, **kwargs):
+    if not instance.image or (update_fields is not None and 'image' not in update_fields):
+        return
+    name, storage = instance.image.name, instance.image.storage
+    if thumbnails.variants_ready(name, storage):
+        return
+
+    def generate():
+        try:
+            thumbnails.generate_variants(name, storage)
+        except Exception:
+            # Imagem ilegível não impede o cadastro: listas e buscas seguem com o original
+            logger.exception('Falha ao gerar as variantes de %s', name)
+            return
+        search_cache.invalidate(search_cache.PRODUCTS)
+
+    transaction.on_commit(generate)
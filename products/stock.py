@@ -0,0 +1,207 @@
+"""
+Movimentação de estoque de produtos com UPDATE atômico e diário de movimentos.
+
+Em vez de carregar o produto e chamar `save()` (que regrava todas as colunas
+e perde atualizações concorrentes), soma as quantidades direto no banco com
+`F('quantity') + n`, em um único UPDATE para vários produtos.
+
+Cada movimentação (entrada, venda, devolução) também é gravada no diário
+`StockMovement` com um único INSERT. Periodicamente (comando
+stock_snapshot, no cron) o saldo de todos os produtos é gravado em
+`StockSnapshot`; o estoque em uma data passada é o snapshot anterior mais
+os movimentos entre o snapshot e a data, sem reprocessar o diário inteiro.
+
+Funções disponíveis:
+- add_stock(): Soma quantidades ao estoque de vários produtos
+- post_movements(): Grava movimentos no diário e atualiza o estoque
+- take_snapshot(): Grava o saldo de todos os produtos em um instante
+- stock_at(): Estoque dos produtos em um instante (snapshot + movimentos)
+- stock_on(): Estoque no fim de um dia
+- movement_report(): Saldo inicial, movimentos por tipo e saldo final no período
+- reconcile(): Lança ajustes onde o diário diverge de Product.quantity
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, IntegerField, Max, Q, Sum, Value, When
+from django.utils import timezone
+from .catalog import record_changes
+from .models import Product, StockMovement, StockSnapshot
+
+
+BATCH_SIZE = 1000
+
+
+def add_stock(quantities: Dict[int, int], average_costs: Dict[int, Decimal] = None) -> None:
+    """Soma `quantities` ({product_id: quantidade}) ao estoque.
+
+    `average_costs` ({product_id: custo médio}, ver valuation.receive()) é
+    gravado no mesmo UPDATE. Deve ser chamada dentro da transação que
+    registra a movimentação.
+    """
+    quantities = {product_id: quantity for product_id, quantity in quantities.items() if quantity}
+    if not quantities:
+        return
+
+    delta = Case(
+        *[When(id=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    changes = {'quantity': F('quantity') + delta}
+    if average_costs:
+        changes['average_cost'] = Case(
+            *[When(id=product_id, then=Value(cost)) for product_id, cost in average_costs.items()],
+            default=F('average_cost'),
+            output_field=DecimalField(max_digits=20, decimal_places=4),
+        )
+    Product.objects.filter(id__in=quantities).update(**changes)
+    record_changes(quantities)
+
+
+@transaction.atomic
+def post_movements(
+    kind: str,
+    movements: Iterable[Tuple[int, int, Optional[int]]],
+    average_costs: Dict[int, Decimal] = None,
+) -> List[StockMovement]:
+    """Grava os movimentos (`(product_id, quantidade com sinal, reference_id)`)
+    com um único INSERT e aplica a soma por produto (e o novo custo médio,
+    se houver) com um único UPDATE."""
+    now = timezone.now()
+    objs = [
+        StockMovement(product_id=product_id, kind=kind, quantity=quantity, reference_id=reference_id, created_at=now)
+        for product_id, quantity, reference_id in movements
+        if quantity
+    ]
+    if not objs:
+        return []
+
+    StockMovement.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+    quantities = defaultdict(int)
+    for movement in objs:
+        quantities[movement.product_id] += movement.quantity
+    add_stock(quantities, average_costs)
+    return objs
+
+
+def start_of_day(day: date) -> datetime:
+    moment = datetime.combine(day, time.min)
+    return timezone.make_aware(moment) if settings.USE_TZ else moment
+
+
+def _movement_sums(start: Optional[datetime], end: Optional[datetime], product_ids=None) -> Dict[int, int]:
+    movements = StockMovement.objects.all()
+    if end is not None:
+        movements = movements.filter(created_at__lt=end)
+    if start is not None:
+        movements = movements.filter(created_at__gte=start)
+    if product_ids is not None:
+        movements = movements.filter(product_id__in=product_ids)
+    return dict(movements.values_list('product_id').annotate(total=Sum('quantity')).order_by())
+
+
+def _latest_snapshot(at: datetime, product_ids=None) -> Tuple[Optional[datetime], Dict[int, int]]:
+    """Snapshot mais recente até `at` (inclusive): (taken_at, {product_id: saldo})."""
+    taken_at = StockSnapshot.objects.filter(taken_at__lte=at).aggregate(taken_at=Max('taken_at'))['taken_at']
+    if taken_at is None:
+        return None, {}
+    rows = StockSnapshot.objects.filter(taken_at=taken_at)
+    if product_ids is not None:
+        rows = rows.filter(product_id__in=product_ids)
+    return taken_at, dict(rows.values_list('product_id', 'quantity'))
+
+
+def stock_at(at: datetime, product_ids: Iterable[int] = None) -> Dict[int, int]:
+    """Estoque no instante `at` (movimentos anteriores a `at`).
+
+    Com `product_ids` retorna todos os produtos pedidos (zero se não houver
+    saldo); sem, apenas os produtos com saldo diferente de zero.
+    """
+    if product_ids is not None:
+        product_ids = list(product_ids)
+
+    taken_at, balances = _latest_snapshot(at, product_ids)
+    for product_id, quantity in _movement_sums(taken_at, at, product_ids).items():
+        balances[product_id] = balances.get(product_id, 0) + quantity
+
+    if product_ids is not None:
+        return {product_id: balances.get(product_id, 0) for product_id in product_ids}
+    return {product_id: quantity for product_id, quantity in balances.items() if quantity}
+
+
+def stock_on(day: date, product_ids: Iterable[int] = None) -> Dict[int, int]:
+    """Estoque no fim do dia `day`."""
+    return stock_at(start_of_day(day + timedelta(days=1)), product_ids)
+
+
+@transaction.atomic
+def take_snapshot(at: datetime = None) -> int:
+    """Grava o saldo de todos os produtos em `at` (padrão: início do dia atual,
+    para que movimentos de transações ainda abertas não fiquem de fora).
+
+    Reaproveita o snapshot anterior e soma apenas os movimentos desde ele.
+    Retorna o número de linhas gravadas (0 se o snapshot já existir).
+    """
+    at = at or start_of_day(timezone.now().date())
+    if StockSnapshot.objects.filter(taken_at=at).exists():
+        return 0
+
+    balances = stock_at(at)
+    StockSnapshot.objects.bulk_create(
+        [StockSnapshot(product_id=product_id, taken_at=at, quantity=quantity) for product_id, quantity in balances.items()],
+        batch_size=BATCH_SIZE,
+    )
+    return len(balances)
+
+
+def movement_report(date_from: date, date_to: date, product_ids: Iterable[int] = None) -> List[Dict[str, int]]:
+    """Por produto: saldo inicial, totais por tipo de movimento e saldo final
+    entre o início de `date_from` e o fim de `date_to`."""
+    if product_ids is not None:
+        product_ids = list(product_ids)
+    start = start_of_day(date_from)
+    end = start_of_day(date_to + timedelta(days=1))
+
+    opening = stock_at(start, product_ids)
+    movements = StockMovement.objects.filter(created_at__gte=start, created_at__lt=end)
+    if product_ids is not None:
+        movements = movements.filter(product_id__in=product_ids)
+    totals = {
+        row['product_id']: row
+        for row in movements.values('product_id').annotate(**{
+            kind: Sum('quantity', filter=Q(kind=kind)) for kind in StockMovement.Kind.values
+        }).order_by()
+    }
+
+    report = []
+    for product_id in sorted(set(opening) | set(totals)):
+        row = {'product_id': product_id, 'start_balance': opening.get(product_id, 0)}
+        sums = totals.get(product_id, {})
+        for kind in StockMovement.Kind.values:
+            row[kind] = sums.get(kind) or 0
+        row['end_balance'] = row['start_balance'] + sum(row[kind] for kind in StockMovement.Kind.values)
+        report.append(row)
+    return report
+
+
+@transaction.atomic
+def reconcile(kind: str = StockMovement.Kind.ADJUSTMENT) -> int:
+    """Lança no diário a diferença entre Product.quantity e a soma dos
+    movimentos (ex.: produtos criados com estoque fora das rotinas de
+    movimentação). Não altera Product.quantity. Retorna o número de ajustes."""
+    now = timezone.now()
+    taken_at, journal = _latest_snapshot(now)
+    for product_id, quantity in _movement_sums(taken_at, None).items():
+        journal[product_id] = journal.get(product_id, 0) + quantity
+
+    adjustments = []
+    for product_id, quantity in Product.objects.values_list('id', 'quantity').iterator(chunk_size=BATCH_SIZE):
+        difference = (quantity or 0) - journal.get(product_id, 0)
+        if difference:
+            adjustments.append(StockMovement(product_id=product_id, kind=kind, quantity=difference, created_at=now))
+    StockMovement.objects.bulk_create(adjustments, batch_size=BATCH_SIZE)
+    return len(adjustments)
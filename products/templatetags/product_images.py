@@ -0,0 +1,10 @@
+from django import template
+from products import thumbnails
+
+register = template.Library()
+
+
+@register.filter
+def image_variant(image, size=thumbnails.THUMB):
+    """URL da variante WebP de Product.image (`{{ product.image|image_variant:'small' }}`)."""
+    return thumbnails.variant_url(image, size) or ''
@@ -0,0 +1,554 @@
+import io
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+from django.utils import timezone
+from brands.models import Brand
+from categories.models import Category
+from inflows import services as services_inflows
+from inflows.models import Inflow
+from pos import registry, return_services, services
+from pos.models import PaymentMethod, Return
+from products import catalog, stock, thumbnails, valuation
+from products.importers import ProductImporter, parse_decimal
+from products.models import CatalogChange, InventoryValuation, Product, StockMovement, StockSnapshot
+from products.serializers import ProductSerializer
+from suppliers.models import Supplier
+
+
+class ProductCatalogTestCase(TestCase):
+    """Testes do catálogo versionado usado pelo PDV."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client.force_login(self.user)
+        self.brand = Brand.objects.create(name='Marca Teste')
+        self.category = Category.objects.create(name='Categoria Teste')
+        self.product = self._create_product('Produto A', quantity=10)
+        self.url = reverse('product-catalog-api-view')
+
+    def _create_product(self, title, quantity=0):
+        return Product.objects.create(
+            title=title,
+            brand=self.brand,
+            category=self.category,
+            serie_number='789000',
+            selling_price=Decimal('10.00'),
+            cost_price=Decimal('5.00'),
+            quantity=quantity,
+        )
+
+    def test_stock_band(self):
+        self.assertEqual(catalog.stock_band(0), catalog.STOCK_OUT)
+        self.assertEqual(catalog.stock_band(catalog.LOW_STOCK_THRESHOLD), catalog.STOCK_LOW)
+        self.assertEqual(catalog.stock_band(catalog.LOW_STOCK_THRESHOLD + 1), catalog.STOCK_OK)
+
+    def test_full_snapshot(self):
+        response = self.client.get(self.url)
+        data = response.json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(data['full'])
+        self.assertEqual(data['version'], catalog.current_version())
+        self.assertEqual(data['rows'], [[self.product.pk, '789000', 'Produto A', '10.00', 'ok']])
+
+    def test_not_modified_with_etag(self):
+        response = self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_delta_since_version(self):
+        version = catalog.current_version()
+        other = self._create_product('Produto B', quantity=1)
+        deleted_id = self.product.pk
+        self.product.delete()
+
+        data = self.client.get(self.url, {'since': version}).json()
+
+        self.assertFalse(data['full'])
+        self.assertEqual([row[0] for row in data['rows']], [other.pk])
+        self.assertEqual(data['rows'][0][4], catalog.STOCK_LOW)
+        self.assertEqual(data['deleted'], [deleted_id])
+
+    def test_unknown_version_returns_snapshot(self):
+        data = self.client.get(self.url, {'since': catalog.current_version() + 100}).json()
+
+        self.assertTrue(data['full'])
+
+    def test_prune_keeps_current_version_and_stale_delta_returns_snapshot(self):
+        stale = catalog.current_version()
+        self._create_product('Produto B')
+        recent = catalog.current_version()
+        self._create_product('Produto C')
+
+        self.assertEqual(catalog.prune_changes(before=timezone.now() + timedelta(days=1), batch_size=1), 2)
+        self.assertEqual(CatalogChange.objects.count(), 1)
+        self.assertEqual(catalog.current_version(), recent + 1)
+
+        self.assertTrue(self.client.get(self.url, {'since': stale}).json()['full'])
+        data = self.client.get(self.url, {'since': recent}).json()
+        self.assertFalse(data['full'])
+        self.assertEqual([row[2] for row in data['rows']], ['Produto C'])
+
+    def test_prune_keeps_recent_changes(self):
+        self._create_product('Produto B')
+
+        self.assertEqual(catalog.prune_changes(), 0)
+        self.assertEqual(CatalogChange.objects.count(), 2)
+
+    def test_gzip_weak_etag_revalidates(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        etag = response['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'W/{etag.removeprefix("W/")}')
+
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'products-search-tests'},
+    'hot': {
+        'BACKEND': 'app.caching.TieredCache',
+        'LOCATION': 'products-search-tests-hot',
+        'OPTIONS': {'L2': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'products-search-tests-l2'}},
+    },
+    'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'products-search-tests-sessions'},
+})
+class ProductSearchCacheTestCase(TestCase):
+    """Testes do cache de buscas de produtos."""
+
+    def setUp(self):
+        cache.clear()
+        caches['hot'].clear()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client.force_login(self.user)
+        brand = Brand.objects.create(name='Marca Teste')
+        category = Category.objects.create(name='Categoria Teste')
+        self.product = Product.objects.create(
+            title='Camiseta Azul',
+            brand=brand,
+            category=category,
+            selling_price=Decimal('10.00'),
+            cost_price=Decimal('5.00'),
+            quantity=3,
+        )
+        self.url = reverse('product-create-list-api-view')
+
+    def test_repeated_search_hits_cache(self):
+        first = self.client.get(self.url, {'search': 'Camiseta'}).json()
+
+        with CaptureQueriesContext(connection) as context:
+            second = self.client.get(self.url, {'search': '  Camiseta '}).json()
+
+        self.assertEqual(first, second)
+        self.assertFalse([q for q in context.captured_queries if 'products_product' in q['sql']])
+
+    def test_accented_term_uses_own_key(self):
+        self.product.title = 'Calça Jeans'
+        self.product.save()
+        self.assertEqual(len(self.client.get(self.url, {'search': 'calça'}).json()), 1)
+
+        self.assertEqual(self.client.get(self.url, {'search': 'calca'}).json(), [])
+
+    def test_product_change_invalidates_search(self):
+        self.client.get(self.url, {'search': 'camiseta'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.quantity = 0
+            self.product.save(update_fields=['quantity'])
+
+        data = self.client.get(self.url, {'search': 'camiseta'}).json()
+        self.assertFalse(data[0]['has_stock'])
+
+
+class ProductImportTestCase(TestCase):
+    """Testes da importação de produtos via CSV."""
+
+    def setUp(self):
+        self.brand = Brand.objects.create(name='Marca Teste')
+        self.category = Category.objects.create(name='Calçados')
+        self.existing = Product.objects.create(
+            title='Tênis Antigo',
+            brand=self.brand,
+            category=self.category,
+            serie_number='SKU-1',
+            selling_price=Decimal('100.00'),
+            cost_price=Decimal('50.00'),
+            quantity=7,
+        )
+
+    def _run(self, text, **kwargs):
+        return ProductImporter(**kwargs).run(io.StringIO(text))
+
+    def test_parse_decimal(self):
+        self.assertEqual(parse_decimal('1.234,56', 'Preço'), Decimal('1234.56'))
+        self.assertEqual(parse_decimal('R$ 10,5', 'Preço'), Decimal('10.50'))
+        self.assertEqual(parse_decimal('99.9', 'Preço'), Decimal('99.90'))
+        with self.assertRaises(ValueError):
+            parse_decimal('-1', 'Preço')
+
+    def test_upsert_by_code_and_row_errors(self):
+        report = self._run(
+            'Código;Título;Categoria;Marca;Preço Custo;Preço Venda\n'
+            'SKU-1;Tênis Novo;calcados;Marca Teste;60,00;120,00\n'
+            'SKU-2;Meia;Acessórios;Outra Marca;5;12,90\n'
+            'SKU-3;;Acessórios;Outra Marca;5;10\n'
+            '\n'
+            'SKU-4;Boné;Acessórios;Outra Marca;abc;10\n'
+            'SKU-2;Meia Cano Alto;Acessórios;Outra Marca;6;14\n'
+        )
+
+        # SKU-2 repetido no lote é gravado uma vez (vale a última linha)
+        self.assertEqual((report.total, report.created, report.updated, report.error_count), (5, 1, 1, 2))
+        self.assertEqual([error.line for error in report.errors], [4, 6])
+
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.title, 'Tênis Novo')
+        self.assertEqual(self.existing.selling_price, Decimal('120.00'))
+        self.assertEqual(self.existing.quantity, 7)
+        self.assertEqual(self.existing.category_id, self.category.id)
+
+        sock = Product.objects.get(serie_number='SKU-2')
+        self.assertEqual(sock.title, 'Meia Cano Alto')
+        self.assertEqual(sock.brand.name, 'Outra Marca')
+        self.assertEqual(Category.objects.filter(name='Acessórios').count(), 1)
+
+    def test_queries_do_not_grow_with_rows(self):
+        def csv_text(count, offset=0):
+            lines = ['codigo,titulo,categoria,marca,preco_custo,preco_venda']
+            lines += [f'N{offset + i},Produto {i},Calçados,Marca Teste,1,2' for i in range(count)]
+            return '\n'.join(lines)
+
+        with CaptureQueriesContext(connection) as small:
+            self._run(csv_text(10), batch_size=500)
+        with CaptureQueriesContext(connection) as large:
+            report = self._run(csv_text(400, offset=100), batch_size=500)
+
+        self.assertEqual(report.created, 400)
+        # Só cresce pela divisão do INSERT em lotes imposta pelo limite de parâmetros do SQLite.
+        self.assertLess(len(large.captured_queries), len(small.captured_queries) + 10)
+
+    def test_dry_run_rolls_back(self):
+        report = self._run('titulo;categoria;marca;preco_custo;preco_venda\nNovo;Nova Cat;Nova Marca;1;2\n', dry_run=True)
+
+        self.assertEqual(report.created, 1)
+        self.assertFalse(Product.objects.filter(title='Novo').exists())
+        self.assertFalse(Category.objects.filter(name='Nova Cat').exists())
+
+    def test_upload_view(self):
+        user = User.objects.create_superuser(username='admin', password='12345')
+        self.client.force_login(user)
+        upload = SimpleUploadedFile(
+            'produtos.csv',
+            'titulo;categoria;marca;preco_custo;preco_venda\nBolsa;Acessórios;Marca Teste;30;80\n'.encode(),
+        )
+
+        response = self.client.post(reverse('product_import'), {'kind': 'products', 'file': upload})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['report'].created, 1)
+        self.assertTrue(Product.objects.filter(title='Bolsa').exists())
+
+
+class StockJournalTestCase(TestCase):
+    """Testes do diário de movimentos e do estoque em uma data."""
+
+    def setUp(self):
+        registry.clear()
+        self.addCleanup(registry.clear)
+        self.user = User.objects.create_user(username='testuser', password='12345', is_staff=True)
+        brand = Brand.objects.create(name='Marca Teste')
+        category = Category.objects.create(name='Categoria Teste')
+        self.products = [
+            Product.objects.create(
+                title=f'Produto {i}',
+                brand=brand,
+                category=category,
+                selling_price=Decimal('10.00'),
+                cost_price=Decimal('5.00'),
+            )
+            for i in range(2)
+        ]
+
+    def _move(self, product, quantity, day, kind=StockMovement.Kind.INFLOW):
+        StockMovement.objects.create(
+            product=product, kind=kind, quantity=quantity, created_at=datetime.combine(day, datetime.min.time()) + timedelta(hours=12),
+        )
+
+    def test_sale_and_return_are_journaled(self):
+        product = self.products[0]
+        Inflow.objects.create(supplier=Supplier.objects.create(name='Fornecedor'), product=product, quantity=10)
+        sale = services.get_or_create_draft_sale(self.user, 'session')
+        item = services.add_item(sale, product.id, 4)
+        sale.refresh_from_db()
+        services.add_payment(sale, PaymentMethod.objects.create(name='Dinheiro').id, cash_tendered=sale.total)
+        self.assertEqual(services.finalize_sale(sale)['status'], 'success')
+
+        return_instance = return_services.create_return(
+            sale, [{'sale_item_id': item.id, 'quantity': 1}], 'Defeito', Return.RefundMethod.CREDIT, self.user,
+        )
+        return_services.approve_return(return_instance, self.user)
+        return_services.complete_return(return_instance)
+
+        product.refresh_from_db()
+        self.assertEqual(product.quantity, 7)
+        self.assertEqual(
+            list(product.stock_movements.values_list('kind', 'quantity', 'reference_id')),
+            [('inflow', 10, Inflow.objects.get().pk), ('sale', -4, sale.pk), ('return', 1, return_instance.pk)],
+        )
+        self.assertEqual(stock.stock_at(datetime.now() + timedelta(seconds=1)), {product.id: 7})
+
+    def test_stock_at_uses_snapshot_and_delta(self):
+        a, b = self.products
+        day = date(2025, 1, 10)
+        self._move(a, 10, day)
+        self._move(b, 3, day)
+        self._move(a, -4, day + timedelta(days=1), StockMovement.Kind.SALE)
+        self._move(a, 5, day + timedelta(days=3))
+
+        self.assertEqual(stock.take_snapshot(stock.start_of_day(day + timedelta(days=2))), 2)
+        self.assertEqual(stock.take_snapshot(stock.start_of_day(day + timedelta(days=2))), 0)
+        # Movimentos anteriores ao snapshot não são mais lidos
+        StockMovement.objects.filter(created_at__lt=stock.start_of_day(day + timedelta(days=2))).delete()
+
+        self.assertEqual(stock.stock_on(day + timedelta(days=2)), {a.id: 6, b.id: 3})
+        self.assertEqual(stock.stock_on(day + timedelta(days=3), [a.id]), {a.id: 11})
+        with self.assertNumQueries(3):
+            stock.stock_on(day + timedelta(days=5))
+
+    def test_movement_report(self):
+        a, _ = self.products
+        day = date(2025, 1, 10)
+        self._move(a, 10, day)
+        self._move(a, -4, day + timedelta(days=1), StockMovement.Kind.SALE)
+        self._move(a, 1, day + timedelta(days=1), StockMovement.Kind.RETURN)
+        self._move(a, 5, day + timedelta(days=5))
+
+        rows = stock.movement_report(day + timedelta(days=1), day + timedelta(days=2))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(
+            {key: rows[0][key] for key in ('start_balance', 'sale', 'return', 'inflow', 'end_balance')},
+            {'start_balance': 10, 'sale': -4, 'return': 1, 'inflow': 0, 'end_balance': 7},
+        )
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('stock-movement-report-api-view'), {
+            'date_from': str(day), 'date_to': str(day + timedelta(days=5)), 'product': a.id,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['rows'][0]['end_balance'], 12)
+        self.assertEqual(response.json()['rows'][0]['title'], 'Produto 0')
+
+    def test_snapshot_command_reconciles(self):
+        Product.objects.filter(id=self.products[0].id).update(quantity=8)
+
+        call_command('stock_snapshot', stdout=io.StringIO())
+
+        self.assertEqual(
+            list(StockMovement.objects.values_list('product_id', 'kind', 'quantity')),
+            [(self.products[0].id, 'adjustment', 8)],
+        )
+        self.assertEqual(stock.reconcile(), 0)
+        self.assertEqual(StockSnapshot.objects.count(), 0)
+
+
+class ValuationTestCase(TestCase):
+    """Testes do custo médio móvel e da valorização do estoque."""
+
+    def setUp(self):
+        registry.clear()
+        self.addCleanup(registry.clear)
+        caches['metrics'].clear()
+        self.user = User.objects.create_user(username='testuser', password='12345', is_staff=True)
+        self.supplier = Supplier.objects.create(name='Fornecedor')
+        self.cash = PaymentMethod.objects.create(name='Dinheiro')
+        self.product = Product.objects.create(
+            title='Produto',
+            brand=Brand.objects.create(name='Marca Teste'),
+            category=Category.objects.create(name='Categoria Teste'),
+            selling_price=Decimal('20.00'),
+            cost_price=Decimal('5.00'),
+        )
+
+    def _sell(self, quantity):
+        sale = services.get_or_create_draft_sale(self.user, f'session-{quantity}')
+        item = services.add_item(sale, self.product.id, quantity)
+        sale.refresh_from_db()
+        services.add_payment(sale, self.cash.id, cash_tendered=sale.total)
+        self.assertEqual(services.finalize_sale(sale)['status'], 'success')
+        item.refresh_from_db()
+        return sale, item
+
+    def test_moving_average_over_inflows_sales_and_returns(self):
+        Inflow.objects.create(supplier=self.supplier, product=self.product, quantity=10, unit_cost=Decimal('4.00'))
+        Inflow.objects.create(supplier=self.supplier, product=self.product, quantity=10, unit_cost=Decimal('6.00'))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.average_cost, Decimal('5.0000'))
+
+        sale, item = self._sell(15)
+        self.assertEqual(item.unit_cost, Decimal('5.00'))
+
+        # Entrada sem custo usa o cost_price; saldo 5 a 5,00 + 5 a 8,00
+        Product.objects.filter(id=self.product.id).update(cost_price=Decimal('8.00'))
+        Inflow.objects.create(supplier=self.supplier, product=self.product, quantity=5)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.average_cost, Decimal('6.5000'))
+
+        # Devolução volta pelo custo da venda
+        return_instance = return_services.create_return(
+            sale, [{'sale_item_id': item.id, 'quantity': 10}], 'Defeito', Return.RefundMethod.CREDIT, self.user,
+        )
+        return_services.approve_return(return_instance, self.user)
+        return_services.complete_return(return_instance)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.quantity, self.product.average_cost), (20, Decimal('5.7500')))
+
+    def test_receipt_updates_cost_in_the_stock_update(self):
+        with CaptureQueriesContext(connection) as context:
+            services_inflows.create_receipt(self.supplier.id, [
+                {'product': self.product.id, 'quantity': 2, 'unit_cost': Decimal('3.00')},
+                {'product': self.product.id, 'quantity': 2, 'unit_cost': Decimal('5.00')},
+            ])
+
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.quantity, self.product.average_cost), (4, Decimal('4.0000')))
+        updates = [query['sql'] for query in context.captured_queries if query['sql'].startswith('UPDATE "products_product"')]
+        self.assertEqual(len(updates), 1)
+
+    def test_current_valuation_is_cached_until_stock_changes(self):
+        Inflow.objects.create(supplier=self.supplier, product=self.product, quantity=10, unit_cost=Decimal('4.00'))
+
+        self.assertEqual(
+            valuation.current_valuation(),
+            {'quantity': 10, 'cost_value': Decimal('40.00'), 'retail_value': Decimal('200.00')},
+        )
+        with self.assertNumQueries(1):
+            valuation.current_valuation()
+
+        self._sell(4)
+        self.assertEqual(valuation.current_valuation()['cost_value'], Decimal('24.00'))
+
+    def test_take_valuation(self):
+        Inflow.objects.create(supplier=self.supplier, product=self.product, quantity=10, unit_cost=Decimal('4.00'))
+        self._sell(3)
+
+        closing = valuation.take_valuation(timezone.now().date())
+
+        self.assertEqual(
+            (closing.quantity, closing.cost_value, closing.revenue, closing.cogs, closing.gross_margin),
+            (7, Decimal('28.00'), Decimal('60.00'), Decimal('12.00'), Decimal('48.00')),
+        )
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('inventory-valuation-api-view'))
+        self.assertEqual(response.json()['history'][0]['cogs'], '12.00')
+
+    def test_take_valuation_uses_closing_balance(self):
+        Inflow.objects.create(supplier=self.supplier, product=self.product, quantity=10, unit_cost=Decimal('4.00'))
+        self._sell(3)
+        today = timezone.now().date()
+        # Movimento do dia seguinte não entra no fechamento de hoje
+        StockMovement.objects.create(
+            product=self.product, kind=StockMovement.Kind.ADJUSTMENT, quantity=5,
+            created_at=stock.start_of_day(today + timedelta(days=1)) + timedelta(hours=1),
+        )
+        Product.objects.filter(id=self.product.id).update(quantity=12)
+
+        call_command('stock_snapshot', '--date', str(today + timedelta(days=1)), '--no-reconcile', stdout=io.StringIO())
+
+        closing = InventoryValuation.objects.get(date=today)
+        self.assertEqual((closing.quantity, closing.cost_value, closing.cogs), (7, Decimal('28.00'), Decimal('12.00')))
+
+
+class ThumbnailTestCase(TestCase):
+    """Testes das variantes redimensionadas de Product.image."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        caches['hot'].clear()
+        self.brand = Brand.objects.create(name='Marca Teste')
+        self.category = Category.objects.create(name='Categoria Teste')
+
+    def _upload(self, size=(1600, 1200), mode='RGB', image_format='JPEG', name='foto.jpg'):
+        buffer = io.BytesIO()
+        Image.new(mode, size, (200, 30, 30, 128) if mode == 'RGBA' else (200, 30, 30)).save(buffer, image_format)
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{image_format.lower()}')
+
+    def _create_product(self, image=None):
+        return Product.objects.create(
+            title='Produto com foto',
+            brand=self.brand,
+            category=self.category,
+            selling_price=Decimal('10.00'),
+            cost_price=Decimal('5.00'),
+            image=image,
+        )
+
+    def test_generate_variants_sizes_and_formats(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            product = self._create_product(self._upload(mode='RGBA', image_format='PNG', name='foto.png'))
+
+        keys = thumbnails.generate_variants(product.image.name)
+
+        self.assertEqual(len(keys), len(thumbnails.SIZES) * len(thumbnails.FORMATS))
+        for (size, image_format), key in keys.items():
+            with product.image.storage.open(key) as handle, Image.open(handle) as variant:
+                self.assertEqual(max(variant.size), thumbnails.SIZES[size])
+                self.assertEqual(variant.format, thumbnails.FORMATS[image_format][0])
+                self.assertEqual(variant.size, (thumbnails.SIZES[size], thumbnails.SIZES[size] * 3 // 4))
+
+    def test_small_original_is_not_upscaled(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = self._create_product(self._upload(size=(50, 40)))
+
+        key = thumbnails.variant_name(product.image.name, thumbnails.MEDIUM)
+        with product.image.storage.open(key) as handle, Image.open(handle) as variant:
+            self.assertEqual(variant.size, (50, 40))
+
+    def test_upload_generates_variants_and_serializer_returns_them(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = self._create_product(self._upload())
+
+        data = ProductSerializer(product).data
+
+        self.assertEqual(data['thumbnail_url'], f'/media/{thumbnails.variant_name(product.image.name, thumbnails.THUMB)}')
+        self.assertTrue(data['thumbnail_jpeg_url'].endswith('.jpg.jpg'))
+        self.assertEqual(set(data['image_variants']), set(thumbnails.SIZES))
+        self.assertEqual(data['image_url'], product.image.url)
+
+    def test_serializer_falls_back_to_original(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            product = self._create_product(self._upload())
+        without_image = self._create_product()
+
+        data = ProductSerializer(product).data
+
+        self.assertEqual(data['thumbnail_url'], product.image.url)
+        self.assertIsNone(data['image_variants'])
+        self.assertIsNone(ProductSerializer(without_image).data['thumbnail_url'])
+
+    def test_backfill_command(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            product = self._create_product(self._upload())
+        caches['hot'].clear()
+        out = io.StringIO()
+
+        call_command('generate_thumbnails', stdout=out)
+        call_command('generate_thumbnails', stdout=out)
+
+        self.assertIn('1 imagens: 1 geradas, 0 já existentes', out.getvalue())
+        self.assertIn('1 imagens: 0 geradas, 1 já existentes', out.getvalue())
+        self.assertTrue(product.image.storage.exists(thumbnails.variant_name(product.image.name, thumbnails.SMALL)))
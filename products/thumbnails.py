@@ -0,0 +1,143 @@
+"""
+Variantes redimensionadas de Product.image (miniaturas do PDV e das listas).
+
+Cada imagem original ganha uma versão WebP e uma JPEG por tamanho (lado
+maior em pixels, sem ampliar), gravadas no mesmo storage com chave
+derivada do nome do original:
+
+    products/camiseta_a1b2.jpg -> products/variants/thumb/camiseta_a1b2.jpg.webp
+                                  products/variants/thumb/camiseta_a1b2.jpg.jpg
+
+Como o Django não sobrescreve uploads (nome novo a cada envio), a chave
+muda junto com a imagem e as variantes podem ter cache longo no navegador.
+
+Funções disponíveis:
+- variant_name(): Chave de uma variante no storage
+- generate_variants(): Gera as variantes de um original (no upload e no backfill)
+- variants_ready(): Indica se as variantes existem (consulta cacheada)
+- variant_url(): URL da variante, ou do original enquanto ela não existir
+
+As variantes são geradas após o commit de um Product com imagem nova
+(products/signals.py) e em lote com `python manage.py generate_thumbnails`.
+"""
+import logging
+import posixpath
+from io import BytesIO
+from typing import Dict, Tuple
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+from app.caching import hot_cache
+
+
+logger = logging.getLogger(__name__)
+
+THUMB = 'thumb'
+SMALL = 'small'
+MEDIUM = 'medium'
+
+# Lado maior de cada tamanho, em pixels
+SIZES = {THUMB: 96, SMALL: 320, MEDIUM: 800}
+
+WEBP = 'webp'
+JPEG = 'jpeg'
+FORMATS = {WEBP: ('WEBP', 'webp'), JPEG: ('JPEG', 'jpg')}
+
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+JPEG_BACKGROUND = (255, 255, 255)
+
+VARIANTS_DIR = 'products/variants'
+READY_TIMEOUT = 60 * 60 * 24
+MISSING_TIMEOUT = 60
+
+
+def variant_name(name: str, size: str, image_format: str = WEBP) -> str:
+    """Chave no storage da variante `size`/`image_format` do original `name`."""
+    return f'{VARIANTS_DIR}/{size}/{posixpath.basename(name)}.{FORMATS[image_format][1]}'
+
+
+def _marker(name: str) -> str:
+    # A última variante gravada por generate_variants() (menor tamanho, último
+    # formato): se ela existe, todas existem
+    return variant_name(name, min(SIZES, key=SIZES.get), list(FORMATS)[-1])
+
+
+def _ready_key(name: str) -> str:
+    return f'thumbnails:{name}'
+
+
+def _encode(image: Image.Image, image_format: str) -> bytes:
+    pil_format, _ = FORMATS[image_format]
+    if image_format == JPEG and image.mode == 'RGBA':
+        # JPEG não tem transparência: compõe sobre fundo branco
+        background = Image.new('RGB', image.size, JPEG_BACKGROUND)
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+
+    buffer = BytesIO()
+    if image_format == JPEG:
+        image.save(buffer, pil_format, quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(buffer, pil_format, quality=WEBP_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def generate_variants(name: str, storage=default_storage, overwrite: bool = False) -> Dict[Tuple[str, str], str]:
+    """Gera todas as variantes do original `name` e devolve {(tamanho, formato): chave}.
+
+    O original é decodificado uma vez; cada tamanho é reduzido a partir do
+    anterior (maior para menor). Variantes já existentes são mantidas, a
+    menos que `overwrite` seja verdadeiro.
+    """
+    keys = {(size, image_format): variant_name(name, size, image_format) for size in SIZES for image_format in FORMATS}
+    if not overwrite and all(storage.exists(key) for key in keys.values()):
+        hot_cache.set(_ready_key(name), True, READY_TIMEOUT)
+        return keys
+
+    with storage.open(name, 'rb') as original:
+        with Image.open(original) as opened:
+            image = ImageOps.exif_transpose(opened)
+            image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        # Paleta, tons de cinza, CMYK etc.: reduz em RGB(A) para o LANCZOS valer
+        has_alpha = 'transparency' in image.info or image.mode in ('LA', 'PA')
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    for size, edge in sorted(SIZES.items(), key=lambda item: item[1], reverse=True):
+        image.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        for image_format in FORMATS:
+            key = keys[(size, image_format)]
+            if storage.exists(key):
+                if not overwrite:
+                    continue
+                storage.delete(key)
+            saved = storage.save(key, ContentFile(_encode(image, image_format)))
+            if saved != key:
+                logger.warning('Variante gravada com outro nome: %s -> %s', key, saved)
+
+    hot_cache.set(_ready_key(name), True, READY_TIMEOUT)
+    return keys
+
+
+def variants_ready(name: str, storage=default_storage) -> bool:
+    """Indica se as variantes de `name` já foram geradas.
+
+    O resultado fica no cache `hot` (existência por um dia, ausência por um
+    minuto), para que listas e buscas não consultem o storage a cada item.
+    """
+    ready = hot_cache.get(_ready_key(name))
+    if ready is None:
+        ready = storage.exists(_marker(name))
+        hot_cache.set(_ready_key(name), ready, READY_TIMEOUT if ready else MISSING_TIMEOUT)
+    return ready
+
+
+def variant_url(image, size: str = THUMB, image_format: str = WEBP) -> str | None:
+    """URL da variante de um ImageFieldFile; o original enquanto as variantes
+    não existirem e None sem imagem."""
+    if not image:
+        return None
+    if variants_ready(image.name, image.storage):
+        return image.storage.url(variant_name(image.name, size, image_format))
+    return image.url
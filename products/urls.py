@@ -1,14 +1,19 @@
 from django.urls import path
+from django.views.decorators.gzip import gzip_page
 from . import views
 
 
 urlpatterns = [
     path('products/list/', views.ProductListView.as_view(), name='product_list'),
     path('products/create/', views.ProductCreateView.as_view(), name='product_create'),
+    path('products/import/', views.ProductImportView.as_view(), name='product_import'),
     path('products/<int:pk>/detail/', views.ProductDetailView.as_view(), name='product_detail'),
     path('products/<int:pk>/update/', views.ProductUpdateView.as_view(), name='product_update'),
     path('products/<int:pk>/delete/', views.ProductDeleteView.as_view(), name='product_delete'),
 
     path('api/v1/products/', views.ProductCreateListAPIView.as_view(), name='product-create-list-api-view'),
+    path('api/v1/products/catalog/', gzip_page(views.ProductCatalogAPIView.as_view()), name='product-catalog-api-view'),
+    path('api/v1/products/stock-movements/', views.StockMovementReportAPIView.as_view(), name='stock-movement-report-api-view'),
+    path('api/v1/products/valuation/', views.InventoryValuationAPIView.as_view(), name='inventory-valuation-api-view'),
     path('api/v1/products/<int:pk>/', views.ProductRetrieveUpdateDestroyAPIView.as_view(), name='product-detail-api-view'),
 ]
@@ -0,0 +1,157 @@
+"""
+Custo médio móvel e valorização do estoque.
+
+Cada entrada (ou devolução) recalcula o custo médio do produto de forma
+incremental, sem reprocessar o histórico:
+
+    novo_médio = (saldo × médio_atual + qtd × custo_entrada) / (saldo + qtd)
+
+Vendas não alteram o custo médio; o custo da venda (SaleItem.unit_cost) é o
+médio vigente na finalização. O valor do estoque é lido de um agregado em
+cache (a chave inclui a versão do catálogo, que muda a cada movimentação) e
+o fechamento de cada dia fica gravado em InventoryValuation (comando
+stock_snapshot, no cron), com o saldo do fim do dia lido do diário de
+estoque (products.stock).
+
+Funções disponíveis:
+- unit_cost_expression(): Custo médio com fallback para cost_price (expressão SQL)
+- receive(): Novo custo médio após entradas/devoluções
+- current_valuation(): Quantidade e valor do estoque (custo e venda)
+- sales_totals(): Receita e custo das vendas de um dia
+- take_valuation(): Grava o fechamento de um dia
+- valuation_history(): Fechamentos dos últimos dias
+"""
+from decimal import Decimal
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from app.caching import metrics_cache
+from pos.models import Sale, SaleItem
+from . import stock
+from .catalog import current_version
+from .models import InventoryValuation, Product
+
+
+FOUR_PLACES = Decimal('0.0001')
+TWO_PLACES = Decimal('0.01')
+VALUATION_CACHE_TIMEOUT = 60 * 60
+
+_MONEY = DecimalField(max_digits=20, decimal_places=4)
+
+
+def unit_cost_expression(prefix: str = '') -> Coalesce:
+    """Custo unitário vigente: custo médio ou, sem entradas ainda, o cost_price."""
+    return Coalesce(f'{prefix}average_cost', f'{prefix}cost_price', output_field=_MONEY)
+
+
+def receive(lines: Iterable[Tuple[int, int, Optional[Decimal]]]) -> Dict[int, Decimal]:
+    """Calcula o novo custo médio com as entradas (`(product_id, quantidade, custo unitário)`).
+
+    Deve ser chamada na transação da movimentação, antes de somar as
+    quantidades ao estoque; o resultado vai para `post_movements(...,
+    average_costs=...)`, que grava custo e estoque no mesmo UPDATE. Custo
+    vazio usa o cost_price do produto; saldo negativo conta como zero.
+    """
+    lines = [line for line in lines if line[1] > 0]
+    if not lines:
+        return {}
+
+    products = {
+        product_id: [quantity, cost_price, average_cost]
+        for product_id, quantity, cost_price, average_cost in Product.objects.select_for_update().filter(
+            id__in={product_id for product_id, _, _ in lines}
+        ).values_list('id', 'quantity', 'cost_price', 'average_cost')
+    }
+    costs = {}
+    for product_id, quantity, unit_cost in lines:
+        if product_id not in products:
+            continue
+        on_hand, cost_price, average_cost = products[product_id]
+        cost = cost_price if unit_cost is None else Decimal(unit_cost)
+        current = cost_price if average_cost is None else average_cost
+        on_hand = max(on_hand, 0)
+        average_cost = ((current * on_hand + cost * quantity) / (on_hand + quantity)).quantize(FOUR_PLACES)
+        # Só em memória, para a próxima linha do mesmo produto
+        products[product_id] = [on_hand + quantity, cost_price, average_cost]
+        costs[product_id] = average_cost
+    return costs
+
+
+def _build_valuation() -> Dict[str, Any]:
+    totals = Product.objects.filter(quantity__gt=0).aggregate(
+        total_quantity=Coalesce(Sum('quantity'), 0),
+        cost_value=Coalesce(Sum(ExpressionWrapper(F('quantity') * unit_cost_expression(), output_field=_MONEY)), Value(Decimal('0')), output_field=_MONEY),
+        retail_value=Coalesce(Sum(ExpressionWrapper(F('quantity') * F('selling_price'), output_field=_MONEY)), Value(Decimal('0')), output_field=_MONEY),
+    )
+    return {
+        'quantity': totals['total_quantity'],
+        'cost_value': Decimal(totals['cost_value']).quantize(TWO_PLACES),
+        'retail_value': Decimal(totals['retail_value']).quantize(TWO_PLACES),
+    }
+
+
+def current_valuation() -> Dict[str, Any]:
+    """{'quantity', 'cost_value', 'retail_value'} do estoque atual.
+
+    Um único agregado no banco, em cache até a próxima alteração do catálogo.
+    """
+    key = f'products:valuation:{current_version()}'
+    valuation = metrics_cache.get(key)
+    if valuation is None:
+        valuation = _build_valuation()
+        metrics_cache.set(key, valuation, VALUATION_CACHE_TIMEOUT)
+    return valuation
+
+
+def sales_totals(day: date) -> Dict[str, Decimal]:
+    """Receita e custo (pelo unit_cost gravado em cada item) das vendas finalizadas no dia."""
+    totals = SaleItem.objects.filter(
+        sale__status__in=[Sale.Status.FINALIZED, Sale.Status.PARTIALLY_RETURNED, Sale.Status.FULLY_RETURNED],
+        sale__finalized_at__date=day,
+    ).aggregate(
+        revenue=Coalesce(Sum('line_total'), Value(Decimal('0')), output_field=_MONEY),
+        cogs=Coalesce(Sum(ExpressionWrapper(F('unit_cost') * F('quantity'), output_field=_MONEY)), Value(Decimal('0')), output_field=_MONEY),
+    )
+    return {key: Decimal(value).quantize(TWO_PLACES) for key, value in totals.items()}
+
+
+def _closing_valuation(day: date) -> Dict[str, Any]:
+    """Quantidade e valor do estoque no fim de `day`, pelo diário de estoque.
+
+    Não há histórico de preços: o saldo é o do dia, mas custo médio e preço
+    de venda são os atuais.
+    """
+    balances = {product_id: quantity for product_id, quantity in stock.stock_on(day).items() if quantity > 0}
+    cost_value = retail_value = Decimal('0')
+    for product_id, cost_price, average_cost, selling_price in Product.objects.filter(
+        id__in=balances,
+    ).values_list('id', 'cost_price', 'average_cost', 'selling_price').iterator(chunk_size=stock.BATCH_SIZE):
+        quantity = balances[product_id]
+        cost_value += quantity * (cost_price if average_cost is None else average_cost)
+        retail_value += quantity * selling_price
+    return {
+        'quantity': sum(balances.values()),
+        'cost_value': cost_value.quantize(TWO_PLACES),
+        'retail_value': retail_value.quantize(TWO_PLACES),
+    }
+
+
+def take_valuation(day: date = None) -> InventoryValuation:
+    """Grava (ou regrava) o fechamento de `day` (padrão: ontem).
+
+    O saldo é o do fim do dia (stock.stock_on), então o comando pode ser
+    repetido ou rodado depois para datas passadas.
+    """
+    day = day or timezone.now().date() - timedelta(days=1)
+    valuation, _ = InventoryValuation.objects.update_or_create(
+        date=day,
+        defaults={**_closing_valuation(day), **sales_totals(day)},
+    )
+    return valuation
+
+
+def valuation_history(days: int = 30) -> List[InventoryValuation]:
+    since = timezone.now().date() - timedelta(days=days)
+    return list(InventoryValuation.objects.filter(date__gte=since).order_by('date'))
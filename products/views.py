@@ -1,4 +1,6 @@
+import io
 import re
+from datetime import date
 from django.db.models import Q
 from django.db.models.deletion import ProtectedError
 from django.contrib import messages
@@ -8,12 +10,14 @@ from rest_framework.authentication import SessionAuthentication
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.urls import reverse_lazy
-from django.views.generic import ListView, CreateView, DetailView, UpdateView, DeleteView
+from django.utils import timezone
+from django.views.generic import ListView, CreateView, DetailView, UpdateView, DeleteView, TemplateView
 from rest_framework.response import Response
-from app import metrics
+from rest_framework.views import APIView
+from app import metrics, search_cache
 from brands.models import Brand
 from categories.models import Category
-from . import models, forms, serializers
+from . import models, forms, serializers, catalog, importers, stock, valuation
 
 
 class ProductListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
@@ -24,7 +28,7 @@ class ProductListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     permission_required = 'products.view_product'
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related('category', 'brand')
         title = self.request.GET.get('title')
         serie_number = self.request.GET.get('serie_number')
         category = self.request.GET.get('category')
@@ -97,6 +101,43 @@ class ProductDeleteView(LoginRequiredMixin, PermissionRequiredMixin, DeleteView)
             return HttpResponseRedirect(self.get_success_url())
 
 
+class ProductImportView(LoginRequiredMixin, PermissionRequiredMixin, TemplateView):
+    """Upload de CSV de produtos ou de entradas de estoque (importers.IMPORTERS)."""
+    template_name = 'product_import.html'
+
+    def get_kind(self):
+        kind = self.request.POST.get('kind') or self.request.GET.get('kind')
+        return kind if kind in importers.IMPORTERS else 'products'
+
+    def get_permission_required(self):
+        return importers.IMPORTERS[self.get_kind()]['permissions']
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['kind'] = self.get_kind()
+        context['importers'] = importers.IMPORTERS
+        return context
+
+    def post(self, request, *args, **kwargs):
+        context = self.get_context_data()
+        upload = request.FILES.get('file')
+        if not upload:
+            messages.error(request, 'Selecione um arquivo CSV.')
+            return self.render_to_response(context)
+
+        importer = importers.get_importer(context['kind'], dry_run=bool(request.POST.get('dry_run')))
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            context['report'] = importer.run(stream)
+        except UnicodeDecodeError:
+            messages.error(request, 'O arquivo precisa estar codificado em UTF-8.')
+        finally:
+            stream.detach()
+
+        context['dry_run'] = importer.dry_run
+        return self.render_to_response(context)
+
+
 class ProductCreateListAPIView(generics.ListCreateAPIView):
     authentication_classes = (SessionAuthentication, JWTAuthentication)
     permission_classes = (permissions.IsAuthenticated,)
@@ -107,7 +148,7 @@ class ProductCreateListAPIView(generics.ListCreateAPIView):
         search = self.request.query_params.get('search')
 
         if search:
-            search = search.strip()
+            search = search_cache.query_term(search)
             numeric = re.sub(r'\D', '', search)
             query = Q(title__icontains=search) | Q(serie_number__icontains=search)
 
@@ -122,6 +163,118 @@ class ProductCreateListAPIView(generics.ListCreateAPIView):
 
         return queryset.order_by('title')[:10]
 
+    def list(self, request, *args, **kwargs):
+        search = request.query_params.get('search')
+        if not search:
+            return super().list(request, *args, **kwargs)
+
+        data = search_cache.get_or_set(
+            search_cache.PRODUCTS,
+            search,
+            lambda: self.get_serializer(self.get_queryset(), many=True).data,
+            scope=request.get_host(),
+        )
+        return Response(data)
+
+
+class ProductCatalogAPIView(APIView):
+    """Catálogo compacto e versionado para busca local no PDV.
+
+    `?since=N` retorna apenas as alterações após a versão N. A resposta leva
+    ETag com a versão, então o cliente revalida sem baixar nada quando o
+    catálogo não mudou.
+    """
+    authentication_classes = (SessionAuthentication, JWTAuthentication)
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request):
+        try:
+            since = max(0, int(request.query_params.get('since') or 0))
+        except ValueError:
+            since = 0
+
+        versions = catalog.version_range()
+        version = versions[1]
+        # Versão inválida ou já removida (prune_changes): catálogo completo
+        if not catalog.delta_available(since, versions):
+            since = 0
+        etag = f'"catalog-{since}-{version}"'
+
+        # O GZip transforma a ETag em fraca (W/"..."), então compara sem o prefixo
+        if_none_match = request.headers.get('If-None-Match', '')
+        client_etags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+
+        if etag in client_etags:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            data = catalog.build_delta(since) if since else catalog.build_snapshot()
+            etag = f'"catalog-{since}-{data["version"]}"'
+            response = Response(data)
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class StockMovementReportAPIView(APIView):
+    """Movimentação de estoque no período, por produto.
+
+    `?date_from=AAAA-MM-DD&date_to=AAAA-MM-DD&product=1&product=2`. O saldo
+    inicial vem do último snapshot anterior ao período mais os movimentos
+    desde ele; `end_balance` é o estoque no fim de `date_to`.
+    """
+    authentication_classes = (SessionAuthentication, JWTAuthentication)
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request):
+        try:
+            date_to = date.fromisoformat(request.query_params.get('date_to') or str(timezone.now().date()))
+            date_from = date.fromisoformat(request.query_params.get('date_from') or str(date_to))
+            product_ids = [int(pk) for pk in request.query_params.getlist('product')] or None
+        except ValueError:
+            return Response({'detail': 'Parâmetros inválidos.'}, status=status.HTTP_400_BAD_REQUEST)
+        if date_from > date_to:
+            return Response({'detail': 'date_from deve ser anterior a date_to.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = stock.movement_report(date_from, date_to, product_ids)
+        titles = dict(models.Product.objects.filter(id__in=[row['product_id'] for row in rows]).values_list('id', 'title'))
+        for row in rows:
+            row['title'] = titles.get(row['product_id'], '')
+        return Response({'date_from': date_from, 'date_to': date_to, 'rows': rows})
+
+
+class InventoryValuationAPIView(APIView):
+    """Valor atual do estoque (custo médio) e fechamentos diários (`?days=30`)."""
+    authentication_classes = (SessionAuthentication, JWTAuthentication)
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request):
+        try:
+            days = min(max(int(request.query_params.get('days') or 30), 1), 366)
+        except ValueError:
+            days = 30
+
+        current = valuation.current_valuation()
+        return Response({
+            'current': {
+                'quantity': current['quantity'],
+                'cost_value': str(current['cost_value']),
+                'retail_value': str(current['retail_value']),
+            },
+            'history': [
+                {
+                    'date': row.date,
+                    'quantity': row.quantity,
+                    'cost_value': str(row.cost_value),
+                    'retail_value': str(row.retail_value),
+                    'revenue': str(row.revenue),
+                    'cogs': str(row.cogs),
+                    'gross_margin': str(row.gross_margin),
+                }
+                for row in valuation.valuation_history(days)
+            ],
+        })
+
 
 class ProductRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
     authentication_classes = (SessionAuthentication, JWTAuthentication)
@@ -0,0 +1,154 @@
+"""
+Teste de carga local: mede vazão e latência de uma URL e compara o
+runserver com o Gunicorn (gunicorn.conf.py).
+
+    # Mede um servidor já em execução
+    python scripts/load_test.py --base-url http://127.0.0.1:8001 --path /login/
+
+    # Sobe runserver e Gunicorn em portas livres, roda a mesma carga nos dois
+    python scripts/load_test.py --compare --concurrency 32 --duration 15
+
+Cada thread usa uma conexão keep-alive própria (http.client), como um
+navegador/PDV faria. Só biblioteca padrão.
+"""
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(base_url: str, path: str, timeout: float = 30.0) -> None:
+    parts = urlsplit(base_url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=2)
+            conn.request('GET', path)
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Servidor não respondeu em {timeout:.0f}s: {base_url}')
+
+
+def _worker(base_url: str, path: str, deadline: float, latencies: list, errors: list) -> None:
+    parts = urlsplit(base_url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            conn.request('GET', path, headers={'Connection': 'keep-alive'})
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 500:
+                errors.append(response.status)
+            latencies.append(time.perf_counter() - started)
+            if response.getheader('Connection', '').lower() == 'close':
+                conn.close()
+        except (OSError, http.client.HTTPException) as exc:
+            errors.append(type(exc).__name__)
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    conn.close()
+
+
+def run_load(base_url: str, path: str, concurrency: int, duration: float) -> dict:
+    """Dispara `concurrency` clientes por `duration` segundos e retorna as métricas."""
+    latencies, errors = [], []
+    started = time.monotonic()
+    deadline = started + duration
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(_worker, base_url, path, deadline, latencies, errors)
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'mean_ms': statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+    }
+
+
+def _start(name: str, port: int, env: dict) -> subprocess.Popen:
+    if name == 'runserver':
+        command = [sys.executable, 'manage.py', 'runserver', '--noreload', f'127.0.0.1:{port}']
+    else:
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+                   'app.wsgi:application']
+        # Sem access log, para não medir a escrita no terminal
+        env = {**env, 'GUNICORN_ACCESS_LOG': ''}
+    return subprocess.Popen(command, cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _print_table(results: dict) -> None:
+    columns = ['requests', 'errors', 'rps', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms']
+    print(f'{"servidor":<12}' + ''.join(f'{column:>11}' for column in columns))
+    for name, result in results.items():
+        print(f'{name:<12}' + ''.join(
+            f'{result[column]:>11.1f}' if isinstance(result[column], float) else f'{result[column]:>11}'
+            for column in columns
+        ))
+    if len(results) == 2:
+        base, other = results.values()
+        if base['rps']:
+            print(f'\nGanho de vazão: {other["rps"] / base["rps"]:.2f}x')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8001')
+    parser.add_argument('--path', default='/login/')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0, help='Segundos de carga por servidor')
+    parser.add_argument('--warmup', type=float, default=2.0, help='Segundos de aquecimento (não medidos)')
+    parser.add_argument('--compare', action='store_true', help='Sobe runserver e Gunicorn e compara')
+    args = parser.parse_args()
+
+    if not args.compare:
+        run_load(args.base_url, args.path, args.concurrency, args.warmup)
+        _print_table({'alvo': run_load(args.base_url, args.path, args.concurrency, args.duration)})
+        return
+
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'app.settings'}
+    results = {}
+    for name in ('runserver', 'gunicorn'):
+        port = _free_port()
+        base_url = f'http://127.0.0.1:{port}'
+        process = _start(name, port, env)
+        try:
+            _wait_ready(base_url, args.path)
+            run_load(base_url, args.path, args.concurrency, args.warmup)
+            results[name] = run_load(base_url, args.path, args.concurrency, args.duration)
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+    _print_table(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -23,11 +23,13 @@ os.chdir(PROJECT_ROOT)
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 django.setup()
 
-from categories.models import Category
-from brands.models import Brand
-from suppliers.models import Supplier
-from customers.models import Customer
-from products.models import Product
+# Os models só podem ser importados depois do django.setup()
+from categories.models import Category  # noqa: E402
+from brands.models import Brand  # noqa: E402
+from suppliers.models import Supplier  # noqa: E402
+from customers.models import Customer  # noqa: E402
+from products.models import Product  # noqa: E402
+from products import stock  # noqa: E402
 
 
 def create_categories():
@@ -76,8 +78,10 @@ def create_customers(count=20):
         objs.append(Customer(
             full_name=full_name,
             phone=phone,
+            phone_digits=phone,
             email=email,
             cpf=cpf,
+            cpf_digits=cpf,
             city='Cidade',
             state='ST'
         ))
@@ -117,6 +121,8 @@ def create_products(count=30):
         ))
     if objs:
         Product.objects.bulk_create(objs)
+        # Estoque criado direto no produto entra no diário como ajuste
+        stock.reconcile()
     print('Products:', Product.objects.count())
 
 
@@ -0,0 +1,26 @@
+#!/bin/sh
+# Inicialização do container em produção.
+#
+# - aplica as migrações
+# - popula dados fictícios só com SEED_DEMO_DATA=True (nunca por padrão)
+# - sobe o Gunicorn (gunicorn.conf.py) com app.wsgi ou app.asgi
+#
+# Os arquivos estáticos já foram coletados no build da imagem e são
+# servidos pelo WhiteNoise.
+set -e
+
+cron
+
+python manage.py migrate --noinput
+
+if [ "$SEED_DEMO_DATA" = "True" ]; then
+    python scripts/populate_demo_data.py
+fi
+
+if [ "$SERVER_INTERFACE" = "asgi" ]; then
+    APP_MODULE=app.asgi:application
+else
+    APP_MODULE=app.wsgi:application
+fi
+
+exec gunicorn -c gunicorn.conf.py "$APP_MODULE"